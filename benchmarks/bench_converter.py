@@ -0,0 +1,79 @@
+"""Benchmarks do IRConverter"""
+
+import pytest
+
+from ir_analysis import analyze_packet
+from ir_converter import IRConverter
+from ir_formats import FORMATS
+
+
+def bench_broadlink_to_pronto(benchmark, packets):
+    """Conversões Base64 -> Pronto (rodada = todos os pacotes do conjunto)"""
+    converter = IRConverter()
+    
+    def convert_all():
+        for code in packets:
+            converter.broadlink_to_pronto(code)
+    
+    benchmark.extra_info["codes_per_round"] = len(packets)
+    benchmark(convert_all)
+
+
+def bench_parse_broadlink_data(benchmark, packets):
+    """Extração de timings dos pacotes Broadlink"""
+    converter = IRConverter()
+    raw = [converter.base64_to_bytes(code) for code in packets]
+    
+    def parse_all():
+        for data in raw:
+            converter.parse_broadlink_data(data)
+    
+    benchmark.extra_info["codes_per_round"] = len(raw)
+    benchmark(parse_all)
+
+
+def bench_timings_to_pronto(benchmark, packets):
+    """Geração do Pronto Hex a partir de timings já extraídos"""
+    converter = IRConverter()
+    timings = [
+        converter.parse_broadlink_data(converter.base64_to_bytes(code))[0]
+        for code in packets
+    ]
+    
+    def encode_all():
+        for values in timings:
+            converter.timings_to_pronto(values)
+    
+    benchmark.extra_info["codes_per_round"] = len(timings)
+    benchmark(encode_all)
+
+
+def bench_analyze_packet(benchmark, packets):
+    """Estágio pós-captura: agrupamento, normalização e remoção de repetições"""
+    converter = IRConverter()
+    raw = [converter.base64_to_bytes(code) for code in packets[:32]]
+    
+    def analyze_all():
+        for data in raw:
+            analyze_packet(data, converter)
+    
+    benchmark.extra_info["codes_per_round"] = len(raw)
+    benchmark(analyze_all)
+
+
+@pytest.mark.parametrize("format_name", sorted(FORMATS))
+def bench_encode_format(benchmark, packets, format_name):
+    """Codificação de timings já extraídos em cada formato do registro"""
+    converter = IRConverter()
+    fmt = FORMATS[format_name]
+    timings = [
+        converter.parse_broadlink_data(converter.base64_to_bytes(code))[0]
+        for code in packets
+    ]
+    
+    def encode_all():
+        for values in timings:
+            fmt.encode(values)
+    
+    benchmark.extra_info["codes_per_round"] = len(timings)
+    benchmark(encode_all)
@@ -0,0 +1,150 @@
+"""Benchmarks do BroadlinkIRCoordinator e do config flow contra RMs emulados"""
+
+import asyncio
+import os
+import random
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+pytest.importorskip("broadlink")
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry  # noqa: E402
+
+from broadlink_emulator import BroadlinkEmulator  # noqa: E402
+from conftest import make_packet  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.broadlink_ir_manager.config_flow import validate_input  # noqa: E402
+from custom_components.broadlink_ir_manager.const import (  # noqa: E402
+    CONF_HOST,
+    CONF_MAC,
+    CONF_PORT,
+    DOMAIN,
+)
+from custom_components.broadlink_ir_manager.coordinator import (  # noqa: E402
+    BroadlinkIRCoordinator,
+    async_broadcast_packet,
+)
+
+# Latências simuladas do dispositivo (ida e volta), em segundos
+DEVICE_LATENCIES = [0.0, 0.005]
+
+# Quantidade de dispositivos nos benchmarks de concorrência
+DEVICE_COUNTS = [1, 4, 16]
+
+
+def _entry_data(emulator: BroadlinkEmulator) -> dict:
+    """Dados da config entry apontando para o emulador"""
+    return {
+        CONF_HOST: emulator.address[0],
+        CONF_PORT: emulator.address[1],
+        CONF_MAC: emulator.mac,
+    }
+
+
+async def _connect(hass, emulator: BroadlinkEmulator) -> BroadlinkIRCoordinator:
+    """Coordinator autenticado no emulador pelo caminho normal de setup"""
+    entry = MockConfigEntry(domain=DOMAIN, data=_entry_data(emulator))
+    coordinator = BroadlinkIRCoordinator(hass, entry)
+    await coordinator._async_setup_device()
+    return coordinator
+
+
+async def _learn(coordinator: BroadlinkIRCoordinator):
+    """enter_learning seguido de check_data (o emulador entrega o código na hora)"""
+    await coordinator._async_device_call(
+        "enter_learning", coordinator._broadlink_device.enter_learning
+    )
+    return await coordinator.get_learned_code()
+
+
+@pytest.fixture
+def emulators(socket_enabled):
+    """Fábrica de RMs emulados, encerrados ao final do benchmark"""
+    started = []
+    
+    def factory(count=1, **options):
+        for number in range(count):
+            emulator = BroadlinkEmulator(
+                learned_code=make_packet(random.Random(number)), seed=number, **options
+            )
+            emulator.start()
+            started.append(emulator)
+        return started[-count:]
+    
+    yield factory
+    for emulator in started:
+        emulator.stop()
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("latency", DEVICE_LATENCIES, ids=lambda l: f"{l * 1000:g}ms")
+def bench_validate_input(benchmark, hass, emulators, latency):
+    """Config flow: autenticação completa no dispositivo (host + MAC + porta)"""
+    emulator, = emulators(latency=latency)
+    run = hass.loop.run_until_complete
+    benchmark(lambda: run(validate_input(hass, _entry_data(emulator))))
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("latency", DEVICE_LATENCIES, ids=lambda l: f"{l * 1000:g}ms")
+def bench_get_learned_code(benchmark, hass, emulators, latency):
+    """enter_learning + check_data + conversão para Base64 + atualização do estado"""
+    emulator, = emulators(latency=latency)
+    run = hass.loop.run_until_complete
+    coordinator = run(_connect(hass, emulator))
+    
+    assert benchmark(lambda: run(_learn(coordinator)))
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("latency", DEVICE_LATENCIES, ids=lambda l: f"{l * 1000:g}ms")
+def bench_start_stop_learning(benchmark, hass, emulators, latency):
+    """start_learning seguido de stop_learning"""
+    emulator, = emulators(latency=latency)
+    run = hass.loop.run_until_complete
+    coordinator = run(_connect(hass, emulator))
+    
+    async def cycle():
+        await coordinator.start_learning(timeout=30)
+        await coordinator.stop_learning()
+    
+    benchmark(lambda: run(cycle()))
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("count", DEVICE_COUNTS, ids=lambda c: f"{c}dev")
+def bench_concurrent_learning(benchmark, hass, emulators, count):
+    """Captura simultânea em vários dispositivos (5 ms de latência cada)"""
+    devices = emulators(count, latency=0.005)
+    run = hass.loop.run_until_complete
+    coordinators = run(asyncio.gather(*(_connect(hass, device) for device in devices)))
+    
+    codes = benchmark(lambda: run(asyncio.gather(*(_learn(c) for c in coordinators))))
+    assert all(codes)
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("count", DEVICE_COUNTS, ids=lambda c: f"{c}dev")
+def bench_broadcast_packet(benchmark, hass, emulators, count):
+    """Mesmo código enviado a vários dispositivos (5 ms de latência cada)"""
+    devices = emulators(count, latency=0.005)
+    run = hass.loop.run_until_complete
+    coordinators = run(asyncio.gather(*(_connect(hass, device) for device in devices)))
+    packet = make_packet(random.Random(0))
+    
+    result = benchmark(lambda: run(async_broadcast_packet(coordinators, packet, 5)))
+    assert result["succeeded"] == count
+
+
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+def bench_get_learned_code_with_loss(benchmark, hass, emulators):
+    """check_data com 10% de perda de pacotes (retransmissão do python-broadlink)"""
+    emulator, = emulators(loss=0.1)
+    run = hass.loop.run_until_complete
+    coordinator = run(_connect(hass, emulator))
+    
+    benchmark.pedantic(lambda: run(_learn(coordinator)), rounds=20)
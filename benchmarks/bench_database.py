@@ -0,0 +1,121 @@
+"""Benchmarks do IRDatabase com bibliotecas sintéticas de 1k/10k/100k códigos"""
+
+import itertools
+import shutil
+
+import pytest
+
+from conftest import LIBRARY_SIZES
+from ir_database import IRDatabase, STORAGE_BINARY
+from ir_commands import CommandMap
+from ir_macros import MacroLibrary
+
+
+@pytest.fixture(params=LIBRARY_SIZES, ids=lambda size: f"{size // 1000}k")
+def library(request, library_factory, tmp_path):
+    """Cópia da biblioteca sintética, para que cada benchmark possa alterá-la"""
+    path = tmp_path / "ir_codes.json"
+    shutil.copy(library_factory(request.param), path)
+    return str(path)
+
+
+@pytest.fixture
+def database(library):
+    """Base carregada a partir da biblioteca sintética"""
+    return IRDatabase(library)
+
+
+def bench_startup_index(benchmark, library):
+    """Abertura da base até o índice estar disponível (carregamento no startup)"""
+    benchmark(lambda: IRDatabase(library).ensure_loaded())
+
+
+def bench_startup_full_hydration(benchmark, library):
+    """Abertura da base hidratando todos os códigos"""
+    benchmark.pedantic(lambda: IRDatabase(library).get_all_codes(), rounds=3)
+
+
+def bench_startup_binary_index(benchmark, library, tmp_path):
+    """Abertura do índice no formato binário"""
+    binary_path = str(tmp_path / "ir_codes.irdb")
+    IRDatabase(binary_path, STORAGE_BINARY)  # migra o JSON
+    benchmark(lambda: IRDatabase(binary_path, STORAGE_BINARY).ensure_loaded())
+
+
+def bench_add_code(benchmark, database, packets):
+    """add_code, incluindo conversão e gravação da base"""
+    counter = itertools.count()
+    
+    def add():
+        number = next(counter)
+        database.add_code(f"Bench {number}", "Bench", f"bench_{number}", packets[0])
+    
+    benchmark.pedantic(add, rounds=5)
+
+
+def bench_search_codes(benchmark, database):
+    """Busca textual em nome, dispositivo, comando e notas"""
+    database.get_all_codes()
+    benchmark(database.search_codes, "command_99")
+
+
+def bench_get_statistics(benchmark, database):
+    """Estatísticas usadas pelo sensor da base"""
+    benchmark(database.get_statistics)
+
+
+def bench_get_codes_by_device(benchmark, database):
+    """Códigos de um dispositivo (hidratados)"""
+    benchmark(database.get_codes_by_device, "Device 7")
+
+
+def bench_save_database(benchmark, database):
+    """Regravação completa da base"""
+    benchmark.pedantic(database.save_database, rounds=3)
+
+
+@pytest.mark.parametrize("format_name", ["lirc", "tuya"])
+def bench_export_to_format(benchmark, database, tmp_path, format_name):
+    """Exportação em streaming de toda a base para LIRC/Tuya"""
+    path = str(tmp_path / f"export.{format_name}")
+    benchmark.pedantic(database.export_to_format, (path, format_name), rounds=3)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["compile", "cached"])
+def bench_compile_macro(benchmark, database, tmp_path, cached):
+    """Macro de 3 códigos: compilação do pacote único ou leitura do cache"""
+    macros = MacroLibrary(database, str(tmp_path / "ir_macros.json"))
+    code_ids = list(itertools.islice(database.codes, 3))
+    macros.set_macro("Bench", [{"code_id": code_id, "delay": 500} for code_id in code_ids])
+    
+    if cached:
+        benchmark(macros.compile, "Bench")
+    else:
+        benchmark(lambda: macros._compile(macros.get_macro("Bench")))
+
+
+def bench_resolve_command(benchmark, database):
+    """Pacote de device/command pelo mapa em memória (já montado e decodificado)"""
+    commands = CommandMap(database)
+    device, command = next(iter(database.codes.index_items()))[1]
+    commands.packet(device, command)
+    benchmark(commands.cached, device, command)
+
+
+def bench_prewarm_hot_codes(benchmark, database):
+    """Pré-carregamento dos 256 códigos mais enviados (startup)"""
+    for code_id, _ in list(database.codes.index_items())[:1000]:
+        database.record_use(code_id)
+    
+    def prewarm():
+        commands = CommandMap(database)
+        commands.build()
+        return commands.prewarm()
+    
+    benchmark(prewarm)
+
+
+def bench_build_command_map(benchmark, database):
+    """Montagem do mapa de comandos a partir do índice (startup)"""
+    commands = CommandMap(database)
+    benchmark(commands.build)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Emulador local de dispositivos Broadlink RM
+Implementa o protocolo UDP do python-broadlink (descoberta, autenticação,
+learning, check_data e send_data) em localhost, com latência, perda de
+pacotes e injeção de códigos aprendidos configuráveis
+"""
+
+import argparse
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+MAGIC = bytes.fromhex("5aa5aa555aa5aa55")
+INITIAL_KEY = bytes.fromhex("097628343fe99e23765c1513accf8b02")
+IV = bytes.fromhex("562e17996d093d28ddb3ba695a2e6f58")
+
+DEVTYPE_RM_MINI_3 = 0x2737
+
+# Tipos de pacote
+PACKET_HELLO = 0x06
+PACKET_HELLO_RESPONSE = 0x07
+PACKET_AUTH = 0x65
+PACKET_AUTH_RESPONSE = 0x3E9
+PACKET_COMMAND = 0x6A
+PACKET_COMMAND_RESPONSE = 0x3EE
+
+# Comandos do RM (payload <I)
+COMMAND_SEND_DATA = 0x02
+COMMAND_ENTER_LEARNING = 0x03
+COMMAND_CHECK_DATA = 0x04
+
+# Códigos de erro do firmware
+ERROR_AUTHENTICATION = -1
+ERROR_NOT_SUPPORTED = -4
+ERROR_READ = -10
+
+
+def _checksum(data: bytes) -> int:
+    """Checksum do protocolo Broadlink"""
+    return sum(data, 0xBEAF) & 0xFFFF
+
+
+class EmulatedDevice:
+    """Estado de um RM emulado (chaves, modo learning e códigos)"""
+    
+    def __init__(self, mac: bytes, devtype: int = DEVTYPE_RM_MINI_3,
+                 name: str = "RM Emulator", learned_code: Optional[bytes] = None,
+                 learn_delay: float = 0.0):
+        self.mac = mac
+        self.devtype = devtype
+        self.name = name
+        self.learned_code = learned_code
+        self.learn_delay = learn_delay
+        self.key = INITIAL_KEY
+        self.id = 0
+        self.learning_since: Optional[float] = None
+        self.sent_codes: List[bytes] = []
+    
+    def inject_code(self, packet: bytes, learn_delay: Optional[float] = None) -> None:
+        """Define o código entregue pelo check_data após enter_learning"""
+        self.learned_code = packet
+        if learn_delay is not None:
+            self.learn_delay = learn_delay
+    
+    def encrypt(self, payload: bytes, key: Optional[bytes] = None) -> bytes:
+        encryptor = Cipher(algorithms.AES(key or self.key), modes.CBC(IV)).encryptor()
+        return encryptor.update(payload) + encryptor.finalize()
+    
+    def decrypt(self, payload: bytes, key: Optional[bytes] = None) -> bytes:
+        decryptor = Cipher(algorithms.AES(key or self.key), modes.CBC(IV)).decryptor()
+        return decryptor.update(payload) + decryptor.finalize()
+    
+    def hello_response(self) -> bytes:
+        """Resposta à descoberta (broadlink.discover / broadlink.hello)"""
+        packet = bytearray(0x80)
+        packet[0x26] = PACKET_HELLO_RESPONSE
+        packet[0x34:0x36] = self.devtype.to_bytes(2, "little")
+        packet[0x3A:0x40] = self.mac[::-1]
+        name = self.name.encode()[:0x3E]
+        packet[0x40:0x40 + len(name)] = name
+        packet[0x20:0x22] = _checksum(packet).to_bytes(2, "little")
+        return bytes(packet)
+    
+    def handle(self, request: bytes) -> Optional[bytes]:
+        """Processa um datagrama. Retorna: resposta ou None se for ignorado"""
+        if len(request) == 0x30 and request[0x26] == PACKET_HELLO:
+            return self.hello_response()
+        
+        if len(request) < 0x38 or request[:8] != MAGIC:
+            return None
+        
+        nominal = int.from_bytes(request[0x20:0x22], "little")
+        if nominal != (_checksum(request) - sum(request[0x20:0x22])) & 0xFFFF:
+            return None
+        
+        packet_type = int.from_bytes(request[0x26:0x28], "little")
+        count = request[0x28:0x2A]
+        
+        if packet_type == PACKET_AUTH:
+            self.id = random.getrandbits(32) or 1
+            key = bytes(random.getrandbits(8) for _ in range(16))
+            payload = self.id.to_bytes(4, "little") + key + bytes(12)
+            response = self._response(PACKET_AUTH_RESPONSE, count, 0, payload, INITIAL_KEY)
+            self.key = key
+            return response
+        
+        if packet_type != PACKET_COMMAND:
+            return self._response(packet_type, count, ERROR_NOT_SUPPORTED)
+        
+        if not self.id or int.from_bytes(request[0x30:0x34], "little") != self.id:
+            return self._response(PACKET_COMMAND_RESPONSE, count, ERROR_AUTHENTICATION)
+        
+        payload = self.decrypt(request[0x38:])
+        command = struct.unpack("<I", payload[:4])[0]
+        error, data = self._command(command, payload[4:])
+        return self._response(PACKET_COMMAND_RESPONSE, count, error,
+                              payload[:4] + data if not error else b"")
+    
+    def _command(self, command: int, data: bytes) -> Tuple[int, bytes]:
+        """Executa comando do RM. Retorna: (código de erro, dados)"""
+        if command == COMMAND_ENTER_LEARNING:
+            self.learning_since = time.monotonic()
+            return 0, b""
+        
+        if command == COMMAND_CHECK_DATA:
+            if (self.learning_since is None or self.learned_code is None
+                    or time.monotonic() - self.learning_since < self.learn_delay):
+                return ERROR_READ, b""
+            self.learning_since = None
+            return 0, self.learned_code
+        
+        if command == COMMAND_SEND_DATA:
+            self.sent_codes.append(data.rstrip(b"\x00"))
+            return 0, b""
+        
+        return ERROR_NOT_SUPPORTED, b""
+    
+    def _response(self, packet_type: int, count: bytes, error: int,
+                  payload: bytes = b"", key: Optional[bytes] = None) -> bytes:
+        """Monta resposta com cabeçalho, checksums e payload criptografado"""
+        packet = bytearray(0x38)
+        packet[:8] = MAGIC
+        packet[0x22:0x24] = struct.pack("<h", error)
+        packet[0x24:0x26] = self.devtype.to_bytes(2, "little")
+        packet[0x26:0x28] = packet_type.to_bytes(2, "little")
+        packet[0x28:0x2A] = count
+        packet[0x2A:0x30] = self.mac[::-1]
+        packet[0x30:0x34] = self.id.to_bytes(4, "little")
+        if payload:
+            packet[0x34:0x36] = _checksum(payload).to_bytes(2, "little")
+            payload += bytes(-len(payload) % 16)
+            packet += self.encrypt(payload, key)
+        packet[0x20:0x22] = _checksum(packet).to_bytes(2, "little")
+        return bytes(packet)
+
+
+class BroadlinkEmulator(threading.Thread):
+    """
+    Servidor UDP de um RM emulado
+    Cada datagrama é descartado com probabilidade loss; os demais são
+    respondidos após latency (+ jitter aleatório) segundos, em ordem,
+    como em um dispositivo real.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 mac: Optional[bytes] = None, latency: float = 0.0,
+                 jitter: float = 0.0, loss: float = 0.0,
+                 learned_code: Optional[bytes] = None, learn_delay: float = 0.0,
+                 seed: Optional[int] = None):
+        super().__init__(daemon=True)
+        self._random = random.Random(seed)
+        self.device = EmulatedDevice(
+            mac or bytes([0x34, 0xEA, 0x34]) + self._random.randbytes(3),
+            learned_code=learned_code, learn_delay=learn_delay,
+        )
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.stats: Dict[str, int] = {"received": 0, "dropped": 0, "answered": 0}
+        
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.settimeout(0.1)
+        self.address: Tuple[str, int] = self.socket.getsockname()
+        self._running = True
+    
+    @property
+    def mac(self) -> str:
+        """MAC no formato aa:bb:cc:dd:ee:ff"""
+        return ":".join(f"{b:02x}" for b in self.device.mac)
+    
+    def inject_code(self, packet: bytes, learn_delay: Optional[float] = None) -> None:
+        """Define o código que o dispositivo "aprende" no próximo learning"""
+        self.device.inject_code(packet, learn_delay)
+    
+    def run(self) -> None:
+        """Laço de atendimento dos datagramas"""
+        while self._running:
+            try:
+                request, sender = self.socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            
+            self.stats["received"] += 1
+            if self.loss and self._random.random() < self.loss:
+                self.stats["dropped"] += 1
+                continue
+            
+            response = self.device.handle(request)
+            if response is None:
+                continue
+            
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                time.sleep(delay)
+            try:
+                self.socket.sendto(response, sender)
+            except OSError:
+                return
+            self.stats["answered"] += 1
+    
+    def stop(self) -> None:
+        """Encerra o servidor"""
+        self._running = False
+        if self.is_alive():
+            self.join()
+        self.socket.close()
+    
+    def __enter__(self) -> "BroadlinkEmulator":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="porta do primeiro dispositivo (as seguintes são consecutivas)")
+    parser.add_argument("--devices", type=int, default=1, help="quantidade de dispositivos")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência em ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="variação máxima em ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidade de perda (0-1)")
+    parser.add_argument("--code", help="código Base64 entregue pelo check_data")
+    parser.add_argument("--learn-delay", type=float, default=0.0,
+                        help="segundos entre enter_learning e o código ficar disponível")
+    args = parser.parse_args()
+    
+    code = None
+    if args.code:
+        import base64
+        code = base64.b64decode(args.code)
+    
+    emulators = []
+    for number in range(args.devices):
+        emulator = BroadlinkEmulator(
+            args.host, args.port + number, latency=args.latency / 1000,
+            jitter=args.jitter / 1000, loss=args.loss, learned_code=code,
+            learn_delay=args.learn_delay,
+        )
+        emulator.start()
+        emulators.append(emulator)
+        print(f"RM emulado em {emulator.address[0]}:{emulator.address[1]} (MAC {emulator.mac})")
+    
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for emulator in emulators:
+            emulator.stop()
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
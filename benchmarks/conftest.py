@@ -0,0 +1,96 @@
+"""Fixtures compartilhadas dos benchmarks do Broadlink IR Manager"""
+
+import base64
+import datetime
+import json
+import os
+import random
+import struct
+import sys
+from typing import Callable, List
+
+import pytest
+
+COMPONENT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "custom_components", "broadlink_ir_manager",
+)
+sys.path.insert(0, COMPONENT_DIR)
+
+from ir_converter import IRConverter  # noqa: E402
+
+# Tamanhos das bibliotecas sintéticas
+LIBRARY_SIZES = [1_000, 10_000, 100_000]
+
+# Pacotes distintos reaproveitados nas bibliotecas sintéticas
+PACKET_POOL_SIZE = 256
+
+# Ticks típicos de controles NEC/RC5 (unidades Broadlink)
+TYPICAL_TICKS = [17, 17, 17, 51, 51, 27, 137, 274, 1200]
+
+
+def make_packet(rng: random.Random) -> bytes:
+    """Gera pacote Broadlink IR plausível (0x26, pulsos, pausa final 0x0d05)"""
+    pulses = bytearray()
+    for _ in range(rng.randint(40, 200)):
+        tick = rng.choice(TYPICAL_TICKS) + rng.randint(-2, 2)
+        if tick < 0x100:
+            pulses.append(tick)
+        else:
+            pulses += b"\x00" + struct.pack(">H", tick)
+    pulses += b"\x00\x0d\x05"
+    packet = bytes([0x26, 0x00]) + struct.pack("<H", len(pulses)) + bytes(pulses)
+    return packet + b"\x00" * (-len(packet) % 16)
+
+
+@pytest.fixture(scope="session")
+def packets() -> List[str]:
+    """Conjunto fixo de códigos Base64"""
+    rng = random.Random(1234)
+    return [
+        base64.b64encode(make_packet(rng)).decode("ascii")
+        for _ in range(PACKET_POOL_SIZE)
+    ]
+
+
+def write_library(path: str, size: int, packets: List[str]) -> None:
+    """Grava ir_codes.json sintético com size códigos em 50 dispositivos"""
+    converter = IRConverter()
+    prontos = {code: converter.broadlink_to_pronto(code) for code in packets}
+    created_at = datetime.datetime(2024, 1, 1).isoformat()
+    
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for number in range(size):
+            device = f"Device {number % 50}"
+            code_id = f"device_{number % 50}_command_{number}"
+            base64_code = packets[number % len(packets)]
+            record = {
+                "id": code_id,
+                "name": f"Command {number}",
+                "device": device,
+                "command": f"command_{number}",
+                "base64_code": base64_code,
+                "pronto_code": prontos[base64_code],
+                "frequency": 38000,
+                "created_at": created_at,
+                "notes": "",
+            }
+            f.write("," if number else "")
+            f.write(f"{json.dumps(code_id)}: {json.dumps(record)}")
+        f.write("}")
+
+
+@pytest.fixture(scope="session")
+def library_factory(tmp_path_factory, packets) -> Callable[[int], str]:
+    """Retorna função que cria (uma vez por sessão) a biblioteca de size códigos"""
+    cache = {}
+    
+    def factory(size: int) -> str:
+        if size not in cache:
+            path = str(tmp_path_factory.mktemp("library") / "ir_codes.json")
+            write_library(path, size, packets)
+            cache[size] = path
+        return cache[size]
+    
+    return factory
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de importação do Broadlink IR Manager
+Mede, via python -X importtime, quanto cada módulo da integração
+acrescenta ao boot do Home Assistant
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPONENT_DIR = os.path.join(ROOT, "custom_components", "broadlink_ir_manager")
+PACKAGE = "custom_components.broadlink_ir_manager"
+
+# Módulos puros importados diretamente do diretório do componente
+STANDALONE_MODULES = ["ir_converter", "ir_analysis", "ir_formats", "ir_binary", "ir_database", "ir_import", "ir_macros", "ir_climate", "ir_commands", "ir_watch", "ir_packets"]
+
+# Módulos da integração, que dependem do Home Assistant
+INTEGRATION_MODULES = [PACKAGE, f"{PACKAGE}.config_flow", f"{PACKAGE}.sensor", f"{PACKAGE}.button"]
+
+
+def measure(module: str, standalone: bool) -> Optional[Dict[str, float]]:
+    """
+    Importa o módulo em um processo novo e lê a saída de -X importtime
+    Retorna: tempos em ms (total do módulo e parcela dos módulos da integração)
+    ou None se a importação falhar
+    """
+    path = COMPONENT_DIR if standalone else ROOT
+    code = f"import sys; sys.path.insert(0, {path!r}); import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None
+    
+    own_names = set(STANDALONE_MODULES) if standalone else {PACKAGE}
+    total_us = 0
+    own_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == module:
+            total_us = int(cumulative_us)
+        if name in own_names or name.startswith(f"{PACKAGE}."):
+            own_us += int(self_us)
+    
+    return {"total_ms": total_us / 1000, "own_ms": own_us / 1000}
+
+
+def run(repeat: int, include_integration: bool) -> Dict[str, Dict[str, float]]:
+    """Mede cada módulo repeat vezes e mantém o menor tempo"""
+    targets = [(module, True) for module in STANDALONE_MODULES]
+    if include_integration:
+        targets += [(module, False) for module in INTEGRATION_MODULES]
+    
+    results: Dict[str, Dict[str, float]] = {}
+    for module, standalone in targets:
+        samples: List[Dict[str, float]] = []
+        for _ in range(repeat):
+            sample = measure(module, standalone)
+            if sample is None:
+                break
+            samples.append(sample)
+        
+        if not samples:
+            print(f"{module}: importação falhou (Home Assistant instalado?)", file=sys.stderr)
+            continue
+        
+        results[module] = {
+            "total_ms": min(s["total_ms"] for s in samples),
+            "own_ms": min(s["own_ms"] for s in samples),
+        }
+    
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por módulo (usa o menor tempo)")
+    parser.add_argument("--standalone-only", action="store_true",
+                        help="não mede os módulos que dependem do Home Assistant")
+    parser.add_argument("--output", help="acrescenta os resultados a este arquivo JSON")
+    parser.add_argument("--max-ms", type=float,
+                        help="falha se algum módulo ultrapassar este tempo total")
+    args = parser.parse_args()
+    
+    results = run(args.repeat, not args.standalone_only)
+    
+    print(f"{'módulo':<48} {'total (ms)':>12} {'integração (ms)':>16}")
+    for module, times in results.items():
+        print(f"{module:<48} {times['total_ms']:>12.2f} {times['own_ms']:>16.2f}")
+    
+    if args.output:
+        history = []
+        if os.path.exists(args.output):
+            with open(args.output, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        history.append({
+            "date": datetime.datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "results": results,
+        })
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2)
+    
+    if args.max_ms is not None:
+        slow = [m for m, t in results.items() if t["total_ms"] > args.max_ms]
+        if slow:
+            print(f"Acima de {args.max_ms} ms: {', '.join(slow)}", file=sys.stderr)
+            return 1
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
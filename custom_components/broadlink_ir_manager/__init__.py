@@ -6,14 +6,17 @@ Permite capturar e converter códigos IR do Broadlink RM Mini 3
 import logging
 import asyncio
 from datetime import timedelta
+from functools import partial
 
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.typing import ConfigType
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 
 from .const import (
     DOMAIN,
@@ -24,18 +27,78 @@ from .const import (
     SERVICE_CONVERT_CODE,
     SERVICE_SAVE_CODE,
     SERVICE_DELETE_CODE,
+    SERVICE_SAVE_CODES,
+    SERVICE_DELETE_CODES,
+    SERVICE_UPDATE_CODES,
+    SERVICE_SAVE_MACRO,
+    SERVICE_DELETE_MACRO,
+    SERVICE_SEND_MACRO,
+    SERVICE_BROADCAST_CODE,
     SERVICE_LIST_CODES,
+    SERVICE_IMPORT_CODES,
+    SERVICE_EXPORT_CODES,
+    SERVICE_GET_SENSOR_DETAILS,
+    SERVICE_GET_CAPTURE_HISTORY,
     CONF_HOST,
     CONF_MAC,
     CONF_TIMEOUT,
+    CONF_STORAGE_FORMAT,
+    CONF_METRICS_ENDPOINT,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_NORMALIZE_CODES,
+    CONF_CLIMATES,
+    CONF_HOT_CODES,
+    CONF_WATCH_DATABASE,
+    CONF_NAME,
+    CONF_DEVICE,
+    CONF_HVAC_MODES,
+    CONF_MIN_TEMP,
+    CONF_MAX_TEMP,
+    CONF_TEMP_STEP,
+    CONF_FAN_MODES,
+    CONF_SWING_MODES,
+    CONF_COMMAND_TEMPLATE,
+    CONF_OFF_COMMAND,
     DEFAULT_TIMEOUT,
+    DEFAULT_IMPORT_BATCH_SIZE,
+    DEFAULT_STORAGE_FORMAT,
+    DEFAULT_HISTORY_PAGE_SIZE,
+    DEFAULT_BROADCAST_TIMEOUT,
+    DEFAULT_CLIMATE_MODES,
+    DEFAULT_MIN_TEMP,
+    DEFAULT_MAX_TEMP,
+    DEFAULT_OFF_COMMAND,
+    DEFAULT_HOT_CODES,
+    MAX_LEARNING_SAMPLES,
+    FORMAT_NDJSON,
+    DEFAULT_CONVERT_FORMAT,
+    DATABASE_FILENAMES,
+    MACROS_FILENAME,
+    USAGE_SAVE_INTERVAL,
 )
-from .coordinator import BroadlinkIRCoordinator
-from .ir_converter import IRConverter
-from .ir_database import IRDatabase
+from .coordinator import BroadlinkIRCoordinator, async_broadcast_packet
+from .ir_climate import validate_command_template
 
 _LOGGER = logging.getLogger(__name__)
 
+# Ar-condicionado controlado pelos códigos de um dispositivo da base
+CLIMATE_SCHEMA = vol.Schema({
+    vol.Required(CONF_NAME): cv.string,
+    vol.Required(CONF_DEVICE): cv.string,
+    vol.Optional(CONF_HOST): cv.string,
+    vol.Optional(CONF_HVAC_MODES, default=DEFAULT_CLIMATE_MODES): vol.All(
+        cv.ensure_list, vol.Length(min=1),
+        [vol.In(["auto", "cool", "dry", "fan_only", "heat", "heat_cool"])],
+    ),
+    vol.Optional(CONF_MIN_TEMP, default=DEFAULT_MIN_TEMP): vol.Coerce(float),
+    vol.Optional(CONF_MAX_TEMP, default=DEFAULT_MAX_TEMP): vol.Coerce(float),
+    vol.Optional(CONF_TEMP_STEP, default=1): vol.In([0.5, 1]),
+    vol.Optional(CONF_FAN_MODES, default=[]): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(CONF_SWING_MODES, default=[]): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(CONF_COMMAND_TEMPLATE): vol.All(cv.string, validate_command_template),
+    vol.Optional(CONF_OFF_COMMAND, default=DEFAULT_OFF_COMMAND): cv.string,
+})
+
 # Schema de configuração via YAML (opcional)
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -44,6 +107,15 @@ CONFIG_SCHEMA = vol.Schema(
                 vol.Optional(CONF_HOST): cv.string,
                 vol.Optional(CONF_MAC): cv.string,
                 vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): cv.positive_int,
+                vol.Optional(
+                    CONF_STORAGE_FORMAT, default=DEFAULT_STORAGE_FORMAT
+                ): vol.In(list(DATABASE_FILENAMES)),
+                vol.Optional(CONF_METRICS_ENDPOINT, default=False): cv.boolean,
+                vol.Optional(CONF_COMPACT_ATTRIBUTES, default=False): cv.boolean,
+                vol.Optional(CONF_NORMALIZE_CODES, default=True): cv.boolean,
+                vol.Optional(CONF_CLIMATES, default=[]): [CLIMATE_SCHEMA],
+                vol.Optional(CONF_HOT_CODES, default=DEFAULT_HOT_CODES): cv.positive_int,
+                vol.Optional(CONF_WATCH_DATABASE, default=True): cv.boolean,
             }
         )
     },
@@ -54,10 +126,15 @@ CONFIG_SCHEMA = vol.Schema(
 SERVICE_START_LEARNING_SCHEMA = vol.Schema({
     vol.Required("entity_id"): cv.entity_id,
     vol.Optional("timeout", default=30): cv.positive_int,
+    vol.Optional("continuous", default=False): cv.boolean,
+    vol.Optional("samples", default=1): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_LEARNING_SAMPLES)
+    ),
 })
 
 SERVICE_CONVERT_CODE_SCHEMA = vol.Schema({
     vol.Required("base64_code"): cv.string,
+    vol.Optional("format", default=DEFAULT_CONVERT_FORMAT): cv.string,
 })
 
 SERVICE_SAVE_CODE_SCHEMA = vol.Schema({
@@ -72,20 +149,175 @@ SERVICE_DELETE_CODE_SCHEMA = vol.Schema({
     vol.Required("code_id"): cv.string,
 })
 
+SERVICE_SAVE_CODES_SCHEMA = vol.Schema({
+    vol.Required("codes"): vol.All(cv.ensure_list, [SERVICE_SAVE_CODE_SCHEMA]),
+    vol.Optional("workers"): cv.positive_int,
+})
+
+SERVICE_DELETE_CODES_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Optional("code_ids"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("device"): cv.string,
+        vol.Optional("query"): cv.string,
+    }),
+    cv.has_at_least_one_key("code_ids", "device", "query"),
+)
+
+SERVICE_UPDATE_CODES_SCHEMA = vol.Schema({
+    vol.Required("codes"): vol.All(cv.ensure_list, [vol.Schema({
+        vol.Required("code_id"): cv.string,
+        vol.Optional("name"): cv.string,
+        vol.Optional("device"): cv.string,
+        vol.Optional("command"): cv.string,
+        vol.Optional("base64_code"): cv.string,
+        vol.Optional("notes"): cv.string,
+    })]),
+})
+
+SERVICE_IMPORT_CODES_SCHEMA = vol.Schema({
+    vol.Required("file_path"): cv.string,
+    vol.Optional("batch_size", default=DEFAULT_IMPORT_BATCH_SIZE): cv.positive_int,
+    vol.Optional("workers"): cv.positive_int,
+    vol.Optional("format", default=FORMAT_NDJSON): cv.string,
+    vol.Optional("device"): cv.string,
+})
+
+SERVICE_EXPORT_CODES_SCHEMA = vol.Schema({
+    vol.Required("file_path"): cv.string,
+    vol.Optional("device"): cv.string,
+    vol.Optional("format", default=FORMAT_NDJSON): cv.string,
+})
+
+SERVICE_SAVE_MACRO_SCHEMA = vol.Schema({
+    vol.Required("name"): cv.string,
+    vol.Required("steps"): vol.All(cv.ensure_list, vol.Length(min=1), [vol.Schema({
+        vol.Required("code_id"): cv.string,
+        vol.Optional("delay", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    })]),
+})
+
+SERVICE_MACRO_SCHEMA = vol.Schema({
+    vol.Required("name"): cv.string,
+})
+
+SERVICE_BROADCAST_CODE_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Exclusive("code_id", "code"): cv.string,
+        vol.Exclusive("base64_code", "code"): cv.string,
+        vol.Optional("devices"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("timeout", default=DEFAULT_BROADCAST_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=60)
+        ),
+    }),
+    cv.has_at_least_one_key("code_id", "base64_code"),
+)
+
+SERVICE_GET_CAPTURE_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional("page", default=1): cv.positive_int,
+    vol.Optional("page_size", default=DEFAULT_HISTORY_PAGE_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=100)
+    ),
+})
+
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Configuração via YAML (opcional)"""
     hass.data.setdefault(DOMAIN, {})
+    conf = hass.data[DOMAIN]["config"] = config.get(DOMAIN, {})
+    storage_format = conf.get(CONF_STORAGE_FORMAT, DEFAULT_STORAGE_FORMAT)
     
-    # Inicializa conversor e base de dados
-    hass.data[DOMAIN]["converter"] = IRConverter()
-    hass.data[DOMAIN]["database"] = IRDatabase(
-        hass.config.path("custom_components", DOMAIN, "ir_codes.json")
+    # Inicializa conversor e base de dados (sem leitura de arquivo aqui)
+    ir_converter, ir_database, ir_macros, ir_commands, ir_watch = await hass.async_add_executor_job(
+        _import_library
+    )
+    hass.data[DOMAIN]["converter"] = ir_converter.IRConverter()
+    database = hass.data[DOMAIN]["database"] = ir_database.IRDatabase(
+        hass.config.path("custom_components", DOMAIN, DATABASE_FILENAMES[storage_format]),
+        storage_format,
+        lazy=True,
     )
+    hass.data[DOMAIN]["macros"] = ir_macros.MacroLibrary(
+        database, hass.config.path("custom_components", DOMAIN, MACROS_FILENAME)
+    )
+    commands = hass.data[DOMAIN]["commands"] = ir_commands.CommandMap(
+        database, conf.get(CONF_HOT_CODES, DEFAULT_HOT_CODES)
+    )
+    
+    async def load_library(hass: HomeAssistant) -> None:
+        """Carrega o índice da base e o mapa de comandos após o início do HA"""
+        await hass.async_add_executor_job(database.ensure_loaded)
+        await hass.async_add_executor_job(commands.build)
+        for coordinator in hass.data[DOMAIN].values():
+            if isinstance(coordinator, BroadlinkIRCoordinator):
+                coordinator.async_update_listeners()
+        
+        # Edições externas do ir_codes.json (git, sincronização) sem reiniciar o HA
+        if storage_format == ir_database.STORAGE_JSON and conf.get(CONF_WATCH_DATABASE, True):
+            watcher = ir_watch.FileWatcher(
+                database.db_path, lambda: hass.add_job(reload_codes)
+            )
+            await hass.async_add_executor_job(watcher.start)
+            
+            async def stop_watcher(event) -> None:
+                """Encerra o observador da base"""
+                await hass.async_add_executor_job(watcher.stop)
+            
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_watcher)
+        
+        # Códigos mais enviados já decodificados antes do primeiro envio
+        await hass.async_add_executor_job(database.load_usage)
+        hot = await hass.async_add_executor_job(commands.prewarm)
+        _LOGGER.debug(f"{hot} códigos pré-carregados em memória")
+    
+    async def reload_codes() -> None:
+        """Aplica as alterações externas do arquivo da base"""
+        async with database.async_lock:
+            code_ids = await hass.async_add_executor_job(database.reload_changes)
+        if not code_ids:
+            return
+        
+        _LOGGER.info(f"{len(code_ids)} códigos recarregados de {database.db_path}")
+        hass.bus.async_fire(f"{DOMAIN}_codes_reloaded", {
+            "code_ids": sorted(code_ids),
+            "count": len(code_ids)
+        })
+        for coordinator in hass.data[DOMAIN].values():
+            if isinstance(coordinator, BroadlinkIRCoordinator):
+                coordinator.async_update_listeners()
+    
+    async_at_started(hass, load_library)
+    
+    async def save_usage(*_) -> None:
+        """Grava o uso dos códigos (envios e último envio)"""
+        await hass.async_add_executor_job(database.save_usage)
+    
+    remove_usage_timer = async_track_time_interval(
+        hass, save_usage, timedelta(seconds=USAGE_SAVE_INTERVAL)
+    )
+    
+    async def save_usage_on_stop(event) -> None:
+        """Grava o uso dos códigos ao encerrar o HA"""
+        remove_usage_timer()
+        await save_usage()
+    
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, save_usage_on_stop)
+    
+    from .api import BroadlinkIRMetricsView, async_register_websocket_commands
+    async_register_websocket_commands(hass)
+    
+    # Endpoint opcional de métricas no formato Prometheus
+    if conf.get(CONF_METRICS_ENDPOINT, False):
+        hass.http.register_view(BroadlinkIRMetricsView())
     
     return True
 
 
+def _import_library():
+    """Importa os módulos da biblioteca (conversão, base, macros, comandos, observador) fora do event loop"""
+    from . import ir_commands, ir_converter, ir_database, ir_macros, ir_watch
+    return ir_converter, ir_database, ir_macros, ir_commands, ir_watch
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Configuração via config flow"""
     hass.data.setdefault(DOMAIN, {})
@@ -98,6 +330,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except ConfigEntryNotReady:
         raise
     
+    await coordinator.async_load_captures()
     hass.data[DOMAIN][entry.entry_id] = coordinator
     
     # Configura plataformas
@@ -122,10 +355,18 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Registra serviços do componente"""
     
+    async def _database_job(func, *args, **kwargs):
+        """Executa operação de escrita da base no executor, uma por vez"""
+        database = hass.data[DOMAIN]["database"]
+        async with database.async_lock:
+            return await hass.async_add_executor_job(partial(func, *args, **kwargs))
+    
     async def start_learning(call: ServiceCall) -> None:
         """Inicia modo learning"""
         entity_id = call.data["entity_id"]
         timeout = call.data.get("timeout", 30)
+        continuous = call.data.get("continuous", False)
+        samples = call.data.get("samples", 1)
         
         # Encontra o coordinator
         coordinator = None
@@ -135,10 +376,12 @@ async def async_setup_services(hass: HomeAssistant) -> None:
                 break
         
         if coordinator:
-            await coordinator.start_learning(timeout)
+            await coordinator.start_learning(timeout, continuous, samples)
             hass.bus.async_fire(f"{DOMAIN}_learning_started", {
                 "entity_id": entity_id,
-                "timeout": timeout
+                "timeout": timeout,
+                "continuous": continuous,
+                "samples": samples
             })
     
     async def stop_learning(call: ServiceCall) -> None:
@@ -169,25 +412,36 @@ async def async_setup_services(hass: HomeAssistant) -> None:
                 converter = hass.data[DOMAIN]["converter"]
                 pronto_code = converter.broadlink_to_pronto(code)
                 
+                capture = coordinator.last_capture or {}
+                
                 hass.bus.async_fire(f"{DOMAIN}_code_learned", {
                     "base64_code": code,
-                    "pronto_code": pronto_code
+                    "pronto_code": pronto_code,
+                    "quality": capture.get("quality")
                 })
     
     async def convert_code(call: ServiceCall) -> None:
-        """Converte código Base64 para Pronto"""
+        """Converte código Base64 para Pronto (ou outro formato do registro)"""
         base64_code = call.data["base64_code"]
+        code_format = call.data.get("format", DEFAULT_CONVERT_FORMAT)
         converter = hass.data[DOMAIN]["converter"]
         
         try:
             pronto_code = converter.broadlink_to_pronto(base64_code)
             frequency = converter.get_frequency_from_pronto(pronto_code)
             
-            hass.bus.async_fire(f"{DOMAIN}_code_converted", {
+            event_data = {
                 "base64_code": base64_code,
                 "pronto_code": pronto_code,
                 "frequency": frequency
-            })
+            }
+            if code_format != DEFAULT_CONVERT_FORMAT:
+                event_data["format"] = code_format
+                event_data["code"] = await hass.async_add_executor_job(
+                    converter.broadlink_to_format, base64_code, code_format
+                )
+            
+            hass.bus.async_fire(f"{DOMAIN}_code_converted", event_data)
         except Exception as e:
             _LOGGER.error(f"Erro na conversão: {e}")
     
@@ -196,7 +450,8 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         database = hass.data[DOMAIN]["database"]
         
         try:
-            code_id = database.add_code(
+            code_id = await _database_job(
+                database.add_code,
                 name=call.data["name"],
                 device=call.data["device"],
                 command=call.data["command"],
@@ -216,23 +471,270 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         database = hass.data[DOMAIN]["database"]
         code_id = call.data["code_id"]
         
-        if database.delete_code(code_id):
+        if await _database_job(database.delete_code, code_id):
             hass.bus.async_fire(f"{DOMAIN}_code_deleted", {
                 "code_id": code_id
             })
     
+    async def save_codes(call: ServiceCall) -> ServiceResponse:
+        """Salva um lote de códigos em uma única gravação (tudo ou nada)"""
+        database = hass.data[DOMAIN]["database"]
+        codes = call.data["codes"]
+        
+        result = await _database_job(
+            database.add_codes, [dict(code) for code in codes], call.data.get("workers", 1)
+        )
+        if result["error_count"]:
+            _LOGGER.error(
+                f"Lote não salvo: {result['error_count']} de {len(codes)} códigos inválidos"
+            )
+        
+        hass.bus.async_fire(f"{DOMAIN}_codes_saved", {"total": len(result["code_ids"]), **result})
+        return result
+    
+    async def delete_codes(call: ServiceCall) -> ServiceResponse:
+        """Remove códigos por lista de IDs, dispositivo e/ou busca em uma única gravação"""
+        database = hass.data[DOMAIN]["database"]
+        
+        code_ids = await _database_job(
+            database.delete_codes,
+            call.data.get("code_ids"),
+            call.data.get("device"),
+            call.data.get("query"),
+        )
+        
+        result = {"total": len(code_ids), "code_ids": code_ids}
+        hass.bus.async_fire(f"{DOMAIN}_codes_deleted", result)
+        return result
+    
+    async def update_codes(call: ServiceCall) -> ServiceResponse:
+        """Atualiza um lote de códigos em uma única gravação (tudo ou nada)"""
+        database = hass.data[DOMAIN]["database"]
+        updates = [
+            {"id" if field == "code_id" else field: value for field, value in code.items()}
+            for code in call.data["codes"]
+        ]
+        
+        result = await _database_job(database.update_codes, updates)
+        if result["error_count"]:
+            _LOGGER.error(
+                f"Lote não atualizado: {result['error_count']} de {len(updates)} itens inválidos"
+            )
+        
+        hass.bus.async_fire(f"{DOMAIN}_codes_updated", {"total": len(result["code_ids"]), **result})
+        return result
+    
     async def list_codes(call: ServiceCall) -> None:
         """Lista códigos da base de dados"""
         database = hass.data[DOMAIN]["database"]
-        codes = database.get_all_codes()
-        
-        codes_data = [code.to_dict() for code in codes]
+        codes_data = await hass.async_add_executor_job(
+            lambda: [code.to_dict() for code in database.snapshot().get_all_codes()]
+        )
         
         hass.bus.async_fire(f"{DOMAIN}_codes_listed", {
             "codes": codes_data,
             "total": len(codes_data)
         })
     
+    async def save_macro(call: ServiceCall) -> None:
+        """Cria ou substitui macro, já compilada em um único pacote"""
+        macros = hass.data[DOMAIN]["macros"]
+        name = call.data["name"]
+        
+        try:
+            packet = await hass.async_add_executor_job(
+                macros.set_macro, name, call.data["steps"]
+            )
+            hass.bus.async_fire(f"{DOMAIN}_macro_saved", {
+                "name": name,
+                "steps": len(call.data["steps"]),
+                "packet_size": len(packet)
+            })
+        except Exception as e:
+            _LOGGER.error(f"Erro ao salvar macro {name}: {e}")
+    
+    async def delete_macro(call: ServiceCall) -> None:
+        """Remove macro"""
+        macros = hass.data[DOMAIN]["macros"]
+        name = call.data["name"]
+        
+        if await hass.async_add_executor_job(macros.delete_macro, name):
+            hass.bus.async_fire(f"{DOMAIN}_macro_deleted", {"name": name})
+    
+    async def send_macro(call: ServiceCall) -> None:
+        """Envia macro ao dispositivo como um único pacote"""
+        macros = hass.data[DOMAIN]["macros"]
+        name = call.data["name"]
+        
+        # Encontra o coordinator
+        coordinator = None
+        for coord in hass.data[DOMAIN].values():
+            if isinstance(coord, BroadlinkIRCoordinator):
+                coordinator = coord
+                break
+        
+        if coordinator:
+            try:
+                packet = await hass.async_add_executor_job(macros.compile, name)
+                await coordinator.async_send_packet(packet)
+                hass.bus.async_fire(f"{DOMAIN}_macro_sent", {
+                    "name": name,
+                    "packet_size": len(packet)
+                })
+            except Exception as e:
+                _LOGGER.error(f"Erro ao enviar macro {name}: {e}")
+    
+    async def broadcast_code(call: ServiceCall) -> ServiceResponse:
+        """Envia um código a vários Broadlink simultaneamente"""
+        converter = hass.data[DOMAIN]["converter"]
+        commands = hass.data[DOMAIN]["commands"]
+        devices = call.data.get("devices")
+        
+        # Dispositivos por ID da config entry ou host (todos, se omitido)
+        coordinators = [
+            coord for coord in hass.data[DOMAIN].values()
+            if isinstance(coord, BroadlinkIRCoordinator)
+            and (devices is None or coord.entry.entry_id in devices or coord.host in devices)
+        ]
+        
+        if "code_id" in call.data:
+            # Códigos mais enviados já estão decodificados em memória
+            packet = commands.cached_code(call.data["code_id"])
+            if packet is None:
+                try:
+                    packet = await hass.async_add_executor_job(
+                        commands.code_packet, call.data["code_id"]
+                    )
+                except ValueError as e:
+                    # Código inexistente ou Base64 armazenado que não decodifica
+                    raise HomeAssistantError(f"code_id inválido: {e}") from e
+        else:
+            # ValueError também cobre o binascii.Error do Base64 malformado
+            try:
+                packet = converter.base64_to_bytes(call.data["base64_code"])
+            except ValueError as e:
+                raise HomeAssistantError(f"base64_code inválido: {e}") from e
+        
+        result = await async_broadcast_packet(coordinators, packet, call.data["timeout"])
+        if result["failed"]:
+            _LOGGER.warning(
+                f"Envio falhou em {result['failed']} de {len(coordinators)} dispositivos"
+            )
+        
+        hass.bus.async_fire(f"{DOMAIN}_code_broadcast", {
+            "code_id": call.data.get("code_id"),
+            **result
+        })
+        return result
+    
+    async def get_sensor_details(call: ServiceCall) -> ServiceResponse:
+        """Retorna os atributos completos dos sensores (inclusive os compactados)"""
+        from .api import async_get_sensor_details
+        return await async_get_sensor_details(hass)
+    
+    async def get_capture_history(call: ServiceCall) -> ServiceResponse:
+        """Retorna uma página do histórico de capturas"""
+        for coordinator in hass.data[DOMAIN].values():
+            if isinstance(coordinator, BroadlinkIRCoordinator):
+                return coordinator.get_captures(call.data["page"], call.data["page_size"])
+        return {"page": call.data["page"], "page_size": call.data["page_size"],
+                "pages": 0, "total": 0, "captures": []}
+    
+    def _report_progress(event: str, file_path: str):
+        """Cria callback de progresso que dispara eventos a partir do executor"""
+        def progress(processed: int, bytes_done: int, bytes_total: int) -> None:
+            hass.loop.call_soon_threadsafe(
+                hass.bus.async_fire,
+                f"{DOMAIN}_{event}",
+                {
+                    "file_path": file_path,
+                    "processed": processed,
+                    "bytes_done": bytes_done,
+                    "bytes_total": bytes_total,
+                },
+            )
+        return progress
+    
+    async def import_codes(call: ServiceCall) -> None:
+        """Importa e valida códigos de arquivo NDJSON (opcionalmente .gz) ou outro formato"""
+        database = hass.data[DOMAIN]["database"]
+        file_path = call.data["file_path"]
+        file_format = call.data.get("format", FORMAT_NDJSON)
+        
+        if not hass.config.is_allowed_path(file_path):
+            _LOGGER.error(f"Caminho não permitido para importação: {file_path}")
+            return
+        
+        try:
+            if file_format == FORMAT_NDJSON:
+                report = await _database_job(
+                    database.import_from_ndjson,
+                    file_path,
+                    call.data.get("batch_size", DEFAULT_IMPORT_BATCH_SIZE),
+                    _report_progress("import_progress", file_path),
+                    call.data.get("workers"),
+                )
+            else:
+                report = await _database_job(
+                    database.import_from_format,
+                    file_path,
+                    file_format,
+                    call.data.get("device"),
+                    call.data.get("workers"),
+                )
+            
+            if report.get("aborted"):
+                _LOGGER.error(
+                    f"Importação de {file_path} interrompida após {report['imported']} "
+                    f"códigos gravados: {report['aborted']}"
+                )
+            if report["error_count"]:
+                _LOGGER.warning(
+                    f"{report['error_count']} registros rejeitados na importação de {file_path}"
+                )
+            
+            hass.bus.async_fire(f"{DOMAIN}_codes_imported", {
+                "file_path": file_path,
+                **report
+            })
+        except Exception as e:
+            _LOGGER.error(f"Erro na importação: {e}")
+    
+    async def export_codes(call: ServiceCall) -> None:
+        """Exporta códigos para arquivo NDJSON (opcionalmente .gz) ou outro formato"""
+        database = hass.data[DOMAIN]["database"]
+        file_path = call.data["file_path"]
+        file_format = call.data.get("format", FORMAT_NDJSON)
+        
+        if not hass.config.is_allowed_path(file_path):
+            _LOGGER.error(f"Caminho não permitido para exportação: {file_path}")
+            return
+        
+        try:
+            if file_format == FORMAT_NDJSON:
+                total = await hass.async_add_executor_job(
+                    database.export_to_ndjson,
+                    file_path,
+                    call.data.get("device"),
+                    _report_progress("export_progress", file_path),
+                )
+            else:
+                total = await hass.async_add_executor_job(
+                    database.export_to_format,
+                    file_path,
+                    file_format,
+                    call.data.get("device"),
+                    _report_progress("export_progress", file_path),
+                )
+            
+            hass.bus.async_fire(f"{DOMAIN}_codes_exported", {
+                "file_path": file_path,
+                "format": file_format,
+                "total": total
+            })
+        except Exception as e:
+            _LOGGER.error(f"Erro na exportação: {e}")
+    
     # Registra os serviços
     hass.services.async_register(
         DOMAIN, SERVICE_START_LEARNING, start_learning, SERVICE_START_LEARNING_SCHEMA
@@ -252,7 +754,46 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     hass.services.async_register(
         DOMAIN, SERVICE_DELETE_CODE, delete_code, SERVICE_DELETE_CODE_SCHEMA
     )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SAVE_CODES, save_codes, SERVICE_SAVE_CODES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DELETE_CODES, delete_codes, SERVICE_DELETE_CODES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_UPDATE_CODES, update_codes, SERVICE_UPDATE_CODES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
     hass.services.async_register(
         DOMAIN, SERVICE_LIST_CODES, list_codes
     )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SAVE_MACRO, save_macro, SERVICE_SAVE_MACRO_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DELETE_MACRO, delete_macro, SERVICE_MACRO_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SEND_MACRO, send_macro, SERVICE_MACRO_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BROADCAST_CODE, broadcast_code, SERVICE_BROADCAST_CODE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_IMPORT_CODES, import_codes, SERVICE_IMPORT_CODES_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_EXPORT_CODES, export_codes, SERVICE_EXPORT_CODES_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_SENSOR_DETAILS, get_sensor_details,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_CAPTURE_HISTORY, get_capture_history,
+        SERVICE_GET_CAPTURE_HISTORY_SCHEMA, supports_response=SupportsResponse.ONLY,
+    )
 
@@ -0,0 +1,187 @@
+"""Endpoints HTTP e websocket do Broadlink IR Manager"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import voluptuous as vol
+from aiohttp import web
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .coordinator import BroadlinkIRCoordinator
+from .metrics import REGISTRY
+from .sensor import build_code_attributes, build_database_attributes
+
+# Códigos por página do navegador da biblioteca
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+
+# Chave em hass.data[DOMAIN] do snapshot usado pelas páginas da versão atual
+PAGE_SOURCE = "library_pages"
+
+
+async def async_get_sensor_details(hass: HomeAssistant) -> Dict[str, Any]:
+    """
+    Atributos completos dos sensores, incluindo os mantidos fora do estado
+    (Base64/Pronto do último código, códigos por dispositivo e recentes)
+    """
+    last_code: Optional[str] = None
+    quality: Optional[int] = None
+    for coordinator in hass.data[DOMAIN].values():
+        if isinstance(coordinator, BroadlinkIRCoordinator):
+            last_code = coordinator.last_learned_code
+            capture = coordinator.last_capture
+            if capture and capture["base64_code"] == last_code:
+                quality = capture.get("quality")
+            break
+    
+    converter = hass.data[DOMAIN]["converter"]
+    database = hass.data[DOMAIN]["database"]
+    
+    def build() -> Dict[str, Any]:
+        snapshot = database.snapshot()
+        total, attrs = build_database_attributes(snapshot)
+        return {
+            "last_code": build_code_attributes(converter, last_code, quality),
+            "database": {"total_codes": total, "version": snapshot.version, **attrs},
+        }
+    
+    return await hass.async_add_executor_job(build)
+
+
+def page_source(hass: HomeAssistant) -> Tuple[Any, List[str]]:
+    """
+    Snapshot e IDs (em ordem de inserção) da versão atual da base
+    Montados uma vez por versão e reaproveitados por todas as páginas,
+    que assim custam O(limit) em vez de copiar e percorrer o índice.
+    """
+    database = hass.data[DOMAIN]["database"]
+    source = hass.data[DOMAIN].get(PAGE_SOURCE)
+    if source is None or source[0].version != database.version:
+        snapshot = database.snapshot()
+        source = hass.data[DOMAIN][PAGE_SOURCE] = (snapshot, list(snapshot.codes))
+    return source
+
+
+def build_code_page(snapshot, ids: List[str], offset: int, limit: int) -> Dict[str, Any]:
+    """
+    Página da biblioteca na ordem de inserção, sem os pacotes
+    (o navegador busca Base64/Pronto só do código selecionado)
+    """
+    codes: List[Dict[str, Any]] = []
+    for code_id in ids[offset:offset + limit]:
+        code = snapshot.codes[code_id]
+        codes.append({
+            "id": code.id,
+            "name": code.name,
+            "device": code.device,
+            "command": code.command,
+            "notes": code.notes,
+            "created_at": code.created_at,
+        })
+    return {
+        "version": snapshot.version,
+        "total": len(ids),
+        "offset": offset,
+        "codes": codes,
+    }
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Registra os comandos websocket da integração"""
+    websocket_api.async_register_command(hass, websocket_sensor_details)
+    websocket_api.async_register_command(hass, websocket_list_codes)
+    websocket_api.async_register_command(hass, websocket_get_code)
+    websocket_api.async_register_command(hass, websocket_subscribe_library)
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/sensor_details"})
+@websocket_api.async_response
+async def websocket_sensor_details(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """Retorna os atributos completos dos sensores"""
+    connection.send_result(msg["id"], await async_get_sensor_details(hass))
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): f"{DOMAIN}/list_codes",
+    vol.Optional("offset", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+    vol.Optional("limit", default=PAGE_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=MAX_PAGE_SIZE)
+    ),
+})
+@websocket_api.async_response
+async def websocket_list_codes(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """
+    Retorna uma página da biblioteca com a versão da base
+    Páginas de versões diferentes não devem ser combinadas: o cliente
+    descarta o que tem em cache quando a versão muda.
+    """
+    def build() -> Dict[str, Any]:
+        snapshot, ids = page_source(hass)
+        return build_code_page(snapshot, ids, msg["offset"], msg["limit"])
+    
+    page = await hass.async_add_executor_job(build)
+    connection.send_result(msg["id"], page)
+
+
+@websocket_api.websocket_command({
+    vol.Required("type"): f"{DOMAIN}/get_code",
+    vol.Required("code_id"): str,
+})
+@websocket_api.async_response
+async def websocket_get_code(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """Retorna um código completo (com Base64 e Pronto)"""
+    database = hass.data[DOMAIN]["database"]
+    code = await hass.async_add_executor_job(database.get_code, msg["code_id"])
+    if code is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, f"Código não encontrado: {msg['code_id']}"
+        )
+        return
+    connection.send_result(msg["id"], code.to_dict())
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/subscribe_library"})
+@callback
+def websocket_subscribe_library(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """Envia a nova versão da base a cada alteração (substitui o polling do dashboard)"""
+    database = hass.data[DOMAIN]["database"]
+    
+    def changed(code_ids) -> None:
+        # Chamado na thread que gravou a base
+        hass.loop.call_soon_threadsafe(
+            connection.send_message,
+            websocket_api.event_message(msg["id"], {
+                "version": database.version,
+                "changed": len(code_ids),
+            }),
+        )
+    
+    connection.subscriptions[msg["id"]] = database.add_listener(changed)
+    connection.send_result(msg["id"], {"version": database.version})
+
+
+class BroadlinkIRMetricsView(HomeAssistantView):
+    """Exposição das métricas no formato de texto do Prometheus"""
+    
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+    
+    async def get(self, request: web.Request) -> web.Response:
+        """Retorna as métricas atuais"""
+        return web.Response(
+            text=REGISTRY.render(),
+            content_type="text/plain",
+            charset="utf-8",
+        )
@@ -0,0 +1,255 @@
+"""Ar-condicionados controlados por códigos IR da base"""
+
+import asyncio
+import logging
+from typing import Any, Optional, Set
+
+from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_CLIMATES,
+    CONF_NAME,
+    CONF_DEVICE,
+    CONF_HVAC_MODES,
+    CONF_MIN_TEMP,
+    CONF_MAX_TEMP,
+    CONF_TEMP_STEP,
+    CONF_FAN_MODES,
+    CONF_SWING_MODES,
+    CONF_COMMAND_TEMPLATE,
+    CONF_OFF_COMMAND,
+)
+from .coordinator import BroadlinkIRCoordinator
+from .ir_climate import ClimateCodeTable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Configura os ar-condicionados definidos em climates (YAML)"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    climates = hass.data[DOMAIN].get("config", {}).get(CONF_CLIMATES, [])
+    
+    # Sem host, o ar-condicionado usa cada Broadlink configurado
+    async_add_entities(
+        BroadlinkIRClimate(coordinator, hass.data[DOMAIN]["database"], config)
+        for config in climates
+        if config.get(CONF_HOST) in (None, coordinator.host)
+    )
+
+
+class BroadlinkIRClimate(CoordinatorEntity, ClimateEntity, RestoreEntity):
+    """
+    Ar-condicionado IR (estado presumido, sem retorno do aparelho)
+    Cada mudança de estado é resolvida para o pacote por índice na tabela,
+    montada uma vez a partir da base e refeita só quando os códigos do
+    dispositivo mudam.
+    """
+    
+    _attr_assumed_state = True
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _enable_turn_on_off_backwards_compatibility = False
+    
+    def __init__(self, coordinator: BroadlinkIRCoordinator, database, config: dict) -> None:
+        """Inicializa o ar-condicionado"""
+        super().__init__(coordinator)
+        self.database = database
+        self._table = ClimateCodeTable(
+            config[CONF_DEVICE],
+            config[CONF_HVAC_MODES],
+            config[CONF_MIN_TEMP],
+            config[CONF_MAX_TEMP],
+            config[CONF_TEMP_STEP],
+            config[CONF_FAN_MODES],
+            config[CONF_SWING_MODES],
+            config.get(CONF_COMMAND_TEMPLATE),
+            config[CONF_OFF_COMMAND],
+        )
+        self._table_ready = False
+        self._table_lock = asyncio.Lock()
+        
+        self._attr_name = config[CONF_NAME]
+        self._attr_unique_id = (
+            f"{DOMAIN}_{coordinator.entry.entry_id}_climate_{config[CONF_DEVICE]}"
+        )
+        self._attr_icon = "mdi:air-conditioner"
+        self._attr_hvac_modes = [HVACMode.OFF] + [HVACMode(mode) for mode in config[CONF_HVAC_MODES]]
+        self._attr_min_temp = config[CONF_MIN_TEMP]
+        self._attr_max_temp = config[CONF_MAX_TEMP]
+        self._attr_target_temperature_step = config[CONF_TEMP_STEP]
+        self._attr_fan_modes = config[CONF_FAN_MODES] or None
+        self._attr_swing_modes = config[CONF_SWING_MODES] or None
+        
+        features = (
+            ClimateEntityFeature.TARGET_TEMPERATURE
+            | ClimateEntityFeature.TURN_ON
+            | ClimateEntityFeature.TURN_OFF
+        )
+        if self._attr_fan_modes:
+            features |= ClimateEntityFeature.FAN_MODE
+        if self._attr_swing_modes:
+            features |= ClimateEntityFeature.SWING_MODE
+        self._attr_supported_features = features
+        
+        # Estado inicial (substituído pelo último estado salvo, se houver)
+        self._attr_hvac_mode = HVACMode.OFF
+        self._attr_target_temperature = min(max(24, self._attr_min_temp), self._attr_max_temp)
+        self._attr_fan_mode = self._attr_fan_modes[0] if self._attr_fan_modes else None
+        self._attr_swing_mode = self._attr_swing_modes[0] if self._attr_swing_modes else None
+        self._last_on_mode = self._attr_hvac_modes[1]
+    
+    async def async_added_to_hass(self) -> None:
+        """Restaura o último estado e acompanha alterações da base"""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.database.add_listener(self._database_changed))
+        # Tabela pronta antes do primeiro comando (após o início, com a base já carregando)
+        self.async_on_remove(async_at_started(self.hass, self._async_prebuild_table))
+        
+        last_state = await self.async_get_last_state()
+        if last_state is None:
+            return
+        
+        if last_state.state in self._attr_hvac_modes:
+            self._attr_hvac_mode = HVACMode(last_state.state)
+            if self._attr_hvac_mode != HVACMode.OFF:
+                self._last_on_mode = self._attr_hvac_mode
+        temperature = last_state.attributes.get(ATTR_TEMPERATURE)
+        if temperature is not None and self.min_temp <= temperature <= self.max_temp:
+            self._attr_target_temperature = temperature
+        if last_state.attributes.get("fan_mode") in (self._attr_fan_modes or []):
+            self._attr_fan_mode = last_state.attributes["fan_mode"]
+        if last_state.attributes.get("swing_mode") in (self._attr_swing_modes or []):
+            self._attr_swing_mode = last_state.attributes["swing_mode"]
+    
+    def _database_changed(self, code_ids: Set[str]) -> None:
+        """Marca a tabela para reconstrução (chamado na thread que gravou a base)"""
+        if self._table_ready and self._table.affected_by(code_ids, self.database):
+            self._table_ready = False
+            self.hass.add_job(self._async_prebuild_table, self.hass)
+    
+    async def _async_prebuild_table(self, hass: HomeAssistant) -> None:
+        """Monta a tabela em segundo plano (erros ficam para o próximo comando)"""
+        try:
+            await self._async_build_table()
+        except Exception as e:
+            _LOGGER.error(f"{self.name}: erro ao montar a tabela de códigos: {e}")
+    
+    async def _async_build_table(self) -> None:
+        """Monta a tabela no executor, se ainda não estiver pronta"""
+        async with self._table_lock:
+            if self._table_ready:
+                return
+            # Marcada antes: uma alteração durante a montagem invalida de novo
+            self._table_ready = True
+            try:
+                await self.hass.async_add_executor_job(self._table.build, self.database)
+            except Exception:
+                self._table_ready = False
+                raise
+            if self._table.missing:
+                _LOGGER.debug(
+                    f"{self.name}: {len(self._table.missing)} estados sem código aprendido"
+                )
+    
+    async def _async_send_state(self, hvac_mode: HVACMode, temperature: float,
+                                fan_mode: Optional[str], swing_mode: Optional[str]) -> None:
+        """Envia o código do novo estado e, se enviado, passa a exibi-lo"""
+        if not self._table_ready:
+            await self._async_build_table()
+        
+        if hvac_mode == HVACMode.OFF:
+            packet = self._table.off_packet
+            command = self._table.off_command
+        else:
+            packet = self._table.packet(hvac_mode, temperature, fan_mode, swing_mode)
+            command = self._table.command(hvac_mode, temperature, fan_mode, swing_mode)
+        
+        if packet is None:
+            _LOGGER.error(
+                f"{self.name}: código '{command}' não encontrado no dispositivo {self._table.device}"
+            )
+            return
+        
+        await self.coordinator.async_send_packet(packet)
+        
+        self._attr_hvac_mode = hvac_mode
+        self._attr_target_temperature = temperature
+        self._attr_fan_mode = fan_mode
+        self._attr_swing_mode = swing_mode
+        if hvac_mode != HVACMode.OFF:
+            self._last_on_mode = hvac_mode
+        self.async_write_ha_state()
+    
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        """Altera o modo"""
+        await self._async_send_state(
+            hvac_mode, self.target_temperature, self.fan_mode, self.swing_mode
+        )
+    
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        """Altera a temperatura (e o modo, se informado)"""
+        temperature = kwargs.get(ATTR_TEMPERATURE, self.target_temperature)
+        hvac_mode = kwargs.get(ATTR_HVAC_MODE, self.hvac_mode)
+        if hvac_mode == HVACMode.OFF:
+            # Só guarda a temperatura para quando ligar
+            self._attr_target_temperature = temperature
+            self.async_write_ha_state()
+            return
+        
+        await self._async_send_state(hvac_mode, temperature, self.fan_mode, self.swing_mode)
+    
+    async def async_set_fan_mode(self, fan_mode: str) -> None:
+        """Altera a ventilação"""
+        await self._async_send_mode(fan_mode=fan_mode)
+    
+    async def async_set_swing_mode(self, swing_mode: str) -> None:
+        """Altera o swing"""
+        await self._async_send_mode(swing_mode=swing_mode)
+    
+    async def _async_send_mode(self, **changes: str) -> None:
+        """Ventilação/swing: envia se ligado, senão só guarda para quando ligar"""
+        fan_mode = changes.get("fan_mode", self.fan_mode)
+        swing_mode = changes.get("swing_mode", self.swing_mode)
+        if self.hvac_mode == HVACMode.OFF:
+            self._attr_fan_mode = fan_mode
+            self._attr_swing_mode = swing_mode
+            self.async_write_ha_state()
+            return
+        
+        await self._async_send_state(self.hvac_mode, self.target_temperature, fan_mode, swing_mode)
+    
+    async def async_turn_on(self) -> None:
+        """Liga no último modo usado"""
+        await self.async_set_hvac_mode(self._last_on_mode)
+    
+    async def async_turn_off(self) -> None:
+        """Desliga"""
+        await self.async_set_hvac_mode(HVACMode.OFF)
+    
+    @property
+    def available(self) -> bool:
+        """Disponibilidade do ar-condicionado"""
+        return self.coordinator.last_update_success
+    
+    @property
+    def device_info(self):
+        """Informações do dispositivo"""
+        return self.coordinator.device_info
@@ -10,13 +10,15 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN, CONF_TIMEOUT, DEFAULT_TIMEOUT
+from .const import DOMAIN, CONF_PORT, CONF_TIMEOUT, DEFAULT_PORT, DEFAULT_TIMEOUT
+from .coordinator import import_broadlink
 
 _LOGGER = logging.getLogger(__name__)
 
 STEP_USER_DATA_SCHEMA = vol.Schema({
     vol.Optional(CONF_HOST): cv.string,
     vol.Optional(CONF_MAC): cv.string,
+    vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
     vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): cv.positive_int,
 })
 
@@ -24,47 +26,7 @@ STEP_USER_DATA_SCHEMA = vol.Schema({
 async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str, Any]:
     """Valida entrada do usuário"""
     try:
-        import broadlink
-        
-        if data.get(CONF_HOST) and data.get(CONF_MAC):
-            # Testa conexão com host e MAC específicos
-            mac_bytes = bytes.fromhex(data[CONF_MAC].replace(":", ""))
-            device = broadlink.rm(
-                host=(data[CONF_HOST], 80),
-                mac=mac_bytes,
-                devtype=0x2737  # RM Mini 3
-            )
-            
-            if not device.auth():
-                raise ValueError("Falha na autenticação")
-            
-            return {
-                "title": f"Broadlink RM ({data[CONF_HOST]})",
-                "host": data[CONF_HOST],
-                "mac": data[CONF_MAC],
-            }
-        else:
-            # Descobre dispositivos automaticamente
-            devices = await hass.async_add_executor_job(
-                broadlink.discover, 5
-            )
-            
-            if not devices:
-                raise ValueError("Nenhum dispositivo encontrado")
-            
-            device = devices[0]
-            if not device.auth():
-                raise ValueError("Falha na autenticação")
-            
-            # Obtém informações do dispositivo
-            host = device.host[0]
-            mac = ":".join(f"{b:02x}" for b in device.mac)
-            
-            return {
-                "title": f"Broadlink RM ({host})",
-                "host": host,
-                "mac": mac,
-            }
+        return await hass.async_add_executor_job(_connect, data)
     
     except ImportError:
         raise ValueError("Biblioteca broadlink não encontrada")
@@ -72,6 +34,51 @@ async def validate_input(hass: HomeAssistant, data: Dict[str, Any]) -> Dict[str,
         raise ValueError(f"Erro na conexão: {e}")
 
 
+def _connect(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Conecta ao dispositivo e obtém suas informações (executado no executor)"""
+    broadlink = import_broadlink()
+    
+    if data.get(CONF_HOST) and data.get(CONF_MAC):
+        # Testa conexão com host e MAC específicos
+        mac_bytes = bytes.fromhex(data[CONF_MAC].replace(":", ""))
+        device = broadlink.rm(
+            host=(data[CONF_HOST], data.get(CONF_PORT, DEFAULT_PORT)),
+            mac=mac_bytes,
+            devtype=0x2737  # RM Mini 3
+        )
+        
+        if not device.auth():
+            raise ValueError("Falha na autenticação")
+        
+        return {
+            "title": f"Broadlink RM ({data[CONF_HOST]})",
+            "host": data[CONF_HOST],
+            "port": data.get(CONF_PORT, DEFAULT_PORT),
+            "mac": data[CONF_MAC],
+        }
+    
+    # Descobre dispositivos automaticamente
+    devices = broadlink.discover(5)
+    
+    if not devices:
+        raise ValueError("Nenhum dispositivo encontrado")
+    
+    device = devices[0]
+    if not device.auth():
+        raise ValueError("Falha na autenticação")
+    
+    # Obtém informações do dispositivo
+    host, port = device.host
+    mac = ":".join(f"{b:02x}" for b in device.mac)
+    
+    return {
+        "title": f"Broadlink RM ({host})",
+        "host": host,
+        "port": port,
+        "mac": mac,
+    }
+
+
 class BroadlinkIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow para Broadlink IR Manager"""
     
@@ -95,6 +102,7 @@ class BroadlinkIRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     title=info["title"],
                     data={
                         CONF_HOST: info["host"],
+                        CONF_PORT: info["port"],
                         CONF_MAC: info["mac"],
                         CONF_TIMEOUT: user_input.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
                     }
@@ -6,7 +6,7 @@ from homeassistant.const import Platform
 DOMAIN = "broadlink_ir_manager"
 
 # Plataformas suportadas
-PLATFORMS = [Platform.SENSOR, Platform.BUTTON]
+PLATFORMS = [Platform.SENSOR, Platform.BUTTON, Platform.CLIMATE, Platform.REMOTE]
 
 # Serviços
 SERVICE_START_LEARNING = "start_learning"
@@ -15,16 +15,81 @@ SERVICE_GET_LEARNED_CODE = "get_learned_code"
 SERVICE_CONVERT_CODE = "convert_code"
 SERVICE_SAVE_CODE = "save_code"
 SERVICE_DELETE_CODE = "delete_code"
+SERVICE_SAVE_CODES = "save_codes"
+SERVICE_DELETE_CODES = "delete_codes"
+SERVICE_UPDATE_CODES = "update_codes"
+SERVICE_SAVE_MACRO = "save_macro"
+SERVICE_DELETE_MACRO = "delete_macro"
+SERVICE_SEND_MACRO = "send_macro"
+SERVICE_BROADCAST_CODE = "broadcast_code"
 SERVICE_LIST_CODES = "list_codes"
+SERVICE_IMPORT_CODES = "import_codes"
+SERVICE_EXPORT_CODES = "export_codes"
+SERVICE_GET_SENSOR_DETAILS = "get_sensor_details"
+SERVICE_GET_CAPTURE_HISTORY = "get_capture_history"
 
 # Configuração
 CONF_HOST = "host"
 CONF_MAC = "mac"
+CONF_PORT = "port"
 CONF_TIMEOUT = "timeout"
+CONF_STORAGE_FORMAT = "storage_format"
+CONF_METRICS_ENDPOINT = "metrics_endpoint"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_NORMALIZE_CODES = "normalize_codes"
+CONF_CLIMATES = "climates"
+CONF_HOT_CODES = "hot_codes"
+CONF_WATCH_DATABASE = "watch_database"
+
+# Configuração de cada ar-condicionado (climates)
+CONF_NAME = "name"
+CONF_DEVICE = "device"
+CONF_HVAC_MODES = "hvac_modes"
+CONF_MIN_TEMP = "min_temp"
+CONF_MAX_TEMP = "max_temp"
+CONF_TEMP_STEP = "temp_step"
+CONF_FAN_MODES = "fan_modes"
+CONF_SWING_MODES = "swing_modes"
+CONF_COMMAND_TEMPLATE = "command_template"
+CONF_OFF_COMMAND = "off_command"
 
 # Padrões
 DEFAULT_TIMEOUT = 30
+DEFAULT_PORT = 80
 DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_IMPORT_BATCH_SIZE = 500
+DEFAULT_STORAGE_FORMAT = "json"
+DEFAULT_HISTORY_PAGE_SIZE = 10
+DEFAULT_BROADCAST_TIMEOUT = 5
+DEFAULT_CLIMATE_MODES = ["cool", "heat"]
+DEFAULT_MIN_TEMP = 16
+DEFAULT_MAX_TEMP = 30
+DEFAULT_OFF_COMMAND = "off"
+DEFAULT_HOT_CODES = 256
+
+# Formatos de arquivo de importação/exportação (os demais vêm de ir_formats)
+FORMAT_NDJSON = "ndjson"
+DEFAULT_CONVERT_FORMAT = "pronto"
+
+# Amostras por botão no learning com consenso
+MAX_LEARNING_SAMPLES = 10
+
+# Histórico de capturas (buffer circular persistido em .storage)
+CAPTURE_HISTORY_SIZE = 100
+CAPTURE_HISTORY_SAVE_DELAY = 10
+CAPTURE_HISTORY_STORAGE_VERSION = 1
+
+# Arquivo da base de dados para cada formato de armazenamento
+DATABASE_FILENAMES = {
+    "json": "ir_codes.json",
+    "binary": "ir_codes.irdb",
+}
+
+# Arquivo das macros (ao lado da base de dados)
+MACROS_FILENAME = "ir_macros.json"
+
+# Intervalo (s) de gravação do uso dos códigos (envios e último envio)
+USAGE_SAVE_INTERVAL = 300
 
 # Estados
 STATE_IDLE = "idle"
@@ -35,7 +100,16 @@ STATE_CODE_RECEIVED = "code_received"
 ATTR_BASE64_CODE = "base64_code"
 ATTR_PRONTO_CODE = "pronto_code"
 ATTR_FREQUENCY = "frequency"
+ATTR_QUALITY = "quality"
 ATTR_LEARNING_TIMEOUT = "learning_timeout"
+ATTR_SAMPLES_CAPTURED = "samples_captured"
+ATTR_SAMPLES_REQUESTED = "samples_requested"
 ATTR_LAST_CODE = "last_code"
 ATTR_CODES_COUNT = "codes_count"
+ATTR_CODES_BY_DEVICE = "codes_by_device"
+ATTR_RECENT_CODES = "recent_codes"
+
+# Atributos volumosos: fora do recorder sempre e fora do estado no modo compacto
+LAST_CODE_DETAIL_ATTRIBUTES = frozenset({ATTR_BASE64_CODE, ATTR_PRONTO_CODE})
+DATABASE_DETAIL_ATTRIBUTES = frozenset({ATTR_CODES_BY_DEVICE, ATTR_RECENT_CODES})
 
@@ -1,14 +1,20 @@
 """Coordinator para o Broadlink IR Manager"""
 
 import asyncio
+import base64
 import logging
+import math
+import time
+from collections import deque
 from datetime import timedelta
-from typing import Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -18,12 +24,80 @@ from .const import (
     STATE_CODE_RECEIVED,
     CONF_HOST,
     CONF_MAC,
+    CONF_PORT,
     CONF_TIMEOUT,
+    CONF_NORMALIZE_CODES,
+    DEFAULT_PORT,
     DEFAULT_TIMEOUT,
+    CAPTURE_HISTORY_SIZE,
+    CAPTURE_HISTORY_SAVE_DELAY,
+    CAPTURE_HISTORY_STORAGE_VERSION,
 )
+from .metrics import DEVICE_ERRORS, DEVICE_LATENCY
 
 _LOGGER = logging.getLogger(__name__)
 
+_broadlink = None
+
+
+def import_broadlink():
+    """
+    Importa a biblioteca broadlink na primeira utilização
+    A importação carrega as dependências de criptografia, por isso deve
+    ser feita no executor e nunca durante o carregamento da integração.
+    """
+    global _broadlink
+    if _broadlink is None:
+        import broadlink
+        _broadlink = broadlink
+    return _broadlink
+
+
+def is_no_data_error(err: Exception) -> bool:
+    """check_data sinaliza que ainda não há código com ReadError/StorageError"""
+    exceptions = getattr(_broadlink, "exceptions", None)
+    return exceptions is not None and isinstance(
+        err, (exceptions.ReadError, exceptions.StorageError)
+    )
+
+
+async def async_broadcast_packet(coordinators: List["BroadlinkIRCoordinator"],
+                                 packet: bytes, timeout: float) -> Dict[str, Any]:
+    """
+    Envia o mesmo pacote a vários dispositivos ao mesmo tempo
+    Cada envio tem seu próprio timeout, então a duração total fica próxima
+    à do dispositivo mais lento e não à soma de todos.
+    Retorna: resumo com resultado e latência de cada dispositivo
+    """
+    async def send(coordinator: "BroadlinkIRCoordinator") -> Dict[str, Any]:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(coordinator.async_send_packet(packet), timeout)
+        except asyncio.TimeoutError:
+            error = f"Sem resposta em {timeout:g} s"
+        except Exception as err:
+            error = str(err) or type(err).__name__
+        
+        return {
+            "entry_id": coordinator.entry.entry_id,
+            "host": coordinator.host,
+            "success": error is None,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "error": error,
+        }
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(send(coordinator) for coordinator in coordinators))
+    succeeded = sum(1 for result in results if result["success"])
+    
+    return {
+        "total_ms": round((time.perf_counter() - start) * 1000, 2),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": list(results),
+    }
+
 
 class BroadlinkIRCoordinator(DataUpdateCoordinator):
     """Coordinator para gerenciar dados do Broadlink IR Manager"""
@@ -33,6 +107,7 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
         self.entry = entry
         self.host = entry.data.get(CONF_HOST)
         self.mac = entry.data.get(CONF_MAC)
+        self.port = entry.data.get(CONF_PORT, DEFAULT_PORT)
         self.timeout = entry.data.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
         
         self._broadlink_device = None
@@ -40,6 +115,15 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
         self._learning_task = None
         self._last_learned_code = None
         
+        # Sessão com várias amostras do mesmo botão: (capturadas, pedidas)
+        self._sample_progress: Optional[Tuple[int, int]] = None
+        
+        # Capturas recentes (mais antigas descartadas automaticamente)
+        self._captures: Deque[Dict[str, Any]] = deque(maxlen=CAPTURE_HISTORY_SIZE)
+        self._captures_store = Store(
+            hass, CAPTURE_HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.captures"
+        )
+        
         super().__init__(
             hass,
             _LOGGER,
@@ -69,37 +153,64 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
     async def _async_setup_device(self):
         """Configura conexão com dispositivo Broadlink"""
         try:
-            import broadlink
-            
-            if self.host and self.mac:
-                # Conecta usando host e MAC específicos
-                mac_bytes = bytes.fromhex(self.mac.replace(":", ""))
-                self._broadlink_device = broadlink.rm(
-                    host=(self.host, 80),
-                    mac=mac_bytes,
-                    devtype=0x2737  # RM Mini 3
-                )
-            else:
-                # Descobre dispositivos automaticamente
-                devices = broadlink.discover(timeout=5)
-                if devices:
-                    self._broadlink_device = devices[0]
-                else:
-                    raise ConfigEntryNotReady("Nenhum dispositivo Broadlink encontrado")
-            
-            # Autentica com o dispositivo
-            if not self._broadlink_device.auth():
-                raise ConfigEntryNotReady("Falha na autenticação com dispositivo Broadlink")
-            
+            self._broadlink_device = await self._async_device_call(
+                "connect", self._setup_device
+            )
             _LOGGER.info("Conectado ao dispositivo Broadlink")
             
         except ImportError:
             raise ConfigEntryNotReady("Biblioteca broadlink não encontrada")
+        except ConfigEntryNotReady:
+            raise
         except Exception as err:
             raise ConfigEntryNotReady(f"Erro ao conectar com Broadlink: {err}")
     
-    async def start_learning(self, timeout: int = None) -> bool:
-        """Inicia modo learning"""
+    def _setup_device(self):
+        """Conecta e autentica no dispositivo (executado no executor)"""
+        broadlink = import_broadlink()
+        
+        if self.host and self.mac:
+            # Conecta usando host e MAC específicos
+            mac_bytes = bytes.fromhex(self.mac.replace(":", ""))
+            device = broadlink.rm(
+                host=(self.host, self.port),
+                mac=mac_bytes,
+                devtype=0x2737  # RM Mini 3
+            )
+        else:
+            # Descobre dispositivos automaticamente
+            devices = broadlink.discover(timeout=5)
+            if not devices:
+                raise ConfigEntryNotReady("Nenhum dispositivo Broadlink encontrado")
+            device = devices[0]
+        
+        # Autentica com o dispositivo
+        if not device.auth():
+            raise ConfigEntryNotReady("Falha na autenticação com dispositivo Broadlink")
+        
+        return device
+    
+    async def _async_device_call(self, operation: str, func, *args):
+        """Executa operação bloqueante do dispositivo no executor, com métricas"""
+        start = time.perf_counter()
+        try:
+            return await self.hass.async_add_executor_job(func, *args)
+        except Exception as err:
+            if not is_no_data_error(err):
+                DEVICE_ERRORS.inc(operation=operation)
+            raise
+        finally:
+            DEVICE_LATENCY.observe(time.perf_counter() - start, operation=operation)
+    
+    async def start_learning(self, timeout: int = None, continuous: bool = False,
+                             samples: int = 1) -> bool:
+        """
+        Inicia modo learning
+        Com continuous=True o dispositivo volta ao modo learning após cada
+        captura, até o timeout ou stop_learning; todas ficam no histórico.
+        Com samples > 1 o mesmo botão é capturado várias vezes e só o
+        código de consenso é guardado.
+        """
         if self._state == STATE_LEARNING:
             _LOGGER.warning("Modo learning já está ativo")
             return False
@@ -109,17 +220,18 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
         
         try:
             # Inicia learning no dispositivo
-            await self.hass.async_add_executor_job(
-                self._broadlink_device.enter_learning
+            await self._async_device_call(
+                "enter_learning", self._broadlink_device.enter_learning
             )
             
             self._state = STATE_LEARNING
             self._last_learned_code = None
+            self._sample_progress = (0, samples) if samples > 1 else None
             
             # Inicia task para monitorar learning
             timeout = timeout or self.timeout
             self._learning_task = self.hass.async_create_task(
-                self._learning_monitor(timeout)
+                self._learning_monitor(timeout, continuous, samples)
             )
             
             _LOGGER.info(f"Modo learning iniciado (timeout: {timeout}s)")
@@ -138,51 +250,109 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
             self._learning_task = None
         
         self._state = STATE_IDLE
+        self._sample_progress = None
         _LOGGER.info("Modo learning parado")
         await self.async_request_refresh()
         return True
     
     async def get_learned_code(self) -> Optional[str]:
         """Obtém código aprendido"""
+        code_data = await self._check_data()
+        if code_data:
+            return await self._accept_capture([code_data])
+        return None
+    
+    async def async_send_packet(self, packet: bytes) -> None:
+        """Envia pacote Broadlink ao dispositivo em uma única chamada"""
+        if self._broadlink_device is None:
+            await self._async_setup_device()
+        
+        await self._async_device_call(
+            "send_data", self._broadlink_device.send_data, packet
+        )
+    
+    async def _check_data(self) -> Optional[bytes]:
+        """Pacote bruto capturado pelo dispositivo ou None"""
         if self._broadlink_device is None:
             return None
         
         try:
             # Verifica se há código disponível
-            code_data = await self.hass.async_add_executor_job(
-                self._broadlink_device.check_data
+            return await self._async_device_call(
+                "check_data", self._broadlink_device.check_data
             )
-            
-            if code_data:
-                # Converte para Base64
-                import base64
-                base64_code = base64.b64encode(code_data).decode('ascii')
-                self._last_learned_code = base64_code
-                self._state = STATE_CODE_RECEIVED
-                await self.async_request_refresh()
-                return base64_code
-            
+        except Exception as err:
+            if not is_no_data_error(err):
+                _LOGGER.error(f"Erro ao obter código: {err}")
             return None
-            
+    
+    async def _accept_capture(self, samples: List[bytes]) -> Optional[str]:
+        """Analisa as amostras, guarda o código resultante e atualiza o estado"""
+        try:
+            # Análise de qualidade, consenso e normalização fora do event loop
+            packet, analysis = await self.hass.async_add_executor_job(
+                self._analyze_capture, samples
+            )
         except Exception as err:
-            _LOGGER.error(f"Erro ao obter código: {err}")
+            _LOGGER.error(f"Erro ao processar código: {err}")
             return None
+        
+        # Converte para Base64
+        base64_code = base64.b64encode(packet).decode('ascii')
+        self._last_learned_code = base64_code
+        self._record_capture(samples[0] if len(samples) == 1 else None, base64_code, analysis)
+        self._state = STATE_CODE_RECEIVED
+        await self.async_request_refresh()
+        return base64_code
     
-    async def _learning_monitor(self, timeout: int):
+    async def _learning_monitor(self, timeout: int, continuous: bool = False,
+                                samples: int = 1):
         """Monitora processo de learning"""
+        captured: List[bytes] = []
         try:
             # Aguarda por código ou timeout
             for _ in range(timeout):
                 await asyncio.sleep(1)
                 
-                code = await self.get_learned_code()
+                code_data = await self._check_data()
+                if not code_data:
+                    continue
+                
+                captured.append(code_data)
+                if len(captured) < samples:
+                    # Próxima amostra do mesmo botão
+                    _LOGGER.info(f"Amostra {len(captured)}/{samples} capturada")
+                    self._sample_progress = (len(captured), samples)
+                    await self._async_device_call(
+                        "enter_learning", self._broadlink_device.enter_learning
+                    )
+                    self.async_update_listeners()
+                    continue
+                
+                code = await self._accept_capture(captured)
+                captured = []
                 if code:
                     _LOGGER.info("Código IR capturado com sucesso")
-                    return
+                    if not continuous:
+                        self._sample_progress = None
+                        return
+                
+                # Sessão contínua: pronto para o próximo botão
+                self._sample_progress = (0, samples) if samples > 1 else None
+                await self._async_device_call(
+                    "enter_learning", self._broadlink_device.enter_learning
+                )
+                self._state = STATE_LEARNING
+                await self.async_request_refresh()
             
-            # Timeout atingido
+            # Timeout atingido; amostras incompletas são descartadas
+            if captured:
+                _LOGGER.warning(
+                    f"Timeout com {len(captured)}/{samples} amostras; captura descartada"
+                )
             _LOGGER.warning("Timeout do modo learning atingido")
             self._state = STATE_IDLE
+            self._sample_progress = None
             await self.async_request_refresh()
             
         except asyncio.CancelledError:
@@ -190,8 +360,114 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
         except Exception as err:
             _LOGGER.error(f"Erro no monitoramento de learning: {err}")
             self._state = STATE_IDLE
+            self._sample_progress = None
             await self.async_request_refresh()
     
+    def _analyze_capture(self, samples: List[bytes]) -> Tuple[bytes, Optional[Dict[str, Any]]]:
+        """
+        Estágio pós-captura (executado no executor)
+        Várias amostras do mesmo botão viram um único código de consenso.
+        Retorna: (pacote a usar, resumo da análise ou None se não analisável)
+        """
+        converter = self.hass.data.get(DOMAIN, {}).get("converter")
+        if converter is None:
+            return samples[0], None
+        
+        from .ir_analysis import analyze_packet, analyze_samples
+        normalize = self.hass.data[DOMAIN].get("config", {}).get(CONF_NORMALIZE_CODES, True)
+        try:
+            if len(samples) > 1:
+                analysis = analyze_samples(samples, converter, normalize=normalize)
+                return analysis.packet, analysis.to_dict()
+            analysis = analyze_packet(samples[0], converter)
+        except ValueError as err:
+            _LOGGER.debug(f"Código capturado não analisável: {err}")
+            return samples[0], None
+        
+        return (analysis.packet if normalize else samples[0]), analysis.to_dict()
+    
+    def _record_capture(self, code_data: Optional[bytes], base64_code: str,
+                        analysis: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Guarda captura no histórico; a gravação em disco é agrupada
+        code_data é o pacote bruto (None para consenso de várias amostras,
+        em que só o resultado é guardado).
+        """
+        capture = self._capture_entry(dt_util.utcnow().isoformat(), base64_code)
+        capture["analysis"] = analysis
+        capture["quality"] = analysis["quality"] if analysis else None
+        if code_data is not None:
+            raw_code = base64.b64encode(code_data).decode('ascii')
+            if raw_code != base64_code:
+                capture["raw_code"] = raw_code
+        
+        self._captures.append(capture)
+        self._captures_store.async_delay_save(
+            self._captures_data, CAPTURE_HISTORY_SAVE_DELAY
+        )
+    
+    def _capture_entry(self, timestamp: str, base64_code: str) -> Dict[str, Any]:
+        """Monta registro de captura com os timings decodificados"""
+        timings, frequency = self._decode_timings(base64.b64decode(base64_code))
+        return {
+            "timestamp": timestamp,
+            "base64_code": base64_code,
+            "timings": timings,
+            "frequency": frequency,
+            "quality": None,
+        }
+    
+    def _decode_timings(self, code_data: bytes) -> Tuple[List[int], Optional[int]]:
+        """Timings (µs) e frequência do pacote Broadlink"""
+        converter = self.hass.data.get(DOMAIN, {}).get("converter")
+        if converter is None:
+            return [], None
+        try:
+            return converter.parse_broadlink_data(code_data)
+        except ValueError:
+            return [], None
+    
+    def _captures_data(self) -> Dict[str, Any]:
+        """Conteúdo persistido (os timings são recalculados na carga)"""
+        return {
+            "captures": [
+                {key: value for key, value in capture.items() if key != "timings"}
+                for capture in self._captures
+            ]
+        }
+    
+    async def async_load_captures(self) -> None:
+        """Restaura o histórico de capturas salvo"""
+        data = await self._captures_store.async_load()
+        if not data:
+            return
+        
+        for capture in data.get("captures", []):
+            try:
+                entry = self._capture_entry(capture["timestamp"], capture["base64_code"])
+            except (KeyError, ValueError):
+                continue
+            for key in ("quality", "analysis", "raw_code"):
+                if key in capture:
+                    entry[key] = capture[key]
+            self._captures.append(entry)
+    
+    def get_captures(self, page: int = 1, page_size: int = 10) -> Dict[str, Any]:
+        """Página do histórico de capturas, mais recentes primeiro"""
+        total = len(self._captures)
+        start = (page - 1) * page_size
+        captures = [
+            self._captures[total - 1 - position]
+            for position in range(start, min(start + page_size, total))
+        ]
+        return {
+            "page": page,
+            "page_size": page_size,
+            "pages": math.ceil(total / page_size),
+            "total": total,
+            "captures": captures,
+        }
+    
     @property
     def device_info(self):
         """Informações do dispositivo"""
@@ -213,6 +489,16 @@ class BroadlinkIRCoordinator(DataUpdateCoordinator):
         """Último código aprendido"""
         return self._last_learned_code
     
+    @property
+    def last_capture(self) -> Optional[Dict[str, Any]]:
+        """Registro da captura mais recente (com qualidade e análise)"""
+        return self._captures[-1] if self._captures else None
+    
+    @property
+    def sample_progress(self) -> Optional[Tuple[int, int]]:
+        """(amostras capturadas, amostras pedidas) na sessão atual"""
+        return self._sample_progress
+    
     @property
     def is_learning(self) -> bool:
         """Verifica se está em modo learning"""
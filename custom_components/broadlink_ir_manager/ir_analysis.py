@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Análise de qualidade e normalização de códigos IR capturados
+Agrupa as durações de marcas e espaços (k-means 1D), aproxima cada
+timing do centro do seu grupo, remove quadros repetidos redundantes e
+calcula uma nota de qualidade do sinal
+"""
+
+import statistics
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .ir_converter import IRConverter
+except ImportError:  # Execução direta (python ir_analysis.py)
+    from ir_converter import IRConverter
+
+# Diferença relativa máxima entre timings do mesmo grupo
+DEFAULT_TOLERANCE = 0.2
+
+# Máximo de grupos por tipo (marca/espaço); protocolos comuns usam até 4
+MAX_CLUSTERS = 8
+
+# Espaços a partir deste valor (µs) separam quadros
+FRAME_GAP_US = 20000
+
+# Maior valor do byte de repetição do pacote Broadlink
+MAX_REPEAT = 255
+
+KMEANS_ITERATIONS = 10
+
+_numpy = None
+
+
+@dataclass
+class SignalAnalysis:
+    """Resultado da análise de um código capturado"""
+    timings: List[int]
+    packet: bytes
+    quality: int
+    jitter: float
+    frames: int
+    repeats_removed: int
+    original_size: int
+    mark_centers: List[int] = field(default_factory=list)
+    space_centers: List[int] = field(default_factory=list)
+    samples: int = 1
+    rejected_samples: int = 0
+    
+    def to_dict(self) -> Dict[str, object]:
+        """Resumo serializável (sem timings e pacote)"""
+        return {
+            "quality": self.quality,
+            "jitter": round(self.jitter, 4),
+            "frames": self.frames,
+            "repeats_removed": self.repeats_removed,
+            "original_size": self.original_size,
+            "size": len(self.packet),
+            "mark_centers": self.mark_centers,
+            "space_centers": self.space_centers,
+            "samples": self.samples,
+            "rejected_samples": self.rejected_samples,
+        }
+
+
+def _initial_centers(values: Sequence[int], tolerance: float) -> List[float]:
+    """Centros iniciais: grupos de valores ordenados separados por saltos > tolerance"""
+    ordered = sorted(values)
+    groups = [[ordered[0]]]
+    for value in ordered[1:]:
+        if value > groups[-1][0] * (1 + 2 * tolerance):
+            groups.append([value])
+        else:
+            groups[-1].append(value)
+    
+    # Mantém os grupos mais populosos quando há grupos demais
+    groups.sort(key=len, reverse=True)
+    return sorted(sum(group) / len(group) for group in groups[:MAX_CLUSTERS])
+
+
+def _nearest(centers: Sequence[float], value: float) -> int:
+    """Índice do centro mais próximo em escala relativa"""
+    return min(range(len(centers)), key=lambda i: abs(value - centers[i]) / centers[i])
+
+
+def cluster_timings(values: Sequence[int], tolerance: float = DEFAULT_TOLERANCE) -> List[float]:
+    """
+    K-means 1D sobre as durações
+    O número de grupos vem dos saltos entre valores ordenados; as
+    iterações de Lloyd refinam os centros.
+    Retorna: centros ordenados
+    """
+    if not values:
+        return []
+    
+    centers = _initial_centers(values, tolerance)
+    for _ in range(KMEANS_ITERATIONS):
+        sums = [0.0] * len(centers)
+        counts = [0] * len(centers)
+        for value in values:
+            nearest = _nearest(centers, value)
+            sums[nearest] += value
+            counts[nearest] += 1
+        
+        updated = [
+            sums[i] / counts[i] if counts[i] else centers[i]
+            for i in range(len(centers))
+        ]
+        if updated == centers:
+            break
+        centers = updated
+    
+    return sorted(centers)
+
+
+def snap_timings(timings: Sequence[int], mark_centers: Sequence[float],
+                 space_centers: Sequence[float],
+                 tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[int], float]:
+    """
+    Aproxima marcas (posições pares) e espaços (ímpares) do centro do grupo
+    Timings fora da tolerância (ex.: pausas entre quadros) são mantidos.
+    Retorna: (timings normalizados, desvio relativo médio dos ajustados)
+    """
+    snapped = []
+    deviation = 0.0
+    adjusted = 0
+    for position, timing in enumerate(timings):
+        centers = mark_centers if position % 2 == 0 else space_centers
+        if not centers or timing <= 0:
+            snapped.append(timing)
+            continue
+        
+        center = centers[_nearest(centers, timing)]
+        error = abs(timing - center) / center
+        if error <= tolerance:
+            snapped.append(int(round(center)))
+            deviation += error
+            adjusted += 1
+        else:
+            snapped.append(timing)
+    
+    return snapped, deviation / adjusted if adjusted else 0.0
+
+
+def split_frames(timings: Sequence[int], gap_us: int = FRAME_GAP_US) -> List[List[int]]:
+    """Divide a sequência em quadros terminados por espaços >= gap_us"""
+    frames = [[]]
+    for position, timing in enumerate(timings):
+        frames[-1].append(timing)
+        if position % 2 == 1 and timing >= gap_us and position < len(timings) - 1:
+            frames.append([])
+    return [frame for frame in frames if frame]
+
+
+def _same_frame(first: Sequence[int], second: Sequence[int], tolerance: float) -> bool:
+    """Quadros iguais dentro da tolerância (a pausa final não é comparada)"""
+    if len(first) != len(second):
+        return False
+    return all(
+        abs(a - b) <= tolerance * max(a, b)
+        for a, b in zip(first[:-1], second[:-1])
+    )
+
+
+def trim_repeats(frames: List[List[int]],
+                 tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[List[int]], int]:
+    """
+    Remove quadros idênticos ao anterior (o botão segurado durante a captura)
+    Retorna: (quadros mantidos, quantidade removida)
+    """
+    kept: List[List[int]] = []
+    removed = 0
+    for frame in frames:
+        if kept and _same_frame(kept[-1], frame, tolerance):
+            removed += 1
+            continue
+        kept.append(frame)
+    return kept, removed
+
+
+def collapse_repeats(frames: List[List[int]], repeat: int = 0,
+                     tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[List[int]], int, int]:
+    """
+    Reduz um sinal que é o mesmo quadro repetido a um único quadro
+    As cópias removidas passam para o byte de repetição do Broadlink, que
+    reenvia o pacote inteiro: o número de quadros transmitidos não muda
+    (o Sony SIRC, por exemplo, exige pelo menos 3). Quadros diferentes
+    entre si (NEC com quadros de repetição) ou contagens que não cabem no
+    byte ficam como capturados.
+    Retorna: (quadros, quantidade removida, novo byte de repetição)
+    """
+    kept, removed = trim_repeats(frames, tolerance)
+    if not removed or len(kept) != 1:
+        return frames, 0, repeat
+    
+    total = (repeat + 1) * (removed + 1) - 1
+    if total > MAX_REPEAT:
+        return frames, 0, repeat
+    return kept, removed, total
+
+
+def quality_score(timings: Sequence[int], jitter: float, clusters: int,
+                  tolerance: float = DEFAULT_TOLERANCE) -> int:
+    """
+    Nota de 0 a 100 do sinal capturado
+    Penaliza o desvio médio em relação aos centros, excesso de grupos
+    (ruído) e códigos curtos demais para um protocolo real.
+    """
+    if len(timings) < 4:
+        return 0
+    
+    score = 100 * (1 - min(jitter / tolerance, 1))
+    if clusters > 6:
+        score -= 5 * (clusters - 6)
+    if len(timings) < 16:
+        score -= 20
+    return max(0, min(100, int(round(score))))
+
+
+def analyze_timings(timings: Sequence[int], tolerance: float = DEFAULT_TOLERANCE,
+                    repeat: int = 0) -> Tuple[List[int], Dict[str, object]]:
+    """
+    Normaliza uma sequência de timings (µs)
+    repeat é o byte de repetição do pacote; o valor ajustado às cópias
+    removidas volta em "repeat".
+    Retorna: (timings normalizados, dados da análise)
+    """
+    marks = [t for t in timings[0::2] if 0 < t < FRAME_GAP_US]
+    spaces = [t for t in timings[1::2] if 0 < t < FRAME_GAP_US]
+    mark_centers = cluster_timings(marks, tolerance)
+    space_centers = cluster_timings(spaces, tolerance)
+    
+    snapped, jitter = snap_timings(timings, mark_centers, space_centers, tolerance)
+    frames, removed, repeat = collapse_repeats(split_frames(snapped), repeat, tolerance)
+    normalized = [timing for frame in frames for timing in frame]
+    
+    return normalized, {
+        "repeat": repeat,
+        "jitter": jitter,
+        "frames": len(frames) + removed,
+        "repeats_removed": removed,
+        "quality": quality_score(timings, jitter, len(mark_centers) + len(space_centers),
+                                 tolerance),
+        "mark_centers": [int(round(c)) for c in mark_centers],
+        "space_centers": [int(round(c)) for c in space_centers],
+    }
+
+
+def analyze_packet(data: bytes, converter: Optional[IRConverter] = None,
+                   tolerance: float = DEFAULT_TOLERANCE) -> SignalAnalysis:
+    """
+    Analisa e normaliza um pacote Broadlink capturado
+    Os quadros repetidos removidos são somados ao byte de repetição do
+    pacote, que transmite o mesmo número de quadros do original.
+    """
+    converter = converter or IRConverter()
+    timings, _ = converter.parse_broadlink_data(data)
+    if not timings:
+        raise ValueError("Código sem timings")
+    
+    normalized, info = analyze_timings(timings, tolerance, data[1])
+    packet = converter.encode_broadlink_data(normalized, info["repeat"])
+    
+    return SignalAnalysis(
+        timings=normalized,
+        packet=packet,
+        quality=info["quality"],
+        jitter=info["jitter"],
+        frames=info["frames"],
+        repeats_removed=info["repeats_removed"],
+        original_size=len(data),
+        mark_centers=info["mark_centers"],
+        space_centers=info["space_centers"],
+    )
+
+
+def _import_numpy():
+    """numpy é opcional: sem ele o consenso usa a implementação em Python puro"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+def _consensus_numpy(np, samples: List[List[int]],
+                     tolerance: float) -> Tuple[List[int], int]:
+    """Consenso vetorizado: matriz amostras x timings"""
+    matrix = np.asarray(samples, dtype=float)
+    median = np.median(matrix, axis=0)
+    scale = np.maximum(median, 1.0)
+    
+    # Amostras cujo desvio médio em relação à mediana excede a tolerância
+    deviation = (np.abs(matrix - median) / scale).mean(axis=1)
+    keep = deviation <= tolerance
+    if not keep.any():
+        keep = deviation == deviation.min()
+    
+    # Em cada posição, média apenas dos valores próximos da mediana
+    close = (np.abs(matrix - median) <= tolerance * scale) & keep[:, None]
+    counts = close.sum(axis=0)
+    sums = np.where(close, matrix, 0.0).sum(axis=0)
+    consensus = np.where(counts > 0, sums / np.maximum(counts, 1), median)
+    
+    return np.rint(consensus).astype(int).tolist(), int(keep.sum())
+
+
+def _consensus_python(samples: List[List[int]],
+                      tolerance: float) -> Tuple[List[int], int]:
+    """Consenso em Python puro (mesmo algoritmo da versão numpy)"""
+    median = [statistics.median(column) for column in zip(*samples)]
+    scale = [max(value, 1.0) for value in median]
+    
+    deviation = [
+        sum(abs(v - m) / s for v, m, s in zip(sample, median, scale)) / len(median)
+        for sample in samples
+    ]
+    kept = [sample for sample, d in zip(samples, deviation) if d <= tolerance]
+    if not kept:
+        kept = [samples[deviation.index(min(deviation))]]
+    
+    consensus = []
+    for position, column in enumerate(zip(*kept)):
+        close = [v for v in column if abs(v - median[position]) <= tolerance * scale[position]]
+        consensus.append(int(round(sum(close) / len(close))) if close else int(round(median[position])))
+    
+    return consensus, len(kept)
+
+
+def consensus_timings(samples: Sequence[Sequence[int]],
+                      tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[int], int]:
+    """
+    Sequência de consenso de várias capturas do mesmo botão
+    Só entram amostras com a estrutura mais comum (mesma quantidade de
+    timings); amostras distantes da mediana são rejeitadas e cada posição
+    é a média dos valores dentro da tolerância.
+    Retorna: (timings de consenso, amostras usadas)
+    """
+    if not samples:
+        raise ValueError("Nenhuma amostra para consenso")
+    
+    length, _ = Counter(len(sample) for sample in samples).most_common(1)[0]
+    aligned = [list(sample) for sample in samples if len(sample) == length]
+    if len(aligned) == 1:
+        return aligned[0], 1
+    
+    np = _import_numpy()
+    if np is not None:
+        return _consensus_numpy(np, aligned, tolerance)
+    return _consensus_python(aligned, tolerance)
+
+
+def analyze_samples(packets: Sequence[bytes], converter: Optional[IRConverter] = None,
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    normalize: bool = True) -> SignalAnalysis:
+    """
+    Analisa várias capturas do mesmo botão e gera um único código
+    Se todas as amostras são um único quadro repetido, o alinhamento usa
+    esse quadro (o tempo com o botão pressionado varia entre capturas) e o
+    byte de repetição reproduz o menor número de cópias capturado; como
+    cada cópia tem ruído próprio, a comparação usa o dobro da tolerância.
+    Com normalize=False o pacote traz o consenso sem aproximação aos grupos
+    nem remoção de quadros repetidos (e com o byte de repetição original).
+    """
+    if len(packets) == 1:
+        return analyze_packet(packets[0], converter, tolerance)
+    
+    converter = converter or IRConverter()
+    captures = []
+    for data in packets:
+        timings, _ = converter.parse_broadlink_data(data)
+        if timings:
+            captures.append(split_frames(timings))
+    if not captures:
+        raise ValueError("Nenhuma amostra com timings")
+    
+    trimmed = [trim_repeats(frames, 2 * tolerance) for frames in captures]
+    if all(len(kept) == 1 for kept, _ in trimmed):
+        samples = [kept[0] for kept, _ in trimmed]
+        copies = min(removed + 1 for _, removed in trimmed)
+    else:
+        samples = [[timing for frame in frames for timing in frame] for frames in captures]
+        copies = 1
+    repeat = min(MAX_REPEAT, (packets[0][1] + 1) * copies - 1)
+    
+    consensus, used = consensus_timings(samples, tolerance)
+    normalized, info = analyze_timings(consensus, tolerance, repeat)
+    if not normalize:
+        # As cópias que analyze_timings dobrou no byte de repetição continuam nos timings
+        normalized = consensus
+        info["repeat"] = repeat
+    
+    return SignalAnalysis(
+        timings=normalized,
+        packet=converter.encode_broadlink_data(normalized, info["repeat"]),
+        quality=info["quality"],
+        jitter=info["jitter"],
+        frames=info["frames"] + copies - 1,
+        repeats_removed=info["repeats_removed"] + copies - 1,
+        original_size=len(packets[0]),
+        mark_centers=info["mark_centers"],
+        space_centers=info["space_centers"],
+        samples=len(packets),
+        rejected_samples=len(packets) - used,
+    )
+
+
+def test_analysis():
+    """Função de teste da análise"""
+    import base64
+    import random
+    
+    rng = random.Random(1)
+    frame = [9000, 4500]
+    for bit in "0010000011011111" * 2:
+        frame += [560, 1690 if bit == "1" else 560]
+    frame += [560, 40000]
+    noisy = [int(t * rng.uniform(0.9, 1.1)) for t in frame * 3]
+    
+    converter = IRConverter()
+    data = converter.encode_broadlink_data(noisy)
+    result = analyze_packet(data, converter)
+    
+    print(f"Original: {base64.b64encode(data).decode()} ({len(data)} bytes)")
+    print(f"Normalizado: {base64.b64encode(result.packet).decode()} ({len(result.packet)} bytes)")
+    print(f"Análise: {result.to_dict()}")
+    
+    samples = [
+        converter.encode_broadlink_data([int(t * rng.uniform(0.9, 1.1)) for t in frame])
+        for _ in range(5)
+    ]
+    samples.append(converter.encode_broadlink_data([t * 3 for t in frame]))  # corrompida
+    consensus = analyze_samples(samples, converter)
+    print(f"Consenso: {base64.b64encode(consensus.packet).decode()}")
+    print(f"Análise: {consensus.to_dict()}")
+    
+    # Sony SIRC: o receptor exige 3 quadros; o pacote normalizado deve transmitir os 3
+    sirc = [2400, 600]
+    for bit in "0010101" + "10000":
+        sirc += [1200 if bit == "1" else 600, 600]
+    sirc[-1] = 45000 - sum(sirc[:-1])
+    sirc_result = analyze_packet(converter.encode_broadlink_data(sirc * 3), converter)
+    sirc_timings, _ = converter.parse_broadlink_data(sirc_result.packet)
+    transmitted = (sirc_result.packet[1] + 1) * len(split_frames(sirc_timings))
+    print(f"SIRC: {sirc_result.frames} quadros capturados, {transmitted} transmitidos "
+          f"({'ok' if transmitted == 3 else 'ERRO'})")
+    
+    # NEC com quadros de repetição diferentes do primeiro: não cabe no byte de repetição
+    nec_repeat = [9000, 2250, 560, 96000]
+    nec_result = analyze_packet(converter.encode_broadlink_data(noisy[:len(frame)] + nec_repeat * 2),
+                                converter)
+    print(f"NEC com repetições: {nec_result.frames} quadros, {nec_result.repeats_removed} removidos")
+    
+    # Amostras com quadros diferentes (F+F, F+F, F+G): os dois modos transmitem os mesmos quadros
+    other = [t if i != 2 else 1690 for i, t in enumerate(frame)]
+    mixed = [converter.encode_broadlink_data(first + second)
+             for first, second in ((frame, frame), (frame, frame), (frame, other))]
+    counts = []
+    for normalize in (True, False):
+        packet = analyze_samples(mixed, converter, normalize=normalize).packet
+        timings, _ = converter.parse_broadlink_data(packet)
+        counts.append((packet[1] + 1) * len(split_frames(timings)))
+    print(f"Quadros transmitidos (normalizado, bruto): {counts} "
+          f"({'ok' if counts[0] == counts[1] else 'ERRO'})")
+
+
+if __name__ == "__main__":
+    test_analysis()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Formato binário compacto para a biblioteca de códigos IR
+Contêiner mapeado em memória com tabela de strings, índice de tamanho
+fixo e pacotes Broadlink com timings codificados em varint
+"""
+
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+MAGIC = b"BLIR"
+FORMAT_VERSION = 1
+
+# magic, versão, flags, registros, strings, offset das strings, offset do índice, offset dos pacotes
+HEADER = struct.Struct("<4sHHIIIII")
+
+# id, nome, dispositivo, comando, data de criação, notas, frequência,
+# offset do pacote, tamanho do pacote, codificação
+INDEX_ENTRY = struct.Struct("<IIIIIIIIIB")
+
+ENCODING_RAW = 0
+ENCODING_VARINT = 1
+
+# Campos textuais de cada registro, na ordem do índice
+STRING_FIELDS = ("id", "name", "device", "command", "created_at", "notes")
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    """Acrescenta inteiro sem sinal em formato varint (LEB128)"""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data, pos: int) -> Tuple[int, int]:
+    """Lê varint a partir de pos. Retorna: (valor, nova posição)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_packet(packet: bytes) -> Tuple[int, bytes]:
+    """
+    Codifica pacote Broadlink para armazenamento
+    Os pulsos (1 byte, ou 0x00 seguido de 2 bytes big-endian) viram uma
+    sequência de varints; o restante do pacote é mantido como está.
+    Usa o pacote bruto quando a codificação não é menor ou não é reversível.
+    Retorna: (codificação, bytes)
+    """
+    if len(packet) < 4:
+        return ENCODING_RAW, bytes(packet)
+    
+    length = struct.unpack('<H', packet[2:4])[0]
+    pulse_data = packet[4:4 + length]
+    
+    ticks = []
+    pos = 0
+    while pos < len(pulse_data):
+        if pulse_data[pos]:
+            ticks.append(pulse_data[pos])
+            pos += 1
+        elif pos + 2 < len(pulse_data):
+            ticks.append(struct.unpack('>H', pulse_data[pos + 1:pos + 3])[0])
+            pos += 3
+        else:
+            return ENCODING_RAW, bytes(packet)
+    
+    trailer = packet[4 + length:]
+    stripped = trailer.rstrip(b"\x00")
+    
+    encoded = bytearray(packet[0:2])
+    _write_varint(encoded, len(ticks))
+    for tick in ticks:
+        _write_varint(encoded, tick)
+    _write_varint(encoded, len(stripped))
+    encoded += stripped
+    _write_varint(encoded, len(trailer) - len(stripped))
+    
+    if len(encoded) >= len(packet) or decode_packet(ENCODING_VARINT, encoded) != packet:
+        return ENCODING_RAW, bytes(packet)
+    
+    return ENCODING_VARINT, bytes(encoded)
+
+
+def decode_packet(encoding: int, data) -> bytes:
+    """Reconstrói o pacote Broadlink original"""
+    if encoding == ENCODING_RAW:
+        return bytes(data)
+    
+    pulses = bytearray()
+    count, pos = _read_varint(data, 2)
+    for _ in range(count):
+        tick, pos = _read_varint(data, pos)
+        if 0 < tick < 0x100:
+            pulses.append(tick)
+        else:
+            pulses.append(0)
+            pulses += struct.pack('>H', tick)
+    
+    trailer_length, pos = _read_varint(data, pos)
+    trailer = bytes(data[pos:pos + trailer_length])
+    padding, _ = _read_varint(data, pos + trailer_length)
+    
+    return (bytes(data[0:2]) + struct.pack('<H', len(pulses)) +
+            bytes(pulses) + trailer + b"\x00" * padding)
+
+
+def write_library(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Grava biblioteca binária a partir de registros
+    Cada registro contém os campos de STRING_FIELDS, frequency e packet
+    (bytes do pacote Broadlink). Pacotes iguais são codificados e gravados
+    uma única vez, e as entradas do índice apontam para o mesmo offset.
+    O arquivo é substituído atomicamente.
+    Retorna: número de registros gravados
+    """
+    strings: Dict[str, int] = {}
+    index: List[Tuple[Any, ...]] = []
+    payloads = bytearray()
+    
+    # Pacote -> (offset, tamanho, codificação) do payload já gravado
+    stored: Dict[bytes, Tuple[int, int, int]] = {}
+    
+    def intern(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+    
+    for record in records:
+        location = stored.get(record["packet"])
+        if location is None:
+            encoding, payload = encode_packet(record["packet"])
+            location = stored[bytes(record["packet"])] = (len(payloads), len(payload), encoding)
+            payloads += payload
+        index.append(tuple(intern(record[name]) for name in STRING_FIELDS) + (
+            record["frequency"],
+        ) + location)
+    
+    blob = bytearray()
+    offsets = [0]
+    for value in strings:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    
+    strings_offset = HEADER.size
+    index_offset = strings_offset + 4 * len(offsets) + len(blob)
+    payload_offset = index_offset + INDEX_ENTRY.size * len(index)
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(index), len(strings),
+                            strings_offset, index_offset, payload_offset))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+        for entry in index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        f.write(payloads)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    
+    return len(index)
+
+
+class BinaryLibrary:
+    """Leitor mapeado em memória da biblioteca binária"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        (magic, version, _flags, self._count, self._string_count,
+         self._strings_offset, self._index_offset,
+         self._payload_offset) = HEADER.unpack_from(self._map, 0)
+        
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Arquivo não é uma biblioteca IR binária")
+        if version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Versão de formato não suportada: {version}")
+        
+        self._blob_offset = self._strings_offset + 4 * (self._string_count + 1)
+        self._string_offsets = struct.unpack_from(
+            f"<{self._string_count + 1}I", self._map, self._strings_offset
+        )
+        self._strings: Dict[int, str] = {}
+        
+        # Pacotes decodificados por offset (registros com o mesmo pacote compartilham o payload)
+        self._packets: Dict[int, bytes] = {}
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def close(self) -> None:
+        """Libera o mapeamento e o arquivo"""
+        self._map.close()
+        self._file.close()
+    
+    def _string(self, number: int) -> str:
+        """Obtém string da tabela (decodificada uma única vez)"""
+        value = self._strings.get(number)
+        if value is None:
+            start = self._blob_offset + self._string_offsets[number]
+            end = self._blob_offset + self._string_offsets[number + 1]
+            value = self._strings[number] = self._map[start:end].decode("utf-8")
+        return value
+    
+    def _entry(self, position: int) -> Tuple[int, ...]:
+        """Lê entrada do índice"""
+        return INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + position * INDEX_ENTRY.size
+        )
+    
+    def index(self) -> Iterator[Tuple[int, str, str, str]]:
+        """Percorre o índice sem ler pacotes. Gera: (posição, id, dispositivo, comando)"""
+        for position in range(self._count):
+            entry = self._entry(position)
+            yield position, self._string(entry[0]), self._string(entry[2]), self._string(entry[3])
+    
+    def read_record(self, position: int) -> Dict[str, Any]:
+        """Lê registro completo, com o pacote Broadlink original em packet"""
+        entry = self._entry(position)
+        record = {name: self._string(number) for name, number in zip(STRING_FIELDS, entry)}
+        record["frequency"] = entry[6]
+        
+        packet = self._packets.get(entry[7])
+        if packet is None:
+            start = self._payload_offset + entry[7]
+            packet = self._packets[entry[7]] = decode_packet(
+                entry[9], self._map[start:start + entry[8]]
+            )
+        record["packet"] = packet
+        return record
+
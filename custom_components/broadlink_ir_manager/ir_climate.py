@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tabela de códigos de ar-condicionado
+Controles de ar-condicionado enviam o estado completo a cada comando, então
+cada combinação (modo, temperatura, ventilação, swing) tem seu próprio
+código na base. A tabela resolve o estado para o pacote por índice direto,
+sem buscas nem conversões no envio.
+"""
+
+from typing import Iterator, List, Optional, Set, Tuple
+
+# Campos disponíveis no modelo do nome do comando
+TEMPLATE_FIELDS = ("mode", "temperature", "fan", "swing")
+
+
+def default_command_template(fan_modes: List[str], swing_modes: List[str]) -> str:
+    """Modelo padrão: cool_24, cool_24_auto ou cool_24_auto_on, conforme as opções"""
+    parts = ["{mode}", "{temperature}"]
+    if fan_modes:
+        parts.append("{fan}")
+    if swing_modes:
+        parts.append("{swing}")
+    return "_".join(parts)
+
+
+def validate_command_template(template: str) -> str:
+    """Valida o modelo do nome do comando (campos mode, temperature, fan, swing)"""
+    try:
+        template.format(**{name: "" for name in TEMPLATE_FIELDS})
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"Modelo de comando inválido: {template} ({e})")
+    return template
+
+
+def format_temperature(temperature: float) -> str:
+    """Temperatura como aparece no nome do comando (24, 24.5)"""
+    return f"{temperature:g}"
+
+
+class ClimateCodeTable:
+    """
+    Tabela densa estado -> pacote Broadlink de um aparelho
+    Os pacotes ficam em uma lista indexada por
+    ((modo * T + temperatura) * F + ventilação) * S + swing.
+    """
+    
+    def __init__(self, device: str, modes: List[str], min_temp: float,
+                 max_temp: float, temp_step: float = 1.0,
+                 fan_modes: Optional[List[str]] = None,
+                 swing_modes: Optional[List[str]] = None,
+                 command_template: Optional[str] = None,
+                 off_command: str = "off"):
+        self.device = device
+        self.modes = list(modes)
+        self.fan_modes = list(fan_modes or [])
+        self.swing_modes = list(swing_modes or [])
+        self.min_temp = min_temp
+        self.temp_step = temp_step
+        self.temperatures = [
+            round(min_temp + step * temp_step, 1)
+            for step in range(int(round((max_temp - min_temp) / temp_step)) + 1)
+        ]
+        self.command_template = validate_command_template(
+            command_template or default_command_template(self.fan_modes, self.swing_modes)
+        )
+        self.off_command = off_command
+        
+        self._mode_index = {mode: i for i, mode in enumerate(self.modes)}
+        self._fan_index = {fan: i for i, fan in enumerate(self.fan_modes or [None])}
+        self._swing_index = {swing: i for i, swing in enumerate(self.swing_modes or [None])}
+        
+        self._packets: List[Optional[bytes]] = []
+        self._off_packet: Optional[bytes] = None
+        self.code_ids: Set[str] = set()
+        self.missing: List[str] = []
+    
+    def command(self, mode: str, temperature: float, fan: Optional[str] = None,
+                swing: Optional[str] = None) -> str:
+        """Nome do comando na base para o estado"""
+        return self.command_template.format(
+            mode=mode, temperature=format_temperature(temperature),
+            fan=fan or "", swing=swing or "",
+        )
+    
+    def states(self) -> Iterator[Tuple[str, float, Optional[str], Optional[str]]]:
+        """Gera todas as combinações na ordem da tabela"""
+        for mode in self.modes:
+            for temperature in self.temperatures:
+                for fan in self.fan_modes or [None]:
+                    for swing in self.swing_modes or [None]:
+                        yield mode, temperature, fan, swing
+    
+    def build(self, database) -> 'ClimateCodeTable':
+        """
+        Preenche a tabela com os pacotes do dispositivo na base
+        Lê os códigos do dispositivo uma única vez (de um snapshot) e
+        decodifica cada Base64 para o pacote que será enviado.
+        """
+        converter = database.converter
+        commands = {
+            code.command: code
+            for code in database.snapshot().get_codes_by_device(self.device)
+        }
+        
+        packets: List[Optional[bytes]] = []
+        code_ids: Set[str] = set()
+        missing: List[str] = []
+        for state in self.states():
+            name = self.command(*state)
+            code = commands.get(name)
+            if code is None:
+                packets.append(None)
+                missing.append(name)
+                continue
+            packets.append(converter.base64_to_bytes(code.base64_code))
+            code_ids.add(code.id)
+        
+        off = commands.get(self.off_command)
+        if off is None:
+            missing.append(self.off_command)
+        else:
+            code_ids.add(off.id)
+        
+        self._packets = packets
+        self._off_packet = converter.base64_to_bytes(off.base64_code) if off else None
+        self.code_ids = code_ids
+        self.missing = missing
+        return self
+    
+    def index(self, mode: str, temperature: float, fan: Optional[str] = None,
+              swing: Optional[str] = None) -> int:
+        """Posição do estado na tabela"""
+        temp_index = int(round((temperature - self.min_temp) / self.temp_step))
+        if not 0 <= temp_index < len(self.temperatures):
+            raise ValueError(f"Temperatura fora da faixa: {temperature}")
+        
+        return (
+            (self._mode_index[mode] * len(self.temperatures) + temp_index)
+            * len(self._fan_index) + self._fan_index[fan if self.fan_modes else None]
+        ) * len(self._swing_index) + self._swing_index[swing if self.swing_modes else None]
+    
+    def packet(self, mode: str, temperature: float, fan: Optional[str] = None,
+               swing: Optional[str] = None) -> Optional[bytes]:
+        """Pacote do estado ou None se o código não foi aprendido"""
+        return self._packets[self.index(mode, temperature, fan, swing)]
+    
+    @property
+    def off_packet(self) -> Optional[bytes]:
+        """Pacote do comando de desligar"""
+        return self._off_packet
+    
+    def affected_by(self, code_ids: Set[str], database) -> bool:
+        """Indica se alterações nesses códigos mudam a tabela"""
+        if code_ids & self.code_ids:
+            return True
+        # Pelo índice: não hidrata os códigos só para ler o dispositivo
+        index = database.codes
+        for code_id in code_ids:
+            key = index.index_entry(code_id)
+            if key is not None and key[0] == self.device:
+                return True
+        return False
+
+
+def test_climate():
+    """Função de teste da tabela de ar-condicionado"""
+    import os
+    import tempfile
+    try:
+        from .ir_database import IRDatabase
+    except ImportError:
+        from ir_database import IRDatabase
+    
+    test_base64 = "JgAcAB0dHB44HhweGx4cHR06HB0cHhwdHB8bHhwADQUAAAAAAAAAAAAAAAA="
+    with tempfile.TemporaryDirectory() as tmp:
+        db = IRDatabase(os.path.join(tmp, "ir_codes.json"))
+        table = ClimateCodeTable("Ar Quarto", ["cool", "heat"], 18, 20, fan_modes=["auto", "high"])
+        db.add_codes([
+            {"name": name, "device": "Ar Quarto", "command": name, "base64_code": test_base64}
+            for name in [table.command(*state) for state in table.states()][:-2] + ["off"]
+        ])
+        
+        table.build(db)
+        print(f"Estados: {len(table._packets)}, faltando: {table.missing}")
+        print(f"cool 19 high: {len(table.packet('cool', 19, 'high'))} bytes")
+        print(f"heat 20 high: {table.packet('heat', 20, 'high')}")
+
+
+if __name__ == "__main__":
+    test_climate()
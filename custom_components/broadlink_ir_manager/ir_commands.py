@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Mapa de comandos da base
+Resolve (dispositivo, comando) para o pacote Broadlink pronto para envio.
+O mapa é montado uma vez a partir do índice da base (sem hidratar os
+códigos), cada pacote é decodificado no primeiro uso e as alterações da
+base são aplicadas incrementalmente pelos listeners. Os pacotes em memória
+são limitados aos códigos mais enviados (LFU), pré-carregados na partida.
+"""
+
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+CommandKey = Tuple[str, str]
+
+# Pacotes mantidos decodificados em memória
+DEFAULT_CAPACITY = 256
+
+
+class CommandMap:
+    """Mapa (dispositivo, comando) -> pacote, sincronizado com o IRDatabase"""
+    
+    def __init__(self, database, capacity: int = DEFAULT_CAPACITY):
+        self.database = database
+        self.capacity = capacity
+        self._ids: Optional[Dict[CommandKey, str]] = None
+        self._keys: Dict[str, CommandKey] = {}
+        # Códigos de cada comando em ordem de inserção (dict como conjunto
+        # ordenado): remover um código e achar o mais recente custam O(1)
+        self._owners: Dict[CommandKey, Dict[str, None]] = {}
+        self._packets: Dict[str, bytes] = {}
+        self._lock = threading.RLock()
+        database.add_listener(self._apply_changes)
+    
+    @property
+    def loaded(self) -> bool:
+        """Indica se o mapa já foi montado"""
+        return self._ids is not None
+    
+    def build(self) -> None:
+        """Monta o mapa a partir do índice da base"""
+        with self._lock:
+            ids: Dict[CommandKey, str] = {}
+            keys: Dict[str, CommandKey] = {}
+            owners: Dict[CommandKey, Dict[str, None]] = {}
+            for code_id, key in self.database.snapshot().codes.index_items():
+                # Comandos repetidos: vale o mais recente
+                ids[key] = code_id
+                keys[code_id] = key
+                owners.setdefault(key, {})[code_id] = None
+            # Pacotes de códigos que continuam na base seguem válidos
+            packets = {code_id: packet for code_id, packet in self._packets.items()
+                       if code_id in keys}
+            self._ids, self._keys, self._owners, self._packets = ids, keys, owners, packets
+    
+    def cached(self, device: str, command: str) -> Optional[bytes]:
+        """Pacote já decodificado, sem acessar a base (None se ainda não estiver)"""
+        code_id = (self._ids or {}).get((device, command))
+        return self.cached_code(code_id) if code_id else None
+    
+    def cached_code(self, code_id: str) -> Optional[bytes]:
+        """Pacote do código já decodificado (None se ainda não estiver); conta o envio"""
+        packet = self._packets.get(code_id)
+        if packet is not None:
+            self.database.record_use(code_id)
+        return packet
+    
+    def packet(self, device: str, command: str) -> bytes:
+        """Pacote do comando, decodificando-o no primeiro uso"""
+        with self._lock:
+            if self._ids is None:
+                self.build()
+            
+            code_id = self._ids.get((device, command))
+            if code_id is None:
+                raise ValueError(f"Comando não encontrado: {device}/{command}")
+            return self.code_packet(code_id)
+    
+    def code_packet(self, code_id: str) -> bytes:
+        """Pacote do código, decodificando-o se não estiver em memória; conta o envio"""
+        with self._lock:
+            packet = self._packets.get(code_id)
+            if packet is None:
+                packet = self._decode(code_id)
+            self.database.record_use(code_id)
+            return packet
+    
+    def prewarm(self) -> int:
+        """
+        Decodifica os códigos mais enviados (até a capacidade)
+        Retorna: número de pacotes em memória
+        """
+        for code_id in self.database.hot_code_ids(self.capacity):
+            with self._lock:
+                if code_id not in self._packets:
+                    try:
+                        self._decode(code_id)
+                    except ValueError:
+                        continue
+        return len(self._packets)
+    
+    def _decode(self, code_id: str) -> bytes:
+        """Decodifica o pacote e o guarda, descartando o menos enviado se cheio"""
+        code = self.database.get_code(code_id)
+        if code is None:
+            raise ValueError(f"Código não encontrado: {code_id}")
+        packet = self.database.converter.base64_to_bytes(code.base64_code)
+        
+        if self.capacity <= 0:
+            return packet
+        if len(self._packets) >= self.capacity:
+            coldest = min(self._packets, key=lambda cached_id: self.database.get_usage(cached_id))
+            del self._packets[coldest]
+        self._packets[code_id] = packet
+        return packet
+    
+    def devices(self) -> List[str]:
+        """Dispositivos com comandos"""
+        with self._lock:
+            if self._ids is None:
+                self.build()
+            return sorted({device for device, _ in self._ids})
+    
+    def _apply_changes(self, code_ids: Set[str]) -> None:
+        """Atualiza as entradas dos códigos alterados (chamado após cada transação)"""
+        with self._lock:
+            if self._ids is None:
+                return
+            
+            index = self.database.codes
+            for code_id in code_ids:
+                self._packets.pop(code_id, None)
+                key = self._keys.pop(code_id, None)
+                if key is not None:
+                    owners = self._owners[key]
+                    del owners[code_id]
+                    if owners:
+                        # O código mais recente com o mesmo comando passa a responder por ele
+                        self._ids[key] = next(reversed(owners))
+                    else:
+                        del self._owners[key]
+                        del self._ids[key]
+                
+                # Pelo índice: não hidrata o código só para ler dispositivo e comando
+                key = index.index_entry(code_id)
+                if key is not None:
+                    self._ids[key] = code_id
+                    self._keys[code_id] = key
+                    self._owners.setdefault(key, {})[code_id] = None
+
+
+def test_commands():
+    """Função de teste do mapa de comandos"""
+    import os
+    import tempfile
+    try:
+        from .ir_database import IRDatabase
+    except ImportError:
+        from ir_database import IRDatabase
+    
+    test_base64 = "JgAcAB0dHB44HhweGx4cHR06HB0cHhwdHB8bHhwADQUAAAAAAAAAAAAAAAA="
+    with tempfile.TemporaryDirectory() as tmp:
+        db = IRDatabase(os.path.join(tmp, "ir_codes.json"))
+        power = db.add_code("Ligar", "TV Sala", "power", test_base64)
+        
+        commands = CommandMap(db)
+        print(f"TV Sala/power: {len(commands.packet('TV Sala', 'power'))} bytes")
+        
+        db.update_code(power, command="on")
+        print(f"Dispositivos: {commands.devices()}")
+        print(f"Após renomear, 'on' em cache: {commands.cached('TV Sala', 'on')}")
+        print(f"TV Sala/on: {len(commands.packet('TV Sala', 'on'))} bytes")
+        try:
+            commands.packet("TV Sala", "power")
+        except ValueError as e:
+            print(e)
+        
+        # Só o código mais enviado cabe em memória
+        mute = db.add_code("Mudo", "TV Sala", "mute", test_base64)
+        hot = CommandMap(db, capacity=1)
+        hot.build()
+        print(f"Pré-carregados: {hot.prewarm()} ({db.get_usage(power)[0]} envios de on)")
+        hot.packet("TV Sala", "mute")
+        print(f"on em cache após mute: {hot.cached('TV Sala', 'on') is not None}")
+        print(f"mute em cache: {hot.cached_code(mute) is not None}")
+
+
+if __name__ == "__main__":
+    test_commands()
@@ -9,6 +9,14 @@ import struct
 import json
 from typing import List, Tuple, Optional
 
+try:
+    from .metrics import CONVERSION_LATENCY, CONVERSIONS
+except ImportError:  # Execução direta (python ir_converter.py)
+    from metrics import CONVERSION_LATENCY, CONVERSIONS
+
+# Duração de uma unidade de tempo do Broadlink (269/8192 ms)
+BROADLINK_TICK_US = 269000 / 8192
+
 
 class IRConverter:
     """Classe para conversão de códigos IR entre diferentes formatos"""
@@ -30,7 +38,10 @@ class IRConverter:
     def parse_broadlink_data(self, data: bytes) -> Tuple[List[int], int]:
         """
         Extrai dados de timing do formato Broadlink
-        Retorna: (timings, frequency)
+        Cada pulso ocupa 1 byte, ou 0x00 seguido de 2 bytes big-endian,
+        em unidades de BROADLINK_TICK_US; o último (0x0d05 nos códigos
+        capturados) é a pausa final.
+        Retorna: (timings em µs, frequency)
         """
         if len(data) < 4:
             raise ValueError("Dados Broadlink muito curtos")
@@ -41,28 +52,41 @@ class IRConverter:
         
         # Extrai o comprimento dos dados
         length = struct.unpack('<H', data[2:4])[0]
+        end = min(4 + length, len(data))
         
-        # Verifica terminadores
-        if len(data) >= length + 4:
-            end_bytes = data[length + 2:length + 4]
-            if end_bytes == b'\x0d\x05':
-                # Ajusta comprimento se necessário
-                length -= 2
-        
-        # Extrai os dados de timing
-        timing_data = data[4:4 + length]
         timings = []
-        
-        # Converte bytes para timings
-        for i in range(0, len(timing_data), 2):
-            if i + 1 < len(timing_data):
-                timing = struct.unpack('<H', timing_data[i:i+2])[0]
-                # Converte para microssegundos
-                timing_us = timing * 269 / 8  # Fator de conversão Broadlink
-                timings.append(int(timing_us))
+        pos = 4
+        while pos < end:
+            ticks = data[pos]
+            pos += 1
+            if ticks == 0:
+                if pos + 2 > end:
+                    raise ValueError("Pulso estendido incompleto")
+                ticks = struct.unpack('>H', data[pos:pos + 2])[0]
+                pos += 2
+            # Converte para microssegundos
+            timings.append(int(round(ticks * BROADLINK_TICK_US)))
         
         return timings, self.carrier_frequency
     
+    def encode_broadlink_data(self, timings: List[int], repeat: int = 0) -> bytes:
+        """
+        Monta pacote Broadlink IR a partir de timings em µs
+        O pacote é completado com zeros até múltiplo de 16 bytes, como os
+        códigos capturados pelo dispositivo.
+        """
+        pulses = bytearray()
+        for timing in timings:
+            ticks = min(max(int(round(timing / BROADLINK_TICK_US)), 1), 0xFFFF)
+            if ticks < 0x100:
+                pulses.append(ticks)
+            else:
+                pulses.append(0)
+                pulses += struct.pack('>H', ticks)
+        
+        packet = bytes([0x26, repeat & 0xFF]) + struct.pack('<H', len(pulses)) + bytes(pulses)
+        return packet + b"\x00" * (-len(packet) % 16)
+    
     def timings_to_pronto(self, timings: List[int], frequency: int = 38000) -> str:
         """
         Converte lista de timings para formato Pronto Hex
@@ -105,20 +129,38 @@ class IRConverter:
         """
         Converte código Broadlink Base64 para Pronto Hex
         """
-        try:
-            # Decodifica Base64
-            data = self.base64_to_bytes(base64_code)
-            
-            # Extrai timings
-            timings, frequency = self.parse_broadlink_data(data)
-            
-            # Converte para Pronto
-            pronto_code = self.timings_to_pronto(timings, frequency)
-            
-            return pronto_code
-            
-        except Exception as e:
-            raise ValueError(f"Erro na conversão: {e}")
+        with CONVERSION_LATENCY.time():
+            try:
+                # Decodifica Base64
+                data = self.base64_to_bytes(base64_code)
+                
+                # Extrai timings
+                timings, frequency = self.parse_broadlink_data(data)
+                
+                # Converte para Pronto
+                pronto_code = self.timings_to_pronto(timings, frequency)
+                
+                CONVERSIONS.inc(result="ok")
+                return pronto_code
+                
+            except Exception as e:
+                CONVERSIONS.inc(result="error")
+                raise ValueError(f"Erro na conversão: {e}")
+    
+    def broadlink_to_format(self, base64_code: str, format_name: str) -> str:
+        """
+        Converte código Broadlink Base64 para um formato do registro
+        (raw, pronto, lirc, flipper, tuya, smartir)
+        """
+        get_format = _format_registry()
+        timings, frequency = self.parse_broadlink_data(self.base64_to_bytes(base64_code))
+        return get_format(format_name).encode(timings, frequency)
+    
+    def format_to_broadlink(self, code: str, format_name: str) -> str:
+        """Converte código de um formato do registro para Broadlink Base64"""
+        get_format = _format_registry()
+        timings, _ = get_format(format_name).decode(code)
+        return base64.b64encode(self.encode_broadlink_data(timings)).decode('ascii')
     
     def validate_pronto(self, pronto_code: str) -> bool:
         """Valida se um código Pronto está bem formado"""
@@ -161,6 +203,15 @@ class IRConverter:
             return 38000
 
 
+def _format_registry():
+    """Importa o registro de formatos no primeiro uso (ir_formats depende deste módulo)"""
+    try:
+        from .ir_formats import get_format
+    except ImportError:  # Execução direta (python ir_converter.py)
+        from ir_formats import get_format
+    return get_format
+
+
 def test_converter():
     """Função de teste para o conversor"""
     converter = IRConverter()
@@ -4,12 +4,61 @@ Gerenciador de Base de Dados IR
 Sistema para armazenar e gerenciar códigos IR capturados
 """
 
+import asyncio
+import base64
+import dataclasses
+import gzip
+import heapq
+import io
 import json
 import os
 import datetime
-from typing import Dict, List, Optional, Any
+import threading
+import time
+import weakref
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, asdict
-from ir_converter import IRConverter
+
+try:
+    from .ir_binary import BinaryLibrary, write_library
+    from .ir_converter import IRConverter
+    from .ir_packets import PACKET_FIELDS, PACKETS_KEY, PacketStore
+    from .metrics import (
+        CACHE_REQUESTS,
+        DATABASE_CODES,
+        DATABASE_SAVE_LATENCY,
+        DATABASE_SIZE_BYTES,
+        DATABASE_WRITE_BYTES,
+    )
+except ImportError:  # Execução direta (python ir_database.py)
+    from ir_binary import BinaryLibrary, write_library
+    from ir_converter import IRConverter
+    from ir_packets import PACKET_FIELDS, PACKETS_KEY, PacketStore
+    from metrics import (
+        CACHE_REQUESTS,
+        DATABASE_CODES,
+        DATABASE_SAVE_LATENCY,
+        DATABASE_SIZE_BYTES,
+        DATABASE_WRITE_BYTES,
+    )
+
+# Acertos do cache de códigos: contados sem lock (é o caminho de toda leitura)
+_LIBRARY_HITS = CACHE_REQUESTS.bind(cache="library", result="hit")
+
+# Formatos de armazenamento da base
+STORAGE_JSON = "json"
+STORAGE_BINARY = "binary"
+
+# Tamanho padrão dos lotes aplicados durante importações em streaming
+DEFAULT_BATCH_SIZE = 500
+
+# Callback de progresso: (códigos processados, bytes lidos, bytes totais)
+ProgressCallback = Callable[[int, int, int], None]
+
+# Callback de alteração: IDs adicionados, alterados ou removidos na transação
+ChangeListener = Callable[[Set[str]], None]
 
 
 @dataclass
@@ -35,37 +84,859 @@ class IRCode:
         return cls(**data)
 
 
-class IRDatabase:
+# Campos aceitos e obrigatórios em um registro do ir_codes.json
+_JSON_FIELDS = frozenset(IRCode.__dataclass_fields__) | {"packet"}
+_JSON_REQUIRED = ("name", "device", "command", "created_at")
+
+
+class LazyCodeStore(MutableMapping):
+    """
+    Mapa id -> IRCode que hidrata os registros sob demanda
+    Mantém em memória apenas o índice (id, dispositivo, comando) e os
+    códigos já acessados ou alterados. Os IRCode nunca são alterados no
+    lugar: cada alteração troca o objeto, e o valor anterior é entregue
+    aos snapshots abertos que ainda não o tinham (cópia na escrita).
+    """
+    
+    def __init__(self, index: Dict[str, Tuple[str, str]],
+                 loader: Callable[[str], IRCode]):
+        self._index = index
+        self._loaded: Dict[str, IRCode] = {}
+        self.loader = loader
+        
+        # Protege índice e hidratação; nunca é mantido durante gravações em disco
+        self.lock = threading.RLock()
+        self._snapshots: 'weakref.WeakSet[CodeSnapshot]' = weakref.WeakSet()
+    
+    def __getitem__(self, code_id: str) -> IRCode:
+        code = self._loaded.get(code_id)
+        if code is None:
+            with self.lock:
+                code = self._loaded.get(code_id)
+                if code is None:
+                    if code_id not in self._index:
+                        raise KeyError(code_id)
+                    CACHE_REQUESTS.inc(cache="library", result="miss")
+                    code = self._loaded[code_id] = self.loader(code_id)
+                    return code
+        _LIBRARY_HITS.inc()
+        return code
+    
+    def __setitem__(self, code_id: str, code: IRCode) -> None:
+        with self.lock:
+            self._preserve(code_id)
+            self._loaded[code_id] = code
+            self._index[code_id] = (code.device, code.command)
+    
+    def __delitem__(self, code_id: str) -> None:
+        with self.lock:
+            self._preserve(code_id)
+            del self._index[code_id]
+            self._loaded.pop(code_id, None)
+    
+    def _preserve(self, code_id: str) -> None:
+        """Entrega o valor atual aos snapshots antes de substituí-lo"""
+        if self._snapshots and code_id in self._index:
+            current = self[code_id]
+            for snapshot in list(self._snapshots):
+                snapshot._preserve(code_id, current)
+    
+    def snapshot(self) -> 'CodeSnapshot':
+        """Visão somente leitura do estado atual (cópia do índice)"""
+        with self.lock:
+            snapshot = CodeSnapshot(self)
+            self._snapshots.add(snapshot)
+            return snapshot
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __contains__(self, code_id: object) -> bool:
+        return code_id in self._index
+    
+    def loaded(self, code_id: str) -> Optional[IRCode]:
+        """Obtém código somente se já estiver hidratado"""
+        return self._loaded.get(code_id)
+    
+    def index_items(self) -> Iterator[Tuple[str, Tuple[str, str]]]:
+        """Percorre o índice sem hidratar. Gera: (id, (dispositivo, comando))"""
+        return iter(self._index.items())
+    
+    def index_entry(self, code_id: str) -> Optional[Tuple[str, str]]:
+        """(dispositivo, comando) do código sem hidratá-lo (None se não existir)"""
+        return self._index.get(code_id)
+    
+    def recent_ids(self, limit: int) -> List[str]:
+        """IDs dos últimos códigos inseridos, do mais recente ao mais antigo"""
+        recent = []
+        for code_id in reversed(self._index):
+            if len(recent) >= limit:
+                break
+            recent.append(code_id)
+        return recent
+
+
+class CodeSnapshot(Mapping):
+    """
+    Mapa somente leitura dos códigos em um instante
+    Copia apenas o índice e as referências já hidratadas; os demais
+    códigos são hidratados pelo store, que preserva aqui os valores
+    antigos antes de alterá-los.
+    """
+    
+    # Identidade (Mapping define __eq__), para o WeakSet do store
+    __hash__ = object.__hash__
+    
+    def __init__(self, store: LazyCodeStore):
+        self._store = store
+        self._index = dict(store._index)
+        self._codes = dict(store._loaded)
+    
+    def __getitem__(self, code_id: str) -> IRCode:
+        code = self._codes.get(code_id)
+        if code is None:
+            with self._store.lock:
+                code = self._codes.get(code_id)
+                if code is None:
+                    if code_id not in self._index:
+                        raise KeyError(code_id)
+                    code = self._codes[code_id] = self._store[code_id]
+        return code
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def __contains__(self, code_id: object) -> bool:
+        return code_id in self._index
+    
+    def _preserve(self, code_id: str, code: IRCode) -> None:
+        if code_id in self._index and code_id not in self._codes:
+            self._codes[code_id] = code
+    
+    def _revert(self, code_id: str, previous: Optional[IRCode]) -> None:
+        """Desfaz na visão uma alteração ainda não confirmada"""
+        if previous is None:
+            self._index.pop(code_id, None)
+            self._codes.pop(code_id, None)
+        else:
+            self._index[code_id] = (previous.device, previous.command)
+            self._codes[code_id] = previous
+    
+    def loaded(self, code_id: str) -> Optional[IRCode]:
+        return self._codes.get(code_id)
+    
+    def index_items(self) -> Iterator[Tuple[str, Tuple[str, str]]]:
+        return iter(self._index.items())
+    
+    def index_entry(self, code_id: str) -> Optional[Tuple[str, str]]:
+        return self._index.get(code_id)
+    
+    def recent_ids(self, limit: int) -> List[str]:
+        recent = []
+        for code_id in reversed(self._index):
+            if len(recent) >= limit:
+                break
+            recent.append(code_id)
+        return recent
+
+
+class CodeQueries:
+    """Consultas sobre self.codes, comuns à base e aos seus snapshots"""
+    
+    codes: Mapping
+    
+    def get_code(self, code_id: str) -> Optional[IRCode]:
+        """Obtém código por ID"""
+        return self.codes.get(code_id)
+    
+    def get_codes_by_device(self, device: str) -> List[IRCode]:
+        """Obtém todos os códigos de um dispositivo (hidrata apenas os do dispositivo)"""
+        return [
+            self.codes[code_id]
+            for code_id, (code_device, _) in self.codes.index_items()
+            if code_device == device
+        ]
+    
+    def get_all_codes(self) -> List[IRCode]:
+        """Obtém todos os códigos"""
+        return list(self.codes.values())
+    
+    def get_recent_codes(self, limit: int = 5) -> List[IRCode]:
+        """Obtém os últimos códigos adicionados, do mais recente ao mais antigo"""
+        return [self.codes[code_id] for code_id in self.codes.recent_ids(limit)]
+    
+    def get_devices(self) -> List[str]:
+        """Obtém lista de dispositivos únicos"""
+        devices = set(device for _, (device, _) in self.codes.index_items())
+        return sorted(list(devices))
+    
+    def search_codes(self, query: str) -> List[IRCode]:
+        """Busca códigos por nome, dispositivo ou comando"""
+        query = query.lower()
+        results = []
+        
+        for code in self.codes.values():
+            if (query in code.name.lower() or 
+                query in code.device.lower() or 
+                query in code.command.lower() or
+                query in code.notes.lower()):
+                results.append(code)
+        
+        return results
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Obtém estatísticas da base de dados"""
+        codes_by_device: Dict[str, int] = {}
+        for _, (device, _) in self.codes.index_items():
+            codes_by_device[device] = codes_by_device.get(device, 0) + 1
+        devices = sorted(codes_by_device)
+        
+        stats = {
+            "total_codes": len(self.codes),
+            "total_devices": len(devices),
+            "devices": devices,
+            "codes_by_device": {device: codes_by_device[device] for device in devices}
+        }
+        
+        return stats
+
+
+class DatabaseSnapshot(CodeQueries):
+    """Leitura consistente da base confirmada, sem bloquear escritas"""
+    
+    def __init__(self, codes: CodeSnapshot, version: int):
+        self.codes = codes
+        self.version = version
+
+
+class IRDatabase(CodeQueries):
     """Gerenciador de base de dados de códigos IR"""
     
-    def __init__(self, db_path: str = "ir_codes.json"):
+    def __init__(self, db_path: str = "ir_codes.json",
+                 storage_format: str = STORAGE_JSON, lazy: bool = False):
+        """
+        Inicializa a base de dados
+        Com lazy=True nenhum arquivo é lido aqui: o índice é carregado no
+        primeiro acesso (ou via ensure_loaded) e cada código é hidratado
+        somente quando usado.
+        """
         self.db_path = db_path
+        self.storage_format = storage_format
         self.converter = IRConverter()
-        self.codes: Dict[str, IRCode] = {}
-        self.load_database()
+        
+        # Pacotes compartilhados pelos códigos (convertidos uma vez por conteúdo)
+        self.packets = PacketStore(self.converter)
+        self._codes: Optional[LazyCodeStore] = None
+        self._load_lock = threading.RLock()
+        self._raw: Dict[str, Dict[str, Any]] = {}
+        # Registros do JSON que não formam um IRCode: fora da base, mas
+        # regravados como estão para que possam ser corrigidos à mão
+        self._quarantine: Dict[str, Dict[str, Any]] = {}
+        self._library: Optional[BinaryLibrary] = None
+        self._positions: Dict[str, int] = {}
+        # Começa no instante da criação (ms) para não se repetir entre reinícios:
+        # clientes guardam a biblioteca em cache associada à versão
+        self._version = int(time.time() * 1000)
+        
+        # mtime (ns) e tamanho do arquivo JSON na última leitura/gravação,
+        # para detectar alterações feitas por outros programas
+        self._signature: Optional[Tuple[int, int]] = None
+        
+        # Escritas: uma transação por vez entre threads; no event loop, o
+        # lock assíncrono enfileira os chamadores antes de ocuparem o executor
+        self._write_lock = threading.RLock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        
+        # Valor anterior de cada código alterado na transação aberta
+        # (None se o código não existia); usado no rollback e nos snapshots
+        self._journal: Optional[Dict[str, Optional[IRCode]]] = None
+        self._listeners: List[ChangeListener] = []
+        
+        # Uso de cada código (id -> [envios, timestamp do último envio]), em arquivo à parte
+        # para que um envio nunca regrave a base
+        self.usage_path = f"{os.path.splitext(db_path)[0]}.usage.json"
+        self._usage: Dict[str, List[Any]] = {}
+        self._usage_lock = threading.Lock()
+        self._usage_loaded = False
+        self._usage_dirty = False
+        if not lazy:
+            self.ensure_loaded()
+    
+    @property
+    def codes(self) -> LazyCodeStore:
+        """Códigos da base, carregando o índice no primeiro acesso"""
+        if self._codes is None:
+            self.ensure_loaded()
+        return self._codes
+    
+    @property
+    def loaded(self) -> bool:
+        """Indica se o índice da base já foi carregado"""
+        return self._codes is not None
+    
+    @property
+    def version(self) -> int:
+        """Contador incrementado a cada carga ou alteração da base (único entre reinícios)"""
+        return self._version
+    
+    @property
+    def async_lock(self) -> asyncio.Lock:
+        """Lock para chamadores assíncronos que executam transações no executor"""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        return self._async_lock
+    
+    @contextmanager
+    def transaction(self) -> Iterator['IRDatabase']:
+        """
+        Agrupa alterações em uma única gravação atômica da base
+        Reentrante: transações aninhadas fazem parte da mais externa. Uma
+        exceção (inclusive na gravação) desfaz todas as alterações da
+        transação em memória e é propagada ao chamador.
+        """
+        # Carrega antes do lock de escrita (a migração do binário grava a base)
+        self.ensure_loaded()
+        with self._write_lock:
+            if self._journal is not None:
+                yield self
+                return
+            
+            self._journal = {}
+            try:
+                yield self
+                # Alterações externas desde a última leitura entram antes de
+                # gravar (em conflito, vale a alteração desta transação)
+                if self._journal and self.changed_externally:
+                    self._merge_external(set(self._journal))
+            except BaseException:
+                self._rollback()
+                raise
+            
+            with self.codes.lock:
+                journal, self._journal = self._journal, None
+            if journal:
+                try:
+                    self.save_database()
+                except BaseException:
+                    # Nada foi gravado: desfaz também em memória
+                    self._journal = journal
+                    self._rollback()
+                    raise
+        
+        # Fora do lock de escrita: os listeners podem consultar a base
+        if journal:
+            self._notify(set(journal))
+    
+    def add_listener(self, listener: ChangeListener) -> Callable[[], None]:
+        """
+        Registra callback chamado após cada transação confirmada
+        O callback recebe os IDs alterados e roda na thread que gravou.
+        Retorna: função que remove o callback
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+    
+    def _notify(self, code_ids: Set[str]) -> None:
+        """Avisa os listeners sobre códigos alterados"""
+        for listener in list(self._listeners):
+            try:
+                listener(code_ids)
+            except Exception as e:
+                print(f"Erro no listener de alterações: {e}")
+    
+    def _rollback(self) -> None:
+        """Restaura os valores anteriores registrados na transação"""
+        with self.codes.lock:
+            journal, self._journal = self._journal, None
+            for code_id, previous in reversed(list(journal.items())):
+                if previous is None:
+                    self.codes.pop(code_id, None)
+                else:
+                    self.codes[code_id] = previous
+    
+    def snapshot(self) -> DatabaseSnapshot:
+        """
+        Visão consistente da base confirmada
+        Não espera transações em andamento: as alterações ainda não
+        confirmadas são desfeitas na cópia do índice.
+        """
+        store = self.codes
+        with store.lock:
+            codes = store.snapshot()
+            for code_id, previous in (self._journal or {}).items():
+                codes._revert(code_id, previous)
+            return DatabaseSnapshot(codes, self._version)
+    
+    @property
+    def changed_externally(self) -> bool:
+        """Indica se o arquivo JSON da base foi alterado por outro programa"""
+        return (self.storage_format == STORAGE_JSON and self._codes is not None
+                and self._file_signature() != self._signature)
+    
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """mtime (ns) e tamanho do arquivo da base (None se não existir)"""
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def reload_changes(self) -> Set[str]:
+        """
+        Aplica as alterações feitas no arquivo por outros programas
+        O arquivo é comparado registro a registro com a base em memória e
+        só os códigos adicionados, alterados ou removidos são aplicados,
+        sem regravar o arquivo. Os listeners recebem os IDs alterados.
+        Retorna: IDs alterados
+        """
+        if not self.changed_externally:
+            return set()
+        
+        with self._write_lock:
+            if self._journal is not None:
+                raise RuntimeError("reload_changes dentro de transação")
+            
+            self._journal = {}
+            try:
+                self._merge_external()
+            except BaseException:
+                self._rollback()
+                raise
+            
+            with self.codes.lock:
+                journal, self._journal = self._journal, None
+            if journal:
+                self._version += 1
+        
+        if journal:
+            self._notify(set(journal))
+        return set(journal)
+    
+    def _merge_external(self, keep: Set[str] = frozenset()) -> None:
+        """Aplica na transação aberta a diferença entre o arquivo e a base (exceto keep)"""
+        signature = self._file_signature()
+        if signature is None:
+            # Arquivo removido ou sendo substituído: mantém a base como está
+            return
+        
+        try:
+            with open(self.db_path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            self.packets.load(records.pop(PACKETS_KEY, {}))
+        except Exception as e:
+            print(f"Erro ao ler alterações externas da base: {e}")
+            return
+        
+        for code_id in [code_id for code_id in self.codes if code_id not in records]:
+            if code_id not in keep:
+                self._remove(code_id)
+        
+        for code_id, data in records.items():
+            # Registros ainda não hidratados são comparados sem conversão
+            if (code_id in keep or self._raw.get(code_id) == data
+                    or self._quarantine.get(code_id) == data):
+                continue
+            
+            # Base64 editado à mão: o Pronto vem da tabela ou é reconvertido
+            try:
+                if not self._valid_json_record(data):
+                    raise ValueError("campos inválidos")
+                code = self._code_from_json(code_id, data, convert=True)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                print(f"Registro inválido na base ({code_id}): {e}")
+                self._quarantine[code_id] = data
+                continue
+            
+            self._quarantine.pop(code_id, None)
+            if code != self.codes.get(code_id):
+                self._put(code)
+        
+        for code_id in [code_id for code_id in self._quarantine if code_id not in records]:
+            del self._quarantine[code_id]
+        self._signature = signature
+    
+    def _put(self, code: IRCode) -> None:
+        """Grava código na transação aberta, apontando para o pacote compartilhado"""
+        code = self._share_packet(code)
+        with self.codes.lock:
+            self._record(code.id)
+            self.codes[code.id] = code
+    
+    def _share_packet(self, code: IRCode) -> IRCode:
+        """Troca Base64/Pronto/frequência pelos objetos da tabela de pacotes"""
+        try:
+            entry = self.packets.intern(code.base64_code, code.pronto_code, code.frequency)
+        except ValueError:
+            # Base64 inválido: guardado como veio, fora da tabela
+            return code
+        if code.base64_code is entry.base64_code and code.pronto_code is entry.pronto_code:
+            return code
+        return dataclasses.replace(code, base64_code=entry.base64_code,
+                                   pronto_code=entry.pronto_code, frequency=entry.frequency)
+    
+    def _remove(self, code_id: str) -> None:
+        """Remove código na transação aberta"""
+        with self.codes.lock:
+            self._record(code_id)
+            del self.codes[code_id]
+            self._raw.pop(code_id, None)
+    
+    def _record(self, code_id: str) -> None:
+        """Registra o valor anterior do código no journal da transação"""
+        if self._journal is None:
+            raise RuntimeError("Alteração da base fora de transação")
+        if code_id not in self._journal:
+            self._journal[code_id] = self.codes[code_id] if code_id in self.codes else None
+    
+    def record_use(self, code_id: str) -> None:
+        """Conta um envio do código (só em memória; gravado por save_usage)"""
+        with self._usage_lock:
+            entry = self._usage.setdefault(code_id, [0, None])
+            entry[0] += 1
+            entry[1] = time.time()
+            self._usage_dirty = True
+    
+    def get_usage(self, code_id: str) -> Tuple[int, Optional[float]]:
+        """Envios e último envio (timestamp Unix) do código"""
+        count, last_used = self._usage.get(code_id, (0, None))
+        return count, last_used
+    
+    def hot_code_ids(self, limit: int) -> List[str]:
+        """IDs dos códigos mais enviados (desempate pelo envio mais recente)"""
+        with self._usage_lock:
+            items = list(self._usage.items())
+        hottest = heapq.nlargest(
+            limit, (item for item in items if item[0] in self.codes),
+            key=lambda item: (item[1][0], item[1][1] or 0),
+        )
+        return [code_id for code_id, _ in hottest]
+    
+    def load_usage(self) -> None:
+        """Lê o uso gravado, somando-o aos envios já contados nesta execução"""
+        stored: Dict[str, List[Any]] = {}
+        if os.path.exists(self.usage_path):
+            try:
+                with open(self.usage_path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+            except Exception as e:
+                print(f"Erro ao carregar uso dos códigos: {e}")
+        
+        with self._usage_lock:
+            if self._usage_loaded:
+                return
+            for code_id, (count, last_used) in stored.items():
+                entry = self._usage.setdefault(code_id, [0, None])
+                entry[0] += count
+                entry[1] = max(entry[1] or 0, last_used or 0) or None
+            self._usage_loaded = True
+    
+    def save_usage(self) -> None:
+        """Grava o uso dos códigos, se mudou (descarta códigos removidos)"""
+        if not self._usage_loaded:
+            self.load_usage()
+        
+        with self._usage_lock:
+            if not self._usage_dirty:
+                return
+            usage = {
+                code_id: list(entry) for code_id, entry in self._usage.items()
+                if code_id in self.codes
+            }
+            self._usage_dirty = False
+        
+        tmp_path = f"{self.usage_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(usage, f, ensure_ascii=False)
+            os.replace(tmp_path, self.usage_path)
+        except Exception as e:
+            print(f"Erro ao salvar uso dos códigos: {e}")
+            self._usage_dirty = True
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def ensure_loaded(self):
+        """Carrega o índice da base, se ainda não estiver carregado"""
+        with self._load_lock:
+            if self._codes is None:
+                self.load_database()
+                self._version += 1
     
     def load_database(self):
-        """Carrega base de dados do arquivo"""
+        """Carrega o índice da base de dados do arquivo"""
+        if self.storage_format == STORAGE_BINARY:
+            self._load_binary()
+            return
+        
+        self._raw = {}
+        self._quarantine = {}
+        self._signature = self._file_signature()
         if os.path.exists(self.db_path):
             try:
                 with open(self.db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for code_id, code_data in data.items():
-                        self.codes[code_id] = IRCode.from_dict(code_data)
+                    self._raw = json.load(f)
+                self.packets.load(self._raw.pop(PACKETS_KEY, {}))
             except Exception as e:
                 print(f"Erro ao carregar base de dados: {e}")
-                self.codes = {}
+                self._raw = {}
+        
+        # Registros malformados ficam de fora do índice (avisados uma vez)
+        for code_id, data in list(self._raw.items()):
+            if not self._valid_json_record(data):
+                self._quarantine[code_id] = self._raw.pop(code_id)
+        if self._quarantine:
+            invalid = list(self._quarantine)
+            print(f"{len(invalid)} registros inválidos ignorados na base "
+                  f"(mantidos no arquivo): {', '.join(invalid[:10])}")
+        
+        index = {
+            code_id: (data.get("device", ""), data.get("command", ""))
+            for code_id, data in self._raw.items()
+        }
+        self._codes = LazyCodeStore(index, self._load_json_code)
+    
+    def _load_json_code(self, code_id: str) -> IRCode:
+        """Hidrata código a partir do registro JSON carregado"""
+        code = self._code_from_json(code_id, self._raw[code_id])
+        # Só descarta o registro depois de criar o código: se falhar, a
+        # gravação continua encontrando o registro original
+        del self._raw[code_id]
+        return code
+    
+    def _valid_json_record(self, data: Any) -> bool:
+        """Verifica, sem converter o pacote, se o registro JSON forma um IRCode"""
+        if not isinstance(data, dict) or not data.keys() <= _JSON_FIELDS:
+            return False
+        if any(not isinstance(data.get(name), str) for name in _JSON_REQUIRED):
+            return False
+        if "packet" in data:
+            return data["packet"] in self.packets
+        return isinstance(data.get("base64_code"), str)
+    
+    def _code_from_json(self, code_id: str, data: Dict[str, Any],
+                        convert: bool = False) -> IRCode:
+        """
+        Cria IRCode a partir de registro JSON
+        O registro aponta para a tabela de pacotes ("packet") ou traz o
+        Base64 inline (formato anterior ou edição manual); com convert=True
+        o Pronto dos registros inline é recalculado em vez de lido.
+        """
+        fields = {
+            name: value for name, value in data.items()
+            if name not in PACKET_FIELDS and name != "packet"
+        }
+        if "packet" in data:
+            entry = self.packets[data["packet"]]
+        elif convert:
+            entry = self.packets.intern(data["base64_code"])
         else:
-            self.codes = {}
+            try:
+                entry = self.packets.intern(data["base64_code"], data.get("pronto_code"),
+                                            data.get("frequency"))
+            except ValueError:
+                # Base64 inválido: guardado como veio, fora da tabela
+                return IRCode.from_dict({
+                    **fields,
+                    "id": code_id,
+                    "base64_code": data["base64_code"],
+                    "pronto_code": data.get("pronto_code", ""),
+                    "frequency": data.get("frequency", 0),
+                })
+        return IRCode.from_dict({
+            **fields,
+            "id": code_id,
+            "base64_code": entry.base64_code,
+            "pronto_code": entry.pronto_code,
+            "frequency": entry.frequency,
+        })
     
-    def save_database(self):
-        """Salva base de dados no arquivo"""
+    def _json_record(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Registro para gravação, com o pacote trocado pela chave na tabela"""
+        if "packet" in data:
+            return data
         try:
-            data = {code_id: code.to_dict() for code_id, code in self.codes.items()}
-            with open(self.db_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            entry = self.packets.intern(data["base64_code"], data.get("pronto_code"),
+                                        data.get("frequency"))
+        except (KeyError, ValueError):
+            return data
+        record = {name: value for name, value in data.items() if name not in PACKET_FIELDS}
+        record["packet"] = entry.key
+        return record
+    
+    def _load_binary(self):
+        """Abre a biblioteca binária, migrando o JSON legado se necessário"""
+        if not os.path.exists(self.db_path):
+            legacy_path = f"{os.path.splitext(self.db_path)[0]}.json"
+            if os.path.exists(legacy_path):
+                legacy = IRDatabase(legacy_path)
+                self._codes = LazyCodeStore({}, legacy.codes.__getitem__)
+                self._codes.update(legacy.codes)
+                try:
+                    self.save_database()
+                except Exception as e:
+                    # Os códigos seguem em memória; a migração é refeita na próxima gravação
+                    print(f"Erro ao migrar base de dados: {e}")
+            else:
+                self._codes = LazyCodeStore({}, self._missing_code)
+            return
+        
+        try:
+            self._open_library()
         except Exception as e:
-            print(f"Erro ao salvar base de dados: {e}")
+            print(f"Erro ao carregar base de dados: {e}")
+            self._codes = LazyCodeStore({}, self._missing_code)
+    
+    @staticmethod
+    def _missing_code(code_id: str) -> IRCode:
+        raise KeyError(code_id)
+    
+    def _open_library(self):
+        """Mapeia o arquivo binário e carrega apenas o índice dos códigos"""
+        library = BinaryLibrary(self.db_path)
+        positions: Dict[str, int] = {}
+        index: Dict[str, Tuple[str, str]] = {}
+        
+        for position, code_id, device, command in library.index():
+            positions[code_id] = position
+            index[code_id] = (device, command)
+        
+        def load(code_id: str) -> IRCode:
+            return self._code_from_record(library.read_record(positions[code_id]))
+        
+        if self._codes is not None:
+            # Após regravar o arquivo, preserva os códigos já hidratados
+            self._codes.loader = load
+        else:
+            self._codes = LazyCodeStore(index, load)
+        
+        previous, self._library, self._positions = self._library, library, positions
+        if previous is not None:
+            previous.close()
+    
+    def _code_from_record(self, record: Dict[str, Any]) -> IRCode:
+        """Cria IRCode a partir de registro binário (Pronto calculado uma vez por pacote)"""
+        base64_code = base64.b64encode(record.pop("packet")).decode('ascii')
+        try:
+            entry = self.packets.intern(base64_code, frequency=record["frequency"])
+        except ValueError:
+            return IRCode(base64_code=base64_code, pronto_code="", **record)
+        record["frequency"] = entry.frequency
+        return IRCode(base64_code=entry.base64_code, pronto_code=entry.pronto_code, **record)
+    
+    def _binary_records(self, used: Dict[str, None]) -> Iterator[Dict[str, Any]]:
+        """
+        Gera registros para gravação, copiando pacotes não hidratados sem conversão
+        As chaves da tabela de pacotes usadas pelos códigos hidratados são
+        acumuladas em used.
+        """
+        for code_id in self.codes:
+            code = self.codes.loaded(code_id)
+            if code is None and code_id in self._positions:
+                yield self._library.read_record(self._positions[code_id])
+                continue
+            
+            code = code or self.codes[code_id]
+            packet = self.converter.base64_to_bytes(code.base64_code)
+            used[self.packets.intern(code.base64_code).key] = None
+            yield {
+                "id": code.id,
+                "name": code.name,
+                "device": code.device,
+                "command": code.command,
+                "created_at": code.created_at,
+                "notes": code.notes,
+                "frequency": code.frequency,
+                "packet": packet,
+            }
+    
+    def save_database(self):
+        """
+        Salva base de dados no arquivo, registrando tempo e bytes gravados
+        Erros de gravação são propagados (a transação desfaz as alterações).
+        """
+        with self._write_lock:
+            # Toda alteração passa por aqui: invalida os caches dos consumidores
+            self._version += 1
+            start = time.perf_counter()
+            self._write_database()
+            DATABASE_SAVE_LATENCY.observe(time.perf_counter() - start)
+            DATABASE_CODES.set(len(self.codes))
+            
+            if os.path.exists(self.db_path):
+                size = os.path.getsize(self.db_path)
+                DATABASE_SIZE_BYTES.set(size)
+                DATABASE_WRITE_BYTES.inc(size)
+    
+    def _write_database(self):
+        """
+        Grava a base de dados no arquivo
+        Os códigos são serializados um a um em arquivo temporário, que
+        substitui o original atomicamente ao final (após fsync). Em caso de
+        erro o temporário é removido, o original fica intacto e a exceção
+        é propagada.
+        """
+        tmp_path = f"{self.db_path}.tmp"
+        used: Dict[str, None] = {}
+        if self.storage_format == STORAGE_BINARY:
+            try:
+                write_library(self.db_path, self._binary_records(used))
+            except BaseException:
+                _remove_tmp(tmp_path)
+                raise
+            self._open_library()
+            self.packets.retain(used)
+            return
+        
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("{")
+                written = 0
+                for code_id, data in self._json_items():
+                    if data.get("packet") in self.packets:
+                        used[data["packet"]] = None
+                    entry = json.dumps(data, indent=2, ensure_ascii=False)
+                    f.write("," if written else "")
+                    f.write(f"\n  {json.dumps(code_id, ensure_ascii=False)}: ")
+                    f.write(entry.replace("\n", "\n  "))
+                    written += 1
+                
+                # Tabela de pacotes: cada pacote uma vez, referenciado pelos códigos
+                if used:
+                    table = {key: self.packets[key].to_dict() for key in used}
+                    f.write(f",\n  {json.dumps(PACKETS_KEY)}: ")
+                    f.write(json.dumps(table, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+                f.write("\n}" if written else "}")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.db_path)
+            self._signature = self._file_signature()
+        except BaseException:
+            _remove_tmp(tmp_path)
+            raise
+        self.packets.retain(used)
+    
+    def _json_items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Gera (id, registro) para gravação: os códigos e os registros inválidos"""
+        for code_id in self.codes:
+            # Registros ainda não hidratados são gravados como foram lidos
+            # (o lock evita que uma leitura os hidrate no meio do caminho)
+            with self.codes.lock:
+                code = self.codes.loaded(code_id)
+                if code:
+                    data = self._json_record(code.to_dict())
+                else:
+                    data = self._raw[code_id] = self._json_record(self._raw[code_id])
+            yield code_id, data
+        
+        for code_id, data in list(self._quarantine.items()):
+            if code_id not in self.codes:
+                yield code_id, data
     
     def add_code(self, name: str, device: str, command: str, 
                  base64_code: str, notes: str = "") -> str:
@@ -74,123 +945,204 @@ class IRDatabase:
         Retorna: ID do código adicionado
         """
         try:
-            # Converte para Pronto Hex
-            pronto_code = self.converter.broadlink_to_pronto(base64_code)
-            frequency = self.converter.get_frequency_from_pronto(pronto_code)
-            
-            # Gera ID único
-            code_id = self.generate_id(device, command)
-            
-            # Cria objeto IRCode
-            ir_code = IRCode(
-                id=code_id,
-                name=name,
-                device=device,
-                command=command,
-                base64_code=base64_code,
-                pronto_code=pronto_code,
-                frequency=frequency,
-                created_at=datetime.datetime.now().isoformat(),
-                notes=notes
-            )
+            # Converte para Pronto Hex (só se o pacote ainda não estiver na base)
+            packet = self.packets.intern(base64_code)
             
-            # Adiciona à base de dados
-            self.codes[code_id] = ir_code
-            self.save_database()
+            with self.transaction():
+                # Gera ID único (dentro da transação, sem corrida entre chamadas)
+                code_id = self.generate_id(device, command)
+                
+                # Cria objeto IRCode
+                ir_code = IRCode(
+                    id=code_id,
+                    name=name,
+                    device=device,
+                    command=command,
+                    base64_code=packet.base64_code,
+                    pronto_code=packet.pronto_code,
+                    frequency=packet.frequency,
+                    created_at=datetime.datetime.now().isoformat(),
+                    notes=notes
+                )
+                
+                # Adiciona à base de dados
+                self._put(ir_code)
             
             return code_id
-            
+        
         except Exception as e:
             raise ValueError(f"Erro ao adicionar código: {e}")
     
-    def get_code(self, code_id: str) -> Optional[IRCode]:
-        """Obtém código por ID"""
-        return self.codes.get(code_id)
-    
-    def get_codes_by_device(self, device: str) -> List[IRCode]:
-        """Obtém todos os códigos de um dispositivo"""
-        return [code for code in self.codes.values() if code.device == device]
-    
-    def get_all_codes(self) -> List[IRCode]:
-        """Obtém todos os códigos"""
-        return list(self.codes.values())
-    
-    def get_devices(self) -> List[str]:
-        """Obtém lista de dispositivos únicos"""
-        devices = set(code.device for code in self.codes.values())
-        return sorted(list(devices))
-    
     def delete_code(self, code_id: str) -> bool:
         """Remove código da base de dados"""
-        if code_id in self.codes:
-            del self.codes[code_id]
-            self.save_database()
-            return True
+        with self.transaction():
+            if code_id in self.codes:
+                self._remove(code_id)
+                return True
         return False
     
     def update_code(self, code_id: str, **kwargs) -> bool:
         """Atualiza código existente"""
-        if code_id in self.codes:
-            code = self.codes[code_id]
+        with self.transaction():
+            if code_id not in self.codes:
+                return False
             
-            # Atualiza campos permitidos
-            for field, value in kwargs.items():
-                if hasattr(code, field):
-                    setattr(code, field, value)
+            # Atualiza campos permitidos em uma cópia (snapshots mantêm a anterior)
+            changes = {
+                field: value for field, value in kwargs.items()
+                if field in IRCode.__dataclass_fields__ and field != "id"
+            }
+            code = dataclasses.replace(self.codes[code_id], **changes)
             
             # Se o base64_code foi alterado, reconverte
             if 'base64_code' in kwargs:
                 try:
-                    code.pronto_code = self.converter.broadlink_to_pronto(code.base64_code)
-                    code.frequency = self.converter.get_frequency_from_pronto(code.pronto_code)
+                    packet = self.packets.intern(code.base64_code)
+                    code.pronto_code = packet.pronto_code
+                    code.frequency = packet.frequency
                 except Exception as e:
                     print(f"Erro na reconversão: {e}")
                     return False
             
-            self.save_database()
+            self._put(code)
             return True
-        return False
     
-    def generate_id(self, device: str, command: str) -> str:
-        """Gera ID único para o código"""
+    def add_codes(self, entries: List[Dict[str, Any]],
+                  workers: Optional[int] = 1) -> Dict[str, Any]:
+        """
+        Adiciona vários códigos em uma única gravação
+        Todo o lote é validado e convertido antes de alterar a base; se algum
+        registro for inválido, nenhum código é adicionado.
+        Retorna: {"code_ids": [...], "error_count": N, "errors": [...]}
+        """
+        ImportReport, validate_records = _import_pipeline()
+        report = ImportReport()
+        valid: List[Dict[str, Any]] = []
+        
+        records = ((index, {**entry, "id": None}) for index, entry in enumerate(entries))
+        for ref, data, error in validate_records(records, workers):
+            if error:
+                report.add_error(ref, error)
+            else:
+                valid.append(data)
+        
+        code_ids: List[str] = []
+        if not report.error_count:
+            with self.transaction():
+                batch: Dict[str, IRCode] = {}
+                for data in valid:
+                    data["id"] = self.generate_id(data["device"], data["command"], batch)
+                    batch[data["id"]] = IRCode.from_dict(data)
+                for code in batch.values():
+                    self._put(code)
+                code_ids = list(batch)
+        
+        return {"code_ids": code_ids, "error_count": report.error_count, "errors": report.errors}
+    
+    def delete_codes(self, code_ids: Optional[List[str]] = None,
+                     device: Optional[str] = None,
+                     query: Optional[str] = None) -> List[str]:
+        """
+        Remove vários códigos em uma única gravação
+        Seleciona pelos IDs informados ou, sem IDs, pelos códigos do dispositivo
+        e/ou que correspondem à busca (os dois critérios juntos se combinam).
+        Retorna: IDs removidos
+        """
+        with self.transaction():
+            if code_ids is not None:
+                selected = [code_id for code_id in dict.fromkeys(code_ids) if code_id in self.codes]
+            elif query is not None:
+                selected = [
+                    code.id for code in self.search_codes(query)
+                    if device is None or code.device == device
+                ]
+            elif device is not None:
+                selected = [
+                    code_id for code_id, (code_device, _) in self.codes.index_items()
+                    if code_device == device
+                ]
+            else:
+                selected = []
+            
+            for code_id in selected:
+                self._remove(code_id)
+        
+        return selected
+    
+    def update_codes(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Atualiza vários códigos em uma única gravação
+        Cada item tem "id" e os campos a alterar. Novos base64_code são
+        convertidos antes de alterar a base; se algum item for inválido
+        (ID inexistente ou código que não converte), nada é alterado.
+        Retorna: {"code_ids": [...], "error_count": N, "errors": [...]}
+        """
+        ImportReport, _ = _import_pipeline()
+        report = ImportReport()
+        changes: Dict[str, Dict[str, Any]] = {}
+        
+        for index, update in enumerate(updates):
+            fields = {
+                field: value for field, value in update.items()
+                if field in IRCode.__dataclass_fields__ and field != "id"
+            }
+            if "base64_code" in fields:
+                try:
+                    packet = self.packets.intern(fields["base64_code"])
+                    fields["pronto_code"] = packet.pronto_code
+                    fields["frequency"] = packet.frequency
+                except Exception as e:
+                    report.add_error(index, f"Código Broadlink inválido: {e}")
+                    continue
+            changes.setdefault(update.get("id"), {}).update(fields)
+        
+        with self.transaction():
+            for index, update in enumerate(updates):
+                if update.get("id") not in self.codes:
+                    report.add_error(index, f"Código não encontrado: {update.get('id')}")
+            
+            if report.error_count:
+                return {"code_ids": [], "error_count": report.error_count, "errors": report.errors}
+            
+            for code_id, fields in changes.items():
+                self._put(dataclasses.replace(self.codes[code_id], **fields))
+        
+        return {"code_ids": list(changes), "error_count": 0, "errors": []}
+    
+    def generate_id(self, device: str, command: str,
+                    reserved: Optional[Dict[str, Any]] = None) -> str:
+        """Gera ID único para o código (também fora de reserved, se informado)"""
         base_id = f"{device}_{command}".lower().replace(" ", "_")
         
         # Remove caracteres especiais
         import re
         base_id = re.sub(r'[^a-z0-9_]', '', base_id)
         
+        reserved = reserved or {}
+        
+        def taken(code_id: str) -> bool:
+            # IDs de registros inválidos continuam ocupados no arquivo
+            return code_id in self.codes or code_id in reserved or code_id in self._quarantine
+        
         # Verifica se já existe
-        if base_id not in self.codes:
+        if not taken(base_id):
             return base_id
         
         # Adiciona sufixo numérico se necessário
         counter = 1
-        while f"{base_id}_{counter}" in self.codes:
+        while taken(f"{base_id}_{counter}"):
             counter += 1
         
         return f"{base_id}_{counter}"
     
-    def search_codes(self, query: str) -> List[IRCode]:
-        """Busca códigos por nome, dispositivo ou comando"""
-        query = query.lower()
-        results = []
-        
-        for code in self.codes.values():
-            if (query in code.name.lower() or 
-                query in code.device.lower() or 
-                query in code.command.lower() or
-                query in code.notes.lower()):
-                results.append(code)
-        
-        return results
-    
     def export_to_json(self, file_path: str) -> bool:
         """Exporta base de dados para arquivo JSON"""
         try:
+            codes = self.snapshot().codes
             data = {
                 "export_date": datetime.datetime.now().isoformat(),
-                "total_codes": len(self.codes),
-                "codes": {code_id: code.to_dict() for code_id, code in self.codes.items()}
+                "total_codes": len(codes),
+                "codes": {code_id: code.to_dict() for code_id, code in codes.items()}
             }
             
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -201,17 +1153,27 @@ class IRDatabase:
             print(f"Erro na exportação: {e}")
             return False
     
-    def import_from_json(self, file_path: str) -> bool:
-        """Importa códigos de arquivo JSON"""
+    def import_from_json(self, file_path: str, workers: Optional[int] = None) -> bool:
+        """Importa códigos de arquivo JSON, validando cada registro"""
+        ImportReport, validate_records = _import_pipeline()
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
             if 'codes' in data:
-                for code_id, code_data in data['codes'].items():
-                    self.codes[code_id] = IRCode.from_dict(code_data)
+                records = (
+                    (code_id, {**code_data, "id": code_id})
+                    for code_id, code_data in data['codes'].items()
+                )
+                report = ImportReport()
+                with self.transaction():
+                    batch = self._collect_valid(validate_records(records, workers), report)
+                    for code in batch.values():
+                        self._put(code)
+                
+                for error in report.errors:
+                    print(f"Código {error['record']} ignorado: {error['error']}")
                 
-                self.save_database()
                 return True
             
             return False
@@ -219,21 +1181,284 @@ class IRDatabase:
             print(f"Erro na importação: {e}")
             return False
     
-    def get_statistics(self) -> Dict[str, Any]:
-        """Obtém estatísticas da base de dados"""
-        devices = self.get_devices()
+    def export_to_ndjson(self, file_path: str, device: Optional[str] = None,
+                         progress_callback: Optional[ProgressCallback] = None) -> int:
+        """
+        Exporta códigos em NDJSON (um código por linha)
+        Arquivos terminados em .gz são comprimidos com gzip. Lê de um
+        snapshot, sem bloquear alterações durante a exportação.
+        Retorna: número de códigos exportados
+        """
+        snapshot = self.snapshot()
+        codes = snapshot.get_codes_by_device(device) if device else snapshot.codes.values()
+        total = len(codes)
+        count = 0
         
-        stats = {
-            "total_codes": len(self.codes),
-            "total_devices": len(devices),
-            "devices": devices,
-            "codes_by_device": {
-                device: len(self.get_codes_by_device(device)) 
-                for device in devices
-            }
-        }
+        with _open_ndjson(file_path, 'w') as f:
+            f.write(json.dumps({"_meta": {
+                "export_date": datetime.datetime.now().isoformat(),
+                "total_codes": total,
+            }}) + "\n")
+            
+            for code in codes:
+                f.write(json.dumps(code.to_dict(), ensure_ascii=False,
+                                   separators=(",", ":")) + "\n")
+                count += 1
+                if progress_callback and count % DEFAULT_BATCH_SIZE == 0:
+                    progress_callback(count, count, total)
         
-        return stats
+        if progress_callback:
+            progress_callback(count, count, total)
+        
+        return count
+    
+    def export_to_format(self, file_path: str, format_name: str,
+                         device: Optional[str] = None,
+                         progress_callback: Optional[ProgressCallback] = None) -> int:
+        """
+        Exporta códigos em um formato do registro de ir_formats (LIRC,
+        Flipper, Tuya, SmartIR...), escrevendo um código por vez
+        Arquivos terminados em .gz são comprimidos com gzip. Lê de um
+        snapshot, sem bloquear alterações durante a exportação.
+        Retorna: número de códigos exportados
+        """
+        get_format, CodeEntry = _formats()
+        fmt = get_format(format_name)
+        codes = self.snapshot().codes
+        
+        # Uma passada no índice; os códigos são hidratados durante a escrita
+        ids_by_device: Dict[str, List[str]] = {}
+        for code_id, (code_device, _) in codes.index_items():
+            if device is None or code_device == device:
+                ids_by_device.setdefault(code_device, []).append(code_id)
+        if fmt.single_device and len(ids_by_device) > 1:
+            raise ValueError(f"O formato {format_name} exporta um dispositivo por vez")
+        
+        total = sum(len(ids) for ids in ids_by_device.values())
+        converter = IRConverter()
+        count = 0
+        
+        def entries(code_ids: List[str]) -> Iterator[Any]:
+            nonlocal count
+            for code_id in code_ids:
+                code = codes[code_id]
+                try:
+                    data = converter.base64_to_bytes(code.base64_code)
+                    timings, frequency = converter.parse_broadlink_data(data)
+                except ValueError as e:
+                    print(f"Código {code.id} ignorado na exportação: {e}")
+                    continue
+                yield CodeEntry(code.command, timings, frequency, code.base64_code)
+                count += 1
+                if progress_callback and count % DEFAULT_BATCH_SIZE == 0:
+                    progress_callback(count, count, total)
+        
+        with _open_ndjson(file_path, 'w') as f:
+            groups = ((name, entries(ids_by_device[name])) for name in sorted(ids_by_device))
+            for chunk in fmt.dump(groups):
+                f.write(chunk)
+        
+        if progress_callback:
+            progress_callback(count, count, total)
+        
+        return count
+    
+    def import_from_format(self, file_path: str, format_name: str,
+                           device: Optional[str] = None,
+                           workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Importa arquivo em um formato do registro de ir_formats
+        Os timings lidos são reempacotados em Broadlink e passam pela mesma
+        validação da importação NDJSON.
+        Retorna: relatório da importação (ImportReport.to_dict)
+        """
+        get_format, _ = _formats()
+        fmt = get_format(format_name)
+        ImportReport, validate_records = _import_pipeline()
+        report = ImportReport()
+        converter = IRConverter()
+        
+        with _open_ndjson(file_path, 'r') as f:
+            text = f.read()
+        if device is None and fmt.device_from_filename:
+            device = os.path.basename(file_path).split(".")[0]
+        
+        def records():
+            for ref, data, error in fmt.load(text, device):
+                if error:
+                    report.add_error(ref, error)
+                    continue
+                packet = converter.encode_broadlink_data(data["timings"])
+                yield ref, {
+                    "name": data["command"],
+                    "device": data["device"],
+                    "command": data["command"],
+                    "base64_code": base64.b64encode(packet).decode('ascii'),
+                }
+        
+        results = iter(validate_records(records(), workers))
+        with self.transaction():
+            while True:
+                batch = self._collect_valid(results, report, DEFAULT_BATCH_SIZE)
+                if not batch:
+                    break
+                for code in batch.values():
+                    self._put(code)
+        
+        return report.to_dict()
+    
+    def import_from_ndjson(self, file_path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                           progress_callback: Optional[ProgressCallback] = None,
+                           workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Importa códigos de arquivo NDJSON (opcionalmente .gz) em streaming
+        Cada registro é validado e reconvertido (em um pool de processos,
+        se workers > 1) e os códigos válidos são aplicados em lotes de
+        batch_size. Os lotes são gravados juntos a cada vez que a base
+        dobra de tamanho, então uma importação grande regrava a base poucas
+        vezes; uma falha desfaz apenas os lotes ainda não gravados.
+        Retorna: relatório da importação (ImportReport.to_dict); imported
+        conta apenas os códigos gravados e, se um lote falhar, aborted
+        traz o erro que interrompeu a importação
+        """
+        ImportReport, validate_records = _import_pipeline()
+        report = ImportReport()
+        
+        with _NDJSONReader(file_path) as reader:
+            def records():
+                for record in reader:
+                    if record is None:
+                        report.add_error(reader.line_number, "JSON inválido")
+                    elif "_meta" not in record:
+                        yield reader.line_number, record
+            
+            results = iter(validate_records(records(), workers))
+            finished = False
+            while not finished:
+                # Cada transação acumula lotes até dobrar a base: o total
+                # regravado fica proporcional ao tamanho final da base
+                saved = report.imported
+                flush_at = max(batch_size, len(self.codes))
+                try:
+                    with self.transaction():
+                        pending = 0
+                        while pending < flush_at:
+                            batch = self._collect_valid(results, report, batch_size)
+                            if not batch:
+                                finished = True
+                                break
+                            for code in batch.values():
+                                self._put(code)
+                            pending += len(batch)
+                            if progress_callback:
+                                progress_callback(report.imported, reader.bytes_read,
+                                                  reader.total_bytes)
+                except Exception as e:
+                    report.imported = saved
+                    report.aborted = str(e)
+                    print(f"Importação interrompida após {report.imported} códigos gravados: {e}")
+                    break
+            
+            if progress_callback and not report.aborted:
+                progress_callback(report.imported, reader.total_bytes, reader.total_bytes)
+        
+        return report.to_dict()
+    
+    def _collect_valid(self, results: Iterator, report: Any,
+                       limit: Optional[int] = None) -> Dict[str, IRCode]:
+        """Consome resultados da validação até limit códigos válidos"""
+        batch: Dict[str, IRCode] = {}
+        
+        for ref, data, error in results:
+            if error:
+                report.add_error(ref, error)
+                continue
+            
+            if not data["id"]:
+                data["id"] = self.generate_id(data["device"], data["command"], batch)
+            batch[data["id"]] = IRCode.from_dict(data)
+            report.imported += 1
+            
+            if limit and len(batch) >= limit:
+                break
+        
+        return batch
+
+
+def _import_pipeline():
+    """Importa o pipeline de validação somente quando há uma importação"""
+    try:
+        from .ir_import import ImportReport, validate_records
+    except ImportError:  # Execução direta (python ir_database.py)
+        from ir_import import ImportReport, validate_records
+    return ImportReport, validate_records
+
+
+def _formats():
+    """Importa o registro de formatos somente quando há uma conversão"""
+    try:
+        from .ir_formats import CodeEntry, get_format
+    except ImportError:  # Execução direta (python ir_database.py)
+        from ir_formats import CodeEntry, get_format
+    return get_format, CodeEntry
+
+
+def _remove_tmp(tmp_path: str) -> None:
+    """Remove o arquivo temporário de uma gravação que falhou"""
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def _open_ndjson(file_path: str, mode: str) -> io.TextIOBase:
+    """Abre arquivo NDJSON em modo texto, usando gzip para extensão .gz"""
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode + "t", encoding="utf-8")
+    return open(file_path, mode, encoding="utf-8")
+
+
+class _NDJSONReader:
+    """Leitor incremental de NDJSON com contagem de bytes para progresso"""
+    
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.total_bytes = os.path.getsize(file_path)
+        self.line_number = 0
+        self._raw = None
+        self._text = None
+    
+    def __enter__(self) -> '_NDJSONReader':
+        self._raw = open(self.file_path, 'rb')
+        stream = self._raw
+        if self.file_path.endswith(".gz"):
+            stream = gzip.GzipFile(fileobj=self._raw, mode='rb')
+        self._text = io.TextIOWrapper(stream, encoding="utf-8")
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._text.close()
+        self._raw.close()
+    
+    @property
+    def bytes_read(self) -> int:
+        """Bytes já lidos do arquivo em disco (comprimidos, se .gz)"""
+        return self._raw.tell()
+    
+    def __iter__(self) -> Iterator[Optional[Dict[str, Any]]]:
+        """Gera um dicionário por linha, ou None para linhas inválidas"""
+        for line in self._text:
+            self.line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"JSON inválido na linha {self.line_number}: {e}")
+                yield None
+                continue
+            yield record if isinstance(record, dict) else None
 
 
 def test_database():
@@ -260,13 +1485,52 @@ def test_database():
             print(f"Código encontrado: {code.name}")
             print(f"Pronto: {code.pronto_code}")
         
+        # Prefixo b64: aceito como no conversor (gravado sem o prefixo)
+        prefixed_id = db.add_code("Power (b64)", "TV Samsung", "power_b64", "b64:" + test_base64)
+        print(f"Prefixo b64: {'ok' if db.get_code(prefixed_id).base64_code == test_base64 else 'ERRO'}")
+        db.delete_code(prefixed_id)
+        
         # Estatísticas
         stats = db.get_statistics()
         print(f"Estatísticas: {stats}")
         
+        # Transação: várias alterações em uma única gravação
+        snapshot = db.snapshot()
+        with db.transaction():
+            db.update_code(code_id, notes="Alterado na transação")
+            db.add_code("Power Off", "TV Samsung", "power_off", test_base64)
+        print(f"Snapshot anterior: {snapshot.get_code(code_id).notes} "
+              f"({len(snapshot.codes)} código); atual: {db.get_code(code_id).notes} "
+              f"({len(db.codes)} códigos)")
+        
+        # Edição externa (git, sincronização): só o registro alterado é aplicado
+        with open("test_ir_codes.json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data[code_id]["name"] = "Power (editado)"
+        with open("test_ir_codes.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        print(f"Alterados externamente: {db.reload_changes()} -> {db.get_code(code_id).name}")
+        
+        # Falha na gravação: o erro chega ao chamador e a base volta ao estado anterior
+        db.db_path = os.path.join("diretorio_inexistente", "test_ir_codes.json")
+        failures = []
+        for call in (
+            lambda: db.add_codes([{"name": "Mute", "device": "TV Samsung",
+                                   "command": "mute", "base64_code": test_base64}]),
+            lambda: db.update_codes([{"id": code_id, "notes": "Não gravado"}]),
+        ):
+            try:
+                call()
+            except OSError as e:
+                failures.append(e.errno)
+        db.db_path = "test_ir_codes.json"
+        rolled_back = len(db.codes) == 2 and db.get_code(code_id).notes == "Alterado na transação"
+        print(f"Gravação com falha: {len(failures)} erros propagados, "
+              f"{'ok' if len(failures) == 2 and rolled_back else 'ERRO'}")
+        
         # Limpeza
         os.remove("test_ir_codes.json")
-        
+    
     except Exception as e:
         print(f"Erro no teste: {e}")
 
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Registro de formatos de códigos IR
+Codificadores e decodificadores entre timings (µs) e os formatos usados
+por outros sistemas: raw, Pronto, LIRC, Flipper Zero, Tuya e SmartIR.
+Cada formato também sabe gerar (em streaming) e ler um arquivo completo.
+"""
+
+import base64
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    from .ir_converter import IRConverter
+except ImportError:  # Execução direta (python ir_formats.py)
+    from ir_converter import IRConverter
+
+DEFAULT_FREQUENCY = 38000
+
+# Pausa final acrescentada aos códigos que terminam em marca (~100 ms)
+DEFAULT_GAP_US = 100000
+
+# Valores por linha nos blocos raw do LIRC
+LIRC_VALUES_PER_LINE = 6
+
+# Janela e tamanho máximos das referências da compressão Tuya
+TUYA_WINDOW = 1 << 13
+TUYA_MAX_MATCH = 7 + 255 + 2
+TUYA_MAX_LITERAL = 32
+
+
+class CodeEntry(NamedTuple):
+    """Código a exportar, já decodificado"""
+    command: str
+    timings: List[int]
+    frequency: int
+    base64_code: str
+
+
+# (referência, dados {"device", "command", "timings", "frequency"} ou None, erro ou None)
+ParseResult = Tuple[str, Optional[Dict[str, object]], Optional[str]]
+
+# (dispositivo, códigos do dispositivo)
+DeviceGroup = Tuple[str, Iterable[CodeEntry]]
+
+
+def strip_gap(timings: List[int]) -> List[int]:
+    """Remove a pausa final (formatos que exigem terminar em marca)"""
+    return timings[:-1] if len(timings) % 2 == 0 else timings
+
+
+def with_gap(timings: List[int]) -> List[int]:
+    """Acrescenta a pausa final quando a sequência termina em marca"""
+    return timings + [DEFAULT_GAP_US] if len(timings) % 2 else timings
+
+
+def _numbers(text: str) -> List[int]:
+    """Inteiros de um texto separado por espaços, vírgulas ou quebras de linha"""
+    try:
+        return [abs(int(value)) for value in re.split(r"[\s,]+", text.strip()) if value]
+    except ValueError:
+        raise ValueError("Timings devem ser números inteiros")
+
+
+def _decoded(device: str, command: str, timings: List[int],
+             frequency: int) -> Dict[str, object]:
+    return {"device": device, "command": command, "timings": timings, "frequency": frequency}
+
+
+class IRFormat(ABC):
+    """
+    Base dos formatos
+    O arquivo padrão tem uma linha "dispositivo<TAB>comando<TAB>código"
+    por código; formatos com arquivo próprio sobrescrevem dump e load.
+    encode e decode são abstratos: um formato incompleto não pode ser
+    instanciado e portanto nem registrado.
+    """
+    
+    name = ""
+    description = ""
+    extension = ".txt"
+    
+    # Arquivo comporta um único dispositivo
+    single_device = False
+    
+    # Sem nome de dispositivo no arquivo: a importação usa o nome do arquivo
+    device_from_filename = False
+    
+    @abstractmethod
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        """Codifica timings (µs) em texto do formato"""
+    
+    @abstractmethod
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        """Decodifica texto do formato. Retorna: (timings em µs, frequência)"""
+    
+    def dump(self, groups: Iterable[DeviceGroup]) -> Iterator[str]:
+        """Gera o arquivo em partes, um código por vez"""
+        for device, codes in groups:
+            for code in codes:
+                yield f"{device}\t{code.command}\t{self.encode(code.timings, code.frequency)}\n"
+    
+    def load(self, text: str, device: Optional[str] = None) -> Iterator[ParseResult]:
+        """Lê o arquivo gerado por dump"""
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            if len(parts) != 3:
+                yield str(number), None, "Linha deve ter dispositivo, comando e código"
+                continue
+            try:
+                timings, frequency = self.decode(parts[2])
+            except ValueError as e:
+                yield str(number), None, str(e)
+                continue
+            yield str(number), _decoded(device or parts[0], parts[1], timings, frequency), None
+
+
+class RawFormat(IRFormat):
+    """Timings em µs com espaços negativos (transmit_raw do ESPHome)"""
+    
+    name = "raw"
+    description = "Timings em µs, espaços negativos"
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        return ", ".join(
+            str(timing if position % 2 == 0 else -timing)
+            for position, timing in enumerate(timings)
+        )
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        timings = _numbers(text)
+        if not timings:
+            raise ValueError("Código raw vazio")
+        return timings, DEFAULT_FREQUENCY
+
+
+class ProntoFormat(IRFormat):
+    """Pronto Hex (o mesmo gerado pelo IRConverter)"""
+    
+    name = "pronto"
+    description = "Pronto Hex"
+    
+    def __init__(self):
+        self._converter = IRConverter()
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        return self._converter.timings_to_pronto(timings, frequency)
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        """Todas as palavras após o preâmbulo, em ciclos da portadora"""
+        if not self._converter.validate_pronto(text.strip()):
+            raise ValueError("Código Pronto inválido")
+        words = [int(word, 16) for word in text.split()]
+        if len(words) < 6 or not words[1]:
+            raise ValueError("Código Pronto sem timings")
+        frequency = self._converter.get_frequency_from_pronto(text)
+        period = 1000000 / frequency
+        return [int(round(word * period)) for word in words[4:]], frequency
+
+
+class LIRCFormat(IRFormat):
+    """lircd.conf com códigos raw (um bloco remote por dispositivo)"""
+    
+    name = "lirc"
+    description = "LIRC lircd.conf (raw_codes)"
+    extension = ".lircd.conf"
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        return " ".join(str(timing) for timing in strip_gap(timings))
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        timings = _numbers(text)
+        if not timings:
+            raise ValueError("Código LIRC vazio")
+        return with_gap(timings), DEFAULT_FREQUENCY
+    
+    @staticmethod
+    def _identifier(value: str) -> str:
+        """Nomes do LIRC não podem ter espaços"""
+        return re.sub(r"\s+", "_", value.strip()) or "unnamed"
+    
+    def dump(self, groups: Iterable[DeviceGroup]) -> Iterator[str]:
+        for device, codes in groups:
+            yield (
+                "begin remote\n"
+                f"  name  {self._identifier(device)}\n"
+                "  flags RAW_CODES\n"
+                "  eps   30\n"
+                "  aeps  100\n"
+                f"  gap   {DEFAULT_GAP_US}\n"
+                "  begin raw_codes\n"
+            )
+            for code in codes:
+                values = strip_gap(code.timings)
+                lines = [
+                    "          " + " ".join(f"{v:>6}" for v in values[i:i + LIRC_VALUES_PER_LINE])
+                    for i in range(0, len(values), LIRC_VALUES_PER_LINE)
+                ]
+                yield f"    name {self._identifier(code.command)}\n" + "\n".join(lines) + "\n"
+            yield "  end raw_codes\nend remote\n\n"
+    
+    def load(self, text: str, device: Optional[str] = None) -> Iterator[ParseResult]:
+        remote = None
+        frequency = DEFAULT_FREQUENCY
+        in_raw = False
+        command = None
+        values: List[int] = []
+        
+        def flush():
+            ref = f"{remote}/{command}"
+            if not values:
+                return ref, None, "Código sem timings"
+            return ref, _decoded(device or remote, command, with_gap(values), frequency), None
+        
+        for number, line in enumerate(text.splitlines(), 1):
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            keyword = words[0].lower()
+            
+            if keyword == "begin" and words[1:] == ["remote"]:
+                remote, frequency, command = f"remote{number}", DEFAULT_FREQUENCY, None
+            elif keyword == "begin" and words[1:] == ["codes"]:
+                yield str(number), None, f"Remote {remote} sem raw_codes não suportado"
+            elif keyword == "begin" and words[1:] == ["raw_codes"]:
+                in_raw = True
+            elif keyword == "end" and words[1:] == ["raw_codes"]:
+                if command is not None:
+                    yield flush()
+                in_raw, command = False, None
+            elif keyword == "name" and len(words) > 1:
+                if not in_raw:
+                    remote = words[1]
+                    continue
+                if command is not None:
+                    yield flush()
+                command, values = words[1], []
+            elif keyword == "frequency" and not in_raw and len(words) > 1:
+                frequency = int(words[1]) or DEFAULT_FREQUENCY
+            elif in_raw and command is not None:
+                try:
+                    values.extend(_numbers(" ".join(words)))
+                except ValueError as e:
+                    yield f"{remote}/{command}", None, str(e)
+                    command = None
+
+
+class FlipperFormat(IRFormat):
+    """Arquivo .ir do Flipper Zero com sinais raw"""
+    
+    name = "flipper"
+    description = "Flipper Zero .ir (raw)"
+    extension = ".ir"
+    single_device = True
+    device_from_filename = True
+    
+    DUTY_CYCLE = 0.33
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        return " ".join(str(timing) for timing in strip_gap(timings))
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        timings = _numbers(text)
+        if not timings:
+            raise ValueError("Sinal Flipper vazio")
+        return with_gap(timings), DEFAULT_FREQUENCY
+    
+    def dump(self, groups: Iterable[DeviceGroup]) -> Iterator[str]:
+        yield "Filetype: IR signals file\nVersion: 1\n"
+        for _, codes in groups:
+            for code in codes:
+                yield (
+                    "# \n"
+                    f"name: {code.command}\n"
+                    "type: raw\n"
+                    f"frequency: {code.frequency}\n"
+                    f"duty_cycle: {self.DUTY_CYCLE:.6f}\n"
+                    f"data: {self.encode(code.timings)}\n"
+                )
+    
+    def load(self, text: str, device: Optional[str] = None) -> Iterator[ParseResult]:
+        signal: Dict[str, str] = {}
+        
+        def flush():
+            name = signal.get("name", "")
+            if signal.get("type") != "raw":
+                return name, None, f"Sinal {signal.get('type')} não suportado (apenas raw)"
+            try:
+                timings, _ = self.decode(signal.get("data", ""))
+                frequency = int(signal.get("frequency") or DEFAULT_FREQUENCY)
+            except ValueError as e:
+                return name, None, str(e)
+            return name, _decoded(device or "flipper", name, timings, frequency), None
+        
+        for line in text.splitlines():
+            key, _, value = line.partition(":")
+            key = key.strip()
+            if key == "name" and signal:
+                yield flush()
+                signal = {}
+            if key in ("name", "type", "frequency", "data"):
+                signal[key] = value.strip()
+        if signal:
+            yield flush()
+
+
+def tuya_compress(data: bytes) -> bytes:
+    """
+    Compressão LZ usada nos códigos IR da Tuya
+    Blocos literais (até 32 bytes) e referências (distância até 8192,
+    tamanho até 264); casamentos encontrados por tabela hash de 3 bytes.
+    """
+    out = bytearray()
+    table: Dict[bytes, int] = {}
+    literal_start = 0
+    position = 0
+    size = len(data)
+    
+    def literals(end: int) -> None:
+        for start in range(literal_start, end, TUYA_MAX_LITERAL):
+            chunk = data[start:min(start + TUYA_MAX_LITERAL, end)]
+            out.append(len(chunk) - 1)
+            out.extend(chunk)
+    
+    while position + 2 < size:
+        key = data[position:position + 3]
+        candidate = table.get(key)
+        table[key] = position
+        if candidate is None or position - candidate > TUYA_WINDOW:
+            position += 1
+            continue
+        
+        length = 3
+        limit = min(TUYA_MAX_MATCH, size - position)
+        while length < limit and data[candidate + length] == data[position + length]:
+            length += 1
+        
+        literals(position)
+        distance = position - candidate - 1
+        if length - 2 >= 7:
+            out.append(7 << 5 | distance >> 8)
+            out.append(length - 2 - 7)
+        else:
+            out.append((length - 2) << 5 | distance >> 8)
+        out.append(distance & 0xFF)
+        
+        position += length
+        literal_start = position
+    
+    literals(size)
+    return bytes(out)
+
+
+def tuya_decompress(data: bytes) -> bytes:
+    """Inverso de tuya_compress"""
+    out = bytearray()
+    position = 0
+    while position < len(data):
+        header = data[position]
+        position += 1
+        length, distance = header >> 5, header & 0x1F
+        
+        if not length:
+            length = distance + 1
+            if position + length > len(data):
+                raise ValueError("Bloco literal incompleto")
+            out.extend(data[position:position + length])
+            position += length
+            continue
+        
+        if length == 7:
+            length += data[position]
+            position += 1
+        length += 2
+        if position >= len(data):
+            raise ValueError("Referência incompleta")
+        distance = (distance << 8 | data[position]) + 1
+        position += 1
+        if distance > len(out):
+            raise ValueError("Referência fora da janela")
+        
+        for _ in range(length):
+            out.append(out[-distance])
+    return bytes(out)
+
+
+class TuyaFormat(IRFormat):
+    """Base64 dos blasters IR Tuya (timings uint16 LE comprimidos)"""
+    
+    name = "tuya"
+    description = "Tuya IR (Base64 comprimido)"
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        payload = b"".join(
+            min(timing, 0xFFFF).to_bytes(2, "little") for timing in strip_gap(timings)
+        )
+        return base64.b64encode(tuya_compress(payload)).decode("ascii")
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        try:
+            payload = tuya_decompress(base64.b64decode(text.strip(), validate=True))
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"Código Tuya inválido: {e}")
+        if not payload or len(payload) % 2:
+            raise ValueError("Código Tuya com tamanho inválido")
+        timings = [
+            int.from_bytes(payload[i:i + 2], "little") for i in range(0, len(payload), 2)
+        ]
+        return with_gap(timings), DEFAULT_FREQUENCY
+
+
+class SmartIRFormat(IRFormat):
+    """Arquivo de dispositivo do SmartIR (comandos Broadlink em Base64)"""
+    
+    name = "smartir"
+    description = "SmartIR JSON (controlador Broadlink)"
+    extension = ".json"
+    single_device = True
+    
+    def __init__(self):
+        self._converter = IRConverter()
+    
+    def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+        packet = self._converter.encode_broadlink_data(with_gap(timings))
+        return base64.b64encode(packet).decode("ascii")
+    
+    def decode(self, text: str) -> Tuple[List[int], int]:
+        return self._converter.parse_broadlink_data(self._converter.base64_to_bytes(text.strip()))
+    
+    def dump(self, groups: Iterable[DeviceGroup]) -> Iterator[str]:
+        for device, codes in groups:
+            header = json.dumps({
+                "manufacturer": device,
+                "supportedModels": [],
+                "supportedController": "Broadlink",
+                "commandsEncoding": "Base64",
+            }, ensure_ascii=False, indent=2)
+            yield header[:-2] + ',\n  "commands": {'
+            separator = "\n"
+            for code in codes:
+                # O pacote Broadlink original é mantido sem reconversão
+                yield f"{separator}    {json.dumps(code.command, ensure_ascii=False)}: \"{code.base64_code}\""
+                separator = ",\n"
+            yield "\n  }\n}\n"
+    
+    def load(self, text: str, device: Optional[str] = None) -> Iterator[ParseResult]:
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            yield "", None, f"JSON inválido: {e}"
+            return
+        
+        encoding = str(data.get("commandsEncoding", "Base64")).lower()
+        decoder = {"base64": self, "pronto": FORMATS["pronto"]}.get(encoding)
+        if decoder is None:
+            yield "", None, f"Codificação {data.get('commandsEncoding')} não suportada"
+            return
+        
+        models = data.get("supportedModels") or []
+        device = device or (f"{data.get('manufacturer', 'SmartIR')} {models[0]}".strip()
+                            if models else data.get("manufacturer", "SmartIR"))
+        
+        # Comandos aninhados (climate: modo > ventilação > temperatura) viram "a_b_c"
+        def walk(commands, prefix):
+            for key, value in commands.items():
+                command = f"{prefix}_{key}" if prefix else str(key)
+                if isinstance(value, dict):
+                    yield from walk(value, command)
+                    continue
+                try:
+                    timings, frequency = decoder.decode(str(value))
+                except ValueError as e:
+                    yield command, None, str(e)
+                    continue
+                yield command, _decoded(device, command, timings, frequency), None
+        
+        yield from walk(data.get("commands") or {}, "")
+
+
+FORMATS: Dict[str, IRFormat] = {}
+
+
+def register_format(fmt: IRFormat) -> IRFormat:
+    """Registra (ou substitui) um formato pelo nome"""
+    FORMATS[fmt.name] = fmt
+    return fmt
+
+
+def get_format(name: str) -> IRFormat:
+    """Formato registrado com o nome dado"""
+    try:
+        return FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Formato desconhecido: {name} (disponíveis: {', '.join(FORMATS)})")
+
+
+for _format in (RawFormat(), ProntoFormat(), LIRCFormat(), FlipperFormat(),
+                TuyaFormat(), SmartIRFormat()):
+    register_format(_format)
+
+
+def test_formats():
+    """Função de teste dos formatos"""
+    converter = IRConverter()
+    test_base64 = "JgAcAB0dHB44HhweGx4cHR06HB0cHhwdHB8bHhwADQUAAAAAAAAAAAAAAAA="
+    timings, frequency = converter.parse_broadlink_data(converter.base64_to_bytes(test_base64))
+    
+    for fmt in FORMATS.values():
+        encoded = fmt.encode(timings, frequency)
+        decoded, _ = fmt.decode(encoded)
+        print(f"{fmt.name:>8}: {encoded[:60]}{'...' if len(encoded) > 60 else ''}")
+        same = len(decoded) == len(timings) and all(
+            abs(a - b) <= 0.02 * b for a, b in zip(strip_gap(decoded), strip_gap(timings))
+        )
+        print(f"{'':>8}  ida e volta: {'ok' if same else 'difere'}")
+    
+    code = CodeEntry("power", timings, frequency, test_base64)
+    for name in ("lirc", "flipper", "smartir"):
+        text = "".join(FORMATS[name].dump([("TV Sala", [code])]))
+        print(f"--- {name}\n{text}")
+        print(list(FORMATS[name].load(text)))
+    
+    # Formato sem decode: recusado antes de chegar ao registro
+    class PartialFormat(IRFormat):
+        name = "parcial"
+        
+        def encode(self, timings: List[int], frequency: int = DEFAULT_FREQUENCY) -> str:
+            return ""
+    
+    try:
+        register_format(PartialFormat())
+        print("Formato incompleto registrado: ERRO")
+    except TypeError as e:
+        print(f"Formato incompleto recusado: ok ({e})")
+
+
+if __name__ == "__main__":
+    test_formats()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Pipeline de validação de códigos IR importados
+Valida, decodifica e reconverte cada registro, no processo atual ou em
+um pool de processos
+"""
+
+import base64
+import binascii
+import datetime
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .ir_converter import IRConverter
+except ImportError:  # Execução direta (python ir_import.py)
+    from ir_converter import IRConverter
+
+# Registros enviados a cada worker por vez
+DEFAULT_CHUNK_SIZE = 256
+
+# Limite de erros detalhados mantidos no relatório
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_FIELDS = ("name", "device", "command", "base64_code")
+
+# (referência do registro, dados normalizados ou None, erro ou None)
+ValidationResult = Tuple[Any, Optional[Dict[str, Any]], Optional[str]]
+
+_converter: Optional[IRConverter] = None
+
+
+@dataclass
+class ImportReport:
+    """Relatório de uma importação validada"""
+    imported: int = 0
+    skipped: int = 0
+    error_count: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # Erro que interrompeu a importação (os lotes anteriores ficam gravados)
+    aborted: Optional[str] = None
+    
+    def add_error(self, ref: Any, reason: str) -> None:
+        """Registra erro de um registro (detalhes limitados a MAX_REPORTED_ERRORS)"""
+        self.skipped += 1
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"record": ref, "error": reason})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário"""
+        result = {
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "error_count": self.error_count,
+            "errors": list(self.errors),
+        }
+        if self.aborted:
+            result["aborted"] = self.aborted
+        return result
+
+
+def validate_record(record: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Valida e normaliza um registro de código IR
+    O Base64 é decodificado estritamente e o código Pronto e a frequência
+    são sempre recalculados a partir dos dados Broadlink.
+    Retorna: (registro normalizado, None) ou (None, mensagem de erro)
+    """
+    global _converter
+    if _converter is None:
+        _converter = IRConverter()
+    
+    if not isinstance(record, dict):
+        return None, "Registro não é um objeto"
+    
+    for name in REQUIRED_FIELDS:
+        value = record.get(name)
+        if not isinstance(value, str) or not value.strip():
+            return None, f"Campo obrigatório ausente ou inválido: {name}"
+    
+    base64_code = record["base64_code"].strip()
+    if base64_code.startswith('b64:'):
+        base64_code = base64_code[4:]
+    
+    try:
+        data = base64.b64decode(base64_code, validate=True)
+    except (binascii.Error, ValueError) as e:
+        return None, f"Base64 inválido: {e}"
+    
+    try:
+        timings, frequency = _converter.parse_broadlink_data(data)
+        pronto_code = _converter.timings_to_pronto(timings, frequency)
+    except ValueError as e:
+        return None, f"Código Broadlink inválido: {e}"
+    
+    notes = record.get("notes", "")
+    created_at = record.get("created_at") or datetime.datetime.now().isoformat()
+    
+    return {
+        "id": record.get("id") or None,
+        "name": record["name"].strip(),
+        "device": record["device"].strip(),
+        "command": record["command"].strip(),
+        "base64_code": base64_code,
+        "pronto_code": pronto_code,
+        "frequency": frequency,
+        "created_at": str(created_at),
+        "notes": notes if isinstance(notes, str) else str(notes),
+    }, None
+
+
+def validate_chunk(chunk: List[Tuple[Any, Dict[str, Any]]]) -> List[ValidationResult]:
+    """Valida um lote de registros (executado dentro de um worker)"""
+    results = []
+    for ref, record in chunk:
+        data, error = validate_record(record)
+        results.append((ref, data, error))
+    return results
+
+
+def _chunks(records: Iterable[Tuple[Any, Dict[str, Any]]],
+            chunk_size: int) -> Iterator[List[Tuple[Any, Dict[str, Any]]]]:
+    """Agrupa registros em lotes de chunk_size"""
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_records(records: Iterable[Tuple[Any, Dict[str, Any]]],
+                     workers: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ValidationResult]:
+    """
+    Valida registros (referência, dados) em paralelo, preservando a ordem
+    No máximo 2 lotes por worker ficam em voo, mantendo a memória limitada
+    mesmo com entradas muito grandes. Sem workers (ou com workers=1) a
+    validação é feita no processo atual. Os workers são iniciados com
+    spawn: um fork do processo do HA, que tem várias threads, pode herdar
+    locks ocupados e travar.
+    """
+    workers = workers or 1
+    
+    if workers <= 1:
+        for chunk in _chunks(records, chunk_size):
+            yield from validate_chunk(chunk)
+        return
+    
+    # Importado sob demanda: multiprocessing pesa no carregamento da integração
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        
+        while pending:
+            yield from pending.popleft().result()
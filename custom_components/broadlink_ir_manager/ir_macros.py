@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Macros de códigos IR
+Sequências de códigos da base com pausas entre eles, compiladas em um
+único pacote Broadlink (enviado em uma só chamada ao dispositivo). Os
+pacotes compilados ficam em cache até algum código da macro mudar.
+"""
+
+import json
+import os
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+try:
+    from .ir_converter import BROADLINK_TICK_US, IRConverter
+except ImportError:  # Execução direta (python ir_macros.py)
+    from ir_converter import BROADLINK_TICK_US, IRConverter
+
+# Maior pausa representável em um pulso (0xFFFF unidades, ~2,15 s)
+MAX_STEP_DELAY_MS = int(0xFFFF * BROADLINK_TICK_US / 1000)
+
+# Primeiro byte dos pacotes IR do Broadlink
+IR_PACKET_TYPE = 0x26
+
+
+@dataclass
+class MacroStep:
+    """Código da macro e pausa (ms) antes do próximo"""
+    code_id: str
+    delay: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário"""
+        return {"code_id": self.code_id, "delay": self.delay}
+
+
+@dataclass
+class Macro:
+    """Sequência nomeada de códigos"""
+    name: str
+    steps: List[MacroStep] = field(default_factory=list)
+    
+    @property
+    def code_ids(self) -> Set[str]:
+        """IDs dos códigos usados pela macro"""
+        return {step.code_id for step in self.steps}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário"""
+        return {"name": self.name, "steps": [step.to_dict() for step in self.steps]}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Macro':
+        """Cria instância a partir de dicionário"""
+        return cls(data["name"], [MacroStep(**step) for step in data.get("steps", [])])
+
+
+def compile_packets(converter: IRConverter, packets: List[bytes],
+                    delays: List[int]) -> bytes:
+    """
+    Concatena pacotes IR do Broadlink em um único pacote
+    As repetições de cada pacote são expandidas e a pausa final do último
+    quadro de cada um passa a ser pelo menos o delay (ms) informado.
+    """
+    timings: List[int] = []
+    for packet, delay in zip(packets, delays):
+        if not packet or packet[0] != IR_PACKET_TYPE:
+            raise ValueError("Somente códigos IR podem ser combinados em uma macro")
+        
+        frame, _ = converter.parse_broadlink_data(packet)
+        if not frame:
+            raise ValueError("Código sem pulsos")
+        
+        # Repetições do próprio pacote (byte 1) viram quadros explícitos
+        for _ in range(packet[1]):
+            timings += frame
+        
+        # Termina em pausa (número par de timings), alongada até o delay
+        frame = list(frame)
+        if len(frame) % 2:
+            frame.append(0)
+        frame[-1] = max(frame[-1], delay * 1000)
+        timings += frame
+    
+    try:
+        return converter.encode_broadlink_data(timings)
+    except struct.error:
+        raise ValueError("Macro longa demais para um único pacote")
+
+
+class MacroLibrary:
+    """
+    Macros persistidas em arquivo JSON, com cache dos pacotes compilados
+    Os pacotes são invalidados pelos listeners de alteração da base.
+    """
+    
+    def __init__(self, database, path: str = "ir_macros.json"):
+        self.database = database
+        self.path = path
+        self._macros: Optional[Dict[str, Macro]] = None
+        self._compiled: Dict[str, bytes] = {}
+        self._lock = threading.RLock()
+        
+        # Incrementado a cada invalidação: compilações concorrentes com uma
+        # alteração da base não entram no cache
+        self._generation = 0
+        database.add_listener(self._invalidate)
+    
+    @property
+    def macros(self) -> Dict[str, Macro]:
+        """Macros por nome, lidas do arquivo no primeiro acesso"""
+        with self._lock:
+            if self._macros is None:
+                self._macros = self._load()
+            return self._macros
+    
+    def _load(self) -> Dict[str, Macro]:
+        """Lê as macros do arquivo"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {name: Macro.from_dict(macro) for name, macro in data.items()}
+        except Exception as e:
+            print(f"Erro ao carregar macros: {e}")
+            return {}
+    
+    def _save(self) -> None:
+        """Grava as macros (arquivo temporário + os.replace)"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({name: macro.to_dict() for name, macro in self.macros.items()},
+                          f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Erro ao salvar macros: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def get_macro(self, name: str) -> Optional[Macro]:
+        """Obtém macro por nome"""
+        return self.macros.get(name)
+    
+    def set_macro(self, name: str, steps: List[Dict[str, Any]]) -> bytes:
+        """
+        Cria ou substitui uma macro, compilando-a para validar os códigos
+        Retorna: pacote compilado
+        """
+        macro = Macro(name, [MacroStep(step["code_id"], int(step.get("delay", 0)))
+                             for step in steps])
+        if not macro.steps:
+            raise ValueError("Macro sem códigos")
+        for step in macro.steps:
+            if not 0 <= step.delay <= MAX_STEP_DELAY_MS:
+                raise ValueError(f"Pausa deve estar entre 0 e {MAX_STEP_DELAY_MS} ms")
+        
+        with self._lock:
+            packet = self._compile(macro)
+            self.macros[name] = macro
+            self._compiled[name] = packet
+            self._save()
+        return packet
+    
+    def delete_macro(self, name: str) -> bool:
+        """Remove macro"""
+        with self._lock:
+            if name not in self.macros:
+                return False
+            del self.macros[name]
+            self._compiled.pop(name, None)
+            self._save()
+        return True
+    
+    def compile(self, name: str) -> bytes:
+        """Pacote único da macro, compilado só quando não está em cache"""
+        with self._lock:
+            packet = self._compiled.get(name)
+            if packet is not None:
+                return packet
+            macro = self.macros.get(name)
+            generation = self._generation
+        
+        if macro is None:
+            raise ValueError(f"Macro não encontrada: {name}")
+        
+        packet = self._compile(macro)
+        with self._lock:
+            if generation == self._generation and self.macros.get(name) is macro:
+                self._compiled[name] = packet
+        return packet
+    
+    def _compile(self, macro: Macro) -> bytes:
+        """Lê os códigos da base e os concatena em um pacote"""
+        snapshot = self.database.snapshot()
+        packets = []
+        for step in macro.steps:
+            code = snapshot.get_code(step.code_id)
+            if code is None:
+                raise ValueError(f"Código não encontrado: {step.code_id}")
+            packets.append(self.database.converter.base64_to_bytes(code.base64_code))
+        
+        return compile_packets(self.database.converter, packets,
+                               [step.delay for step in macro.steps])
+    
+    def _invalidate(self, code_ids: Set[str]) -> None:
+        """Descarta os pacotes das macros que usam códigos alterados"""
+        with self._lock:
+            self._generation += 1
+            for name in list(self._compiled):
+                macro = self.macros.get(name)
+                if macro is None or macro.code_ids & code_ids:
+                    del self._compiled[name]
+
+
+def test_macros():
+    """Função de teste das macros"""
+    import tempfile
+    try:
+        from .ir_database import IRDatabase
+    except ImportError:
+        from ir_database import IRDatabase
+    
+    test_base64 = "JgAcAB0dHB44HhweGx4cHR06HB0cHhwdHB8bHhwADQUAAAAAAAAAAAAAAAA="
+    with tempfile.TemporaryDirectory() as tmp:
+        db = IRDatabase(os.path.join(tmp, "ir_codes.json"))
+        power = db.add_code("Ligar", "TV Sala", "power", test_base64)
+        hdmi = db.add_code("HDMI 2", "TV Sala", "hdmi2", test_base64)
+        
+        library = MacroLibrary(db, os.path.join(tmp, "ir_macros.json"))
+        packet = library.set_macro("Assistir TV", [
+            {"code_id": power, "delay": 1000},
+            {"code_id": hdmi},
+        ])
+        print(f"Pacote compilado: {len(packet)} bytes")
+        print(f"Em cache: {library.compile('Assistir TV') is packet}")
+        
+        db.update_code(hdmi, notes="alterado")
+        print(f"Recompilado após alteração: {library.compile('Assistir TV') is not packet}")
+
+
+if __name__ == "__main__":
+    test_macros()
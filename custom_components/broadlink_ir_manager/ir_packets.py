@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tabela de pacotes endereçada por conteúdo
+Códigos com o mesmo pacote Broadlink (o mesmo modelo de TV em vários
+cômodos, por exemplo) apontam para uma única entrada, identificada pelo
+hash dos bytes do pacote. Cada pacote é convertido para Pronto uma única
+vez e os registros compartilham as mesmas strings em memória e em disco.
+"""
+
+import base64
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    from .ir_converter import IRConverter
+except ImportError:  # Execução direta (python ir_packets.py)
+    from ir_converter import IRConverter
+
+# Chave da tabela de pacotes no ir_codes.json (marca o formato endereçado por conteúdo)
+PACKETS_KEY = "__packets__"
+
+# Campos do IRCode que vêm da tabela de pacotes
+PACKET_FIELDS = ("base64_code", "pronto_code", "frequency")
+
+# Tamanho do hash (bytes): 64 bits tornam colisões desprezíveis em bibliotecas de milhões de códigos
+KEY_SIZE = 8
+
+# Prefixo opcional dos códigos Base64 (aceito também pelo IRConverter)
+BASE64_PREFIX = "b64:"
+
+
+def strip_prefix(base64_code: str) -> str:
+    """Remove o prefixo b64:, se presente"""
+    if base64_code.startswith(BASE64_PREFIX):
+        return base64_code[len(BASE64_PREFIX):]
+    return base64_code
+
+
+def packet_key(base64_code: str) -> str:
+    """Chave do pacote: hash dos bytes decodificados (independe da formatação do Base64)"""
+    data = base64.b64decode(strip_prefix(base64_code))
+    return hashlib.blake2b(data, digest_size=KEY_SIZE).hexdigest()
+
+
+@dataclass(frozen=True)
+class PacketEntry:
+    """Pacote armazenado uma vez e compartilhado pelos códigos"""
+    key: str
+    base64_code: str
+    pronto_code: str
+    frequency: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário (sem a chave)"""
+        return {
+            "base64_code": self.base64_code,
+            "pronto_code": self.pronto_code,
+            "frequency": self.frequency,
+        }
+
+
+class PacketStore:
+    """Tabela chave -> pacote, com índice Base64 -> chave para evitar recalcular hashes"""
+    
+    def __init__(self, converter: Optional[IRConverter] = None):
+        self.converter = converter or IRConverter()
+        self._entries: Dict[str, PacketEntry] = {}
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+    
+    def __getitem__(self, key: str) -> PacketEntry:
+        return self._entries[key]
+    
+    def intern(self, base64_code: str, pronto_code: Optional[str] = None,
+               frequency: Optional[int] = None) -> PacketEntry:
+        """
+        Entrada compartilhada do pacote, criando-a se necessário
+        A conversão para Pronto só acontece para pacotes novos informados
+        sem pronto_code. O prefixo b64: é removido antes de guardar o pacote.
+        Erros de Base64 ou conversão geram ValueError.
+        """
+        base64_code = strip_prefix(base64_code)
+        key = self._keys.get(base64_code)
+        if key is not None:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+        
+        key = packet_key(base64_code)
+        entry = self._entries.get(key)
+        if entry is None:
+            if pronto_code is None:
+                pronto_code = self.converter.broadlink_to_pronto(base64_code)
+            if frequency is None:
+                frequency = self.converter.get_frequency_from_pronto(pronto_code)
+            entry = PacketEntry(key, base64_code, pronto_code, frequency)
+        
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._keys[base64_code] = key
+        return entry
+    
+    def load(self, table: Dict[str, Dict[str, Any]]) -> None:
+        """Acrescenta as entradas lidas do arquivo (sem conversões)"""
+        with self._lock:
+            for key, data in table.items():
+                if key not in self._entries:
+                    entry = PacketEntry(key, data["base64_code"], data["pronto_code"],
+                                        data["frequency"])
+                    self._entries[key] = entry
+                    self._keys[entry.base64_code] = key
+    
+    def retain(self, keys: Iterable[str]) -> None:
+        """Descarta as entradas que nenhum código usa mais"""
+        keep = set(keys)
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if key in keep}
+            self._keys = {
+                base64_code: key for base64_code, key in self._keys.items() if key in keep
+            }
+
+
+def test_packets():
+    """Função de teste da tabela de pacotes"""
+    test_base64 = "JgAcAB0dHB44HhweGx4cHR06HB0cHhwdHB8bHhwADQUAAAAAAAAAAAAAAAA="
+    
+    store = PacketStore()
+    sala = store.intern(test_base64)
+    quarto = store.intern(test_base64)
+    print(f"Chave: {sala.key}, compartilhada: {sala is quarto}, entradas: {len(store)}")
+    print(f"Pronto: {sala.pronto_code[:29]}... ({sala.frequency} Hz)")
+    
+    # Mesmo pacote com outra formatação do Base64: mesma entrada
+    print(f"Outro padding: {store.intern(test_base64.rstrip('=') + '==') is sala}")
+    
+    # Prefixo b64: (aceito pelo conversor e pelos serviços): mesma entrada, sem o prefixo
+    prefixed = store.intern("b64:" + test_base64)
+    print(f"Com prefixo b64: {'ok' if prefixed is sala and prefixed.base64_code == test_base64 else 'ERRO'}")
+    
+    store.retain([])
+    print(f"Após retain: {len(store)} entradas")
+
+
+if __name__ == "__main__":
+    test_packets()
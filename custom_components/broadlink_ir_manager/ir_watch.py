@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Observador de arquivo
+Avisa quando um arquivo é alterado por outro programa (git, sincronização,
+editores). No Linux usa o inotify (via ctypes, sem dependências) no
+diretório do arquivo, o que também cobre substituições por os.replace;
+nos demais sistemas, ou sem inotify, compara mtime e tamanho periodicamente.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+# Eventos do inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Cabeçalho de cada evento lido do inotify: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+# Intervalo (s) entre comparações de mtime quando não há inotify
+POLL_INTERVAL = 5.0
+
+# Espera (s) sem novos eventos antes de avisar: um git pull ou uma
+# sincronização podem gravar o arquivo várias vezes seguidas
+DEBOUNCE = 0.5
+
+
+def _load_libc():
+    """libc com inotify, ou None se indisponível"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """
+    Observa um arquivo em uma thread própria
+    O callback roda na thread do observador, uma vez por sequência de
+    gravações; quem o recebe decide se a alteração é relevante.
+    """
+    
+    def __init__(self, path: str, callback: Callable[[], None],
+                 poll_interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.mode: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+        self._wake: Optional[Tuple[int, int]] = None
+        self._signature: Optional[Tuple[int, int]] = None
+    
+    def start(self) -> None:
+        """Inicia a observação (inotify se disponível, senão mtime)"""
+        if self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._fd = self._open_inotify()
+        if self._fd is not None:
+            self.mode = "inotify"
+            self._wake = os.pipe()
+        else:
+            self.mode = "poll"
+            self._signature = self._file_signature()
+        
+        self._thread = threading.Thread(
+            target=self._run, name=f"FileWatcher({os.path.basename(self.path)})", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Encerra a observação e aguarda a thread"""
+        self._stop.set()
+        if self._wake is not None:
+            os.write(self._wake[1], b"\0")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        
+        for fd in ([self._fd] if self._fd is not None else []) + list(self._wake or ()):
+            os.close(fd)
+        self._fd = None
+        self._wake = None
+    
+    def _open_inotify(self) -> Optional[int]:
+        """Descritor do inotify observando o diretório do arquivo"""
+        libc = _load_libc()
+        if libc is None:
+            return None
+        
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    
+    def _run(self) -> None:
+        """Laço da thread: espera uma alteração, o fim da sequência e avisa"""
+        changed = self._inotify_changed if self._fd is not None else self._poll_changed
+        while not self._stop.is_set():
+            if not changed(self.poll_interval):
+                continue
+            while not self._stop.is_set() and changed(self.debounce):
+                pass
+            if self._stop.is_set():
+                break
+            
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"Erro ao processar alteração de {self.path}: {e}")
+    
+    def _inotify_changed(self, timeout: float) -> bool:
+        """Espera até timeout por eventos do arquivo observado (ignora os demais do diretório)"""
+        name = os.path.basename(self.path).encode()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self._fd, self._wake[0]], [], [], remaining)
+            if self._fd not in ready:
+                return False
+            
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            
+            offset = 0
+            relevant = False
+            while offset + EVENT_HEADER.size <= len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b"\0") == name:
+                    relevant = True
+                offset += length
+            if relevant:
+                return True
+    
+    def _poll_changed(self, timeout: float) -> bool:
+        """Compara mtime e tamanho após o intervalo"""
+        if self._stop.wait(timeout):
+            return False
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+    
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """mtime (ns) e tamanho do arquivo (None se não existir)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+def test_watch():
+    """Função de teste do observador"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ir_codes.json")
+        changes = []
+        
+        watcher = FileWatcher(path, lambda: changes.append(time.monotonic()), debounce=0.1)
+        watcher.start()
+        
+        # Três gravações seguidas (arquivo temporário + os.replace) e uma de outro arquivo
+        for number in range(3):
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                f.write(f'{{"versao": {number}}}')
+            os.replace(f"{path}.tmp", path)
+        with open(os.path.join(tmp, "outro.json"), 'w', encoding='utf-8') as f:
+            f.write("{}")
+        
+        time.sleep(0.5)
+        watcher.stop()
+        print(f"Modo: {watcher.mode}, avisos: {len(changes)}")
+
+
+if __name__ == "__main__":
+    test_watch()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Métricas no estilo Prometheus para o Broadlink IR Manager
+Contadores, gauges e histogramas de latência dos pontos quentes
+(dispositivo, conversão e base de dados)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Limites dos histogramas de latência, em segundos
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues,
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    """Formata labels no padrão {nome="valor",...}"""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base das métricas, com valores separados por combinação de labels"""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """Valores dos labels na ordem declarada"""
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def _current(self) -> Dict[LabelValues, Any]:
+        """Cópia dos valores atuais"""
+        with self._lock:
+            return dict(self._values)
+    
+    def render(self) -> List[str]:
+        """Linhas no formato de exposição de texto do Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in sorted(self._current().items()):
+            lines.extend(self._render_value(values, value))
+        return lines
+    
+    def _render_value(self, values: LabelValues, value: Any) -> List[str]:
+        """Linhas de uma combinação de labels"""
+        return [f"{self.name}{_format_labels(self.label_names, values)} {value}"]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Valores atuais por combinação de labels"""
+        return {",".join(values) or "total": value for values, value in self._current().items()}
+
+
+class BoundCounter:
+    """
+    Contador de uma combinação fixa de labels, para caminhos quentes
+    Incrementa sem lock nem montagem dos labels; sob concorrência um
+    incremento raro pode se perder, o que é aceitável para métricas.
+    """
+    
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0
+    
+    def inc(self, amount: float = 1) -> None:
+        """Incrementa o contador"""
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._bound: Dict[LabelValues, BoundCounter] = {}
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Incrementa o contador"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def bind(self, **labels: str) -> BoundCounter:
+        """Contador com os labels fixos, somado a este na exposição"""
+        key = self._key(labels)
+        with self._lock:
+            return self._bound.setdefault(key, BoundCounter())
+    
+    def _current(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            values = dict(self._values)
+            bound = list(self._bound.items())
+        for key, counter in bound:
+            if counter.value:
+                values[key] = values.get(key, 0) + counter.value
+        return values
+    
+    def total(self) -> float:
+        """Soma de todas as combinações de labels"""
+        return sum(self._current().values())
+
+
+class Gauge(_Metric):
+    """Valor instantâneo"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels: str) -> None:
+        """Define o valor atual"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Histograma de latências com buckets cumulativos"""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Registra uma medição em segundos"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "counts": [0] * len(self.buckets), "sum": 0.0, "count": 0,
+                }
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][position] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Mede a duração do bloco"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def _render_value(self, values: LabelValues, state: Dict[str, Any]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.label_names, values, ("le", repr(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, values, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {state['count']}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {state['sum']}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+    
+    def summary(self) -> Dict[str, Any]:
+        """Quantidade e média (ms) por combinação de labels"""
+        with self._lock:
+            return {
+                ",".join(values) or "total": {
+                    "count": state["count"],
+                    "avg_ms": round(state["sum"] / state["count"] * 1000, 3),
+                }
+                for values, state in self._values.items()
+            }
+
+
+class MetricsRegistry:
+    """Registro das métricas da integração"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        """Registra métrica, reutilizando a existente com o mesmo nome"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        """Cria (ou obtém) um contador"""
+        return self._register(Counter(name, documentation, labels))
+    
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        """Cria (ou obtém) um gauge"""
+        return self._register(Gauge(name, documentation, labels))
+    
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Cria (ou obtém) um histograma"""
+        return self._register(Histogram(name, documentation, labels, buckets))
+    
+    def names(self) -> List[str]:
+        """Nomes das métricas registradas"""
+        with self._lock:
+            return list(self._metrics)
+    
+    def render(self) -> str:
+        """Exposição de todas as métricas em texto do Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def summary(self) -> Dict[str, Any]:
+        """Resumo das métricas com valores registrados"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        summary = {}
+        for metric in metrics:
+            values = metric.summary()
+            if values:
+                summary[metric.name] = values
+        return summary
+
+
+REGISTRY = MetricsRegistry()
+
+DEVICE_LATENCY = REGISTRY.histogram(
+    "broadlink_ir_device_latency_seconds",
+    "Latência das operações no dispositivo Broadlink", ["operation"],
+)
+DEVICE_ERRORS = REGISTRY.counter(
+    "broadlink_ir_device_errors_total",
+    "Erros nas operações do dispositivo Broadlink", ["operation"],
+)
+CONVERSION_LATENCY = REGISTRY.histogram(
+    "broadlink_ir_conversion_seconds",
+    "Tempo de conversão Broadlink para Pronto",
+)
+CONVERSIONS = REGISTRY.counter(
+    "broadlink_ir_conversions_total",
+    "Conversões Broadlink para Pronto", ["result"],
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "broadlink_ir_cache_requests_total",
+    "Acessos aos caches da integração", ["cache", "result"],
+)
+DATABASE_SAVE_LATENCY = REGISTRY.histogram(
+    "broadlink_ir_database_save_seconds",
+    "Tempo de gravação da base de dados",
+)
+DATABASE_WRITE_BYTES = REGISTRY.counter(
+    "broadlink_ir_database_write_bytes_total",
+    "Bytes gravados no arquivo da base de dados",
+)
+DATABASE_SIZE_BYTES = REGISTRY.gauge(
+    "broadlink_ir_database_size_bytes",
+    "Tamanho do arquivo da base de dados",
+)
+DATABASE_CODES = REGISTRY.gauge(
+    "broadlink_ir_database_codes",
+    "Códigos na base de dados",
+)
@@ -0,0 +1,118 @@
+"""Remote para enviar os códigos da base pelo remote.send_command"""
+
+import asyncio
+import logging
+from typing import Any, Iterable, List
+
+from homeassistant.components.remote import (
+    ATTR_DELAY_SECS,
+    ATTR_DEVICE,
+    ATTR_NUM_REPEATS,
+    DEFAULT_DELAY_SECS,
+    DEFAULT_NUM_REPEATS,
+    RemoteEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .coordinator import BroadlinkIRCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Configura o remote do Broadlink"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities([
+        BroadlinkIRRemote(coordinator, hass.data[DOMAIN]["commands"], hass.data[DOMAIN]["converter"])
+    ])
+
+
+class BroadlinkIRRemote(CoordinatorEntity, RemoteEntity, RestoreEntity):
+    """
+    Remote de um Broadlink
+    device/command são resolvidos pelo mapa de comandos em memória; os
+    comandos com prefixo b64: são enviados diretamente.
+    """
+    
+    def __init__(self, coordinator: BroadlinkIRCoordinator, commands, converter) -> None:
+        """Inicializa o remote"""
+        super().__init__(coordinator)
+        self.commands = commands
+        self.converter = converter
+        self._attr_name = "Broadlink IR Remote"
+        self._attr_unique_id = f"{DOMAIN}_{coordinator.entry.entry_id}_remote"
+        self._attr_icon = "mdi:remote"
+        self._attr_is_on = True
+    
+    async def async_added_to_hass(self) -> None:
+        """Restaura ligado/desligado"""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            self._attr_is_on = last_state.state != "off"
+    
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Habilita o envio de comandos"""
+        self._attr_is_on = True
+        self.async_write_ha_state()
+    
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Desabilita o envio de comandos"""
+        self._attr_is_on = False
+        self.async_write_ha_state()
+    
+    async def async_send_command(self, command: Iterable[str], **kwargs: Any) -> None:
+        """Envia os comandos (device/command da base ou b64:...)"""
+        if not self.is_on:
+            _LOGGER.warning(f"{self.name} está desligado; comando ignorado")
+            return
+        
+        try:
+            packets = await self._async_resolve(list(command), kwargs.get(ATTR_DEVICE))
+        except ValueError as e:
+            _LOGGER.error(f"Erro ao enviar comando: {e}")
+            return
+        
+        repeats = kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS)
+        delay = kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS)
+        for number, packet in enumerate(packets * repeats):
+            if number:
+                await asyncio.sleep(delay)
+            await self.coordinator.async_send_packet(packet)
+    
+    async def _async_resolve(self, commands: List[str], device) -> List[bytes]:
+        """Pacotes dos comandos; só vai ao executor se algum ainda não estiver decodificado"""
+        packets = []
+        for command in commands:
+            if command.startswith("b64:"):
+                packets.append(self.converter.base64_to_bytes(command))
+                continue
+            if device is None:
+                raise ValueError(f"Informe device para enviar o comando {command}")
+            
+            packet = self.commands.cached(device, command)
+            if packet is None:
+                packet = await self.hass.async_add_executor_job(
+                    self.commands.packet, device, command
+                )
+            packets.append(packet)
+        return packets
+    
+    @property
+    def available(self) -> bool:
+        """Disponibilidade do remote"""
+        return self.coordinator.last_update_success
+    
+    @property
+    def device_info(self):
+        """Informações do dispositivo"""
+        return self.coordinator.device_info
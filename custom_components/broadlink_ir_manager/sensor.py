@@ -1,11 +1,12 @@
 """Sensores para o Broadlink IR Manager"""
 
 import logging
-from typing import Optional
+from typing import Optional, Tuple
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -17,15 +18,79 @@ from .const import (
     ATTR_BASE64_CODE,
     ATTR_PRONTO_CODE,
     ATTR_FREQUENCY,
+    ATTR_QUALITY,
     ATTR_LEARNING_TIMEOUT,
+    ATTR_SAMPLES_CAPTURED,
+    ATTR_SAMPLES_REQUESTED,
     ATTR_LAST_CODE,
     ATTR_CODES_COUNT,
+    ATTR_CODES_BY_DEVICE,
+    ATTR_RECENT_CODES,
+    CONF_COMPACT_ATTRIBUTES,
+    LAST_CODE_DETAIL_ATTRIBUTES,
+    DATABASE_DETAIL_ATTRIBUTES,
 )
 from .coordinator import BroadlinkIRCoordinator
+from .metrics import DEVICE_ERRORS, REGISTRY
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def build_code_attributes(converter, base64_code: Optional[str],
+                          quality: Optional[int] = None) -> dict:
+    """Atributos completos de um código capturado (Base64, Pronto, frequência e qualidade)"""
+    attrs = {}
+    
+    if base64_code:
+        attrs[ATTR_BASE64_CODE] = base64_code
+        if quality is not None:
+            attrs[ATTR_QUALITY] = quality
+        
+        try:
+            pronto_code = converter.broadlink_to_pronto(base64_code)
+            frequency = converter.get_frequency_from_pronto(pronto_code)
+            
+            attrs[ATTR_PRONTO_CODE] = pronto_code
+            attrs[ATTR_FREQUENCY] = frequency
+        except Exception as e:
+            _LOGGER.error(f"Erro na conversão: {e}")
+            attrs["conversion_error"] = str(e)
+    
+    return attrs
+
+
+def build_database_attributes(database) -> Tuple[int, dict]:
+    """Total de códigos e atributos completos da base de dados"""
+    stats = database.get_statistics()
+    
+    attrs = {
+        "total_devices": stats.get("total_devices", 0),
+        "devices": stats.get("devices", []),
+        ATTR_CODES_BY_DEVICE: stats.get("codes_by_device", {}),
+    }
+    
+    # Adiciona últimos códigos adicionados (mais recentes primeiro)
+    recent_codes = database.get_recent_codes(5)
+    if recent_codes:
+        attrs[ATTR_RECENT_CODES] = [
+            {
+                "id": code.id,
+                "name": code.name,
+                "device": code.device,
+                "command": code.command,
+                "created_at": code.created_at,
+            }
+            for code in recent_codes
+        ]
+    
+    return stats.get("total_codes", 0), attrs
+
+
+def _without(attrs: dict, names: frozenset) -> dict:
+    """Cópia dos atributos sem as chaves em names"""
+    return {key: value for key, value in attrs.items() if key not in names}
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -35,11 +100,13 @@ async def async_setup_entry(
     coordinator = hass.data[DOMAIN][entry.entry_id]
     database = hass.data[DOMAIN]["database"]
     converter = hass.data[DOMAIN]["converter"]
+    compact = hass.data[DOMAIN].get("config", {}).get(CONF_COMPACT_ATTRIBUTES, False)
     
     entities = [
         BroadlinkIRStatusSensor(coordinator),
-        BroadlinkIRCodeSensor(coordinator, converter),
-        BroadlinkIRDatabaseSensor(coordinator, database),
+        BroadlinkIRCodeSensor(coordinator, converter, compact),
+        BroadlinkIRDatabaseSensor(coordinator, database, compact),
+        BroadlinkIRMetricsSensor(coordinator),
     ]
     
     async_add_entities(entities)
@@ -76,6 +143,10 @@ class BroadlinkIRStatusSensor(CoordinatorEntity, SensorEntity):
         
         if self.coordinator.state == STATE_LEARNING:
             attrs[ATTR_LEARNING_TIMEOUT] = self.coordinator.timeout
+            if self.coordinator.sample_progress:
+                captured, requested = self.coordinator.sample_progress
+                attrs[ATTR_SAMPLES_CAPTURED] = captured
+                attrs[ATTR_SAMPLES_REQUESTED] = requested
         
         return attrs
     
@@ -91,15 +162,25 @@ class BroadlinkIRStatusSensor(CoordinatorEntity, SensorEntity):
 
 
 class BroadlinkIRCodeSensor(CoordinatorEntity, SensorEntity):
-    """Sensor para códigos IR capturados"""
+    """
+    Sensor para códigos IR capturados
+    No modo compacto o Base64 e o Pronto ficam fora do estado e são
+    obtidos pelo serviço get_sensor_details ou pelo websocket.
+    """
+    
+    _unrecorded_attributes = LAST_CODE_DETAIL_ATTRIBUTES
     
-    def __init__(self, coordinator: BroadlinkIRCoordinator, converter) -> None:
+    def __init__(self, coordinator: BroadlinkIRCoordinator, converter,
+                 compact: bool = False) -> None:
         """Inicializa sensor de códigos"""
         super().__init__(coordinator)
         self.converter = converter
+        self.compact = compact
         self._attr_name = "Broadlink IR Last Code"
         self._attr_unique_id = f"{DOMAIN}_last_code"
         self._attr_icon = "mdi:barcode"
+        self._cached_code: Optional[str] = None
+        self._cached_attrs: dict = {}
     
     @property
     def native_value(self) -> Optional[str]:
@@ -110,23 +191,23 @@ class BroadlinkIRCodeSensor(CoordinatorEntity, SensorEntity):
     
     @property
     def extra_state_attributes(self) -> dict:
-        """Atributos extras do sensor"""
-        attrs = {}
-        
-        if self.coordinator.last_learned_code:
-            base64_code = self.coordinator.last_learned_code
-            attrs[ATTR_BASE64_CODE] = base64_code
-            
-            try:
-                pronto_code = self.converter.broadlink_to_pronto(base64_code)
-                frequency = self.converter.get_frequency_from_pronto(pronto_code)
-                
-                attrs[ATTR_PRONTO_CODE] = pronto_code
-                attrs[ATTR_FREQUENCY] = frequency
-            except Exception as e:
-                _LOGGER.error(f"Erro na conversão: {e}")
-                attrs["conversion_error"] = str(e)
+        """Atributos extras do sensor (convertidos uma vez por código)"""
+        base64_code = self.coordinator.last_learned_code
+        if base64_code != self._cached_code:
+            self._cached_code = base64_code
+            self._cached_attrs = self._build_attributes(base64_code)
+        return self._cached_attrs
+    
+    def _build_attributes(self, base64_code: Optional[str]) -> dict:
+        """Monta os atributos do código capturado"""
+        capture = self.coordinator.last_capture
+        quality = None
+        if capture and capture["base64_code"] == base64_code:
+            quality = capture.get("quality")
         
+        attrs = build_code_attributes(self.converter, base64_code, quality)
+        if self.compact:
+            return _without(attrs, LAST_CODE_DETAIL_ATTRIBUTES)
         return attrs
     
     @property
@@ -141,52 +222,56 @@ class BroadlinkIRCodeSensor(CoordinatorEntity, SensorEntity):
 
 
 class BroadlinkIRDatabaseSensor(CoordinatorEntity, SensorEntity):
-    """Sensor para estatísticas da base de dados"""
+    """
+    Sensor para estatísticas da base de dados
+    No modo compacto codes_by_device e recent_codes ficam fora do estado.
+    """
+    
+    _unrecorded_attributes = frozenset({"devices"}) | DATABASE_DETAIL_ATTRIBUTES
     
-    def __init__(self, coordinator: BroadlinkIRCoordinator, database) -> None:
+    def __init__(self, coordinator: BroadlinkIRCoordinator, database,
+                 compact: bool = False) -> None:
         """Inicializa sensor da base de dados"""
         super().__init__(coordinator)
         self.database = database
+        self.compact = compact
         self._attr_name = "Broadlink IR Database"
         self._attr_unique_id = f"{DOMAIN}_database"
         self._attr_icon = "mdi:database"
         self._attr_device_class = SensorDeviceClass.DATA_SIZE
         self._attr_native_unit_of_measurement = "codes"
+        self._cached: Optional[Tuple[int, int, dict]] = None
     
     @property
-    def native_value(self) -> int:
+    def native_value(self) -> Optional[int]:
         """Valor do sensor (número total de códigos)"""
-        stats = self.database.get_statistics()
-        return stats.get("total_codes", 0)
+        # A base é carregada em segundo plano após o início do HA
+        if not self.database.loaded:
+            return None
+        
+        return self._statistics()[0]
     
     @property
     def extra_state_attributes(self) -> dict:
         """Atributos extras do sensor"""
-        stats = self.database.get_statistics()
-        
-        attrs = {
-            "total_devices": stats.get("total_devices", 0),
-            "devices": stats.get("devices", []),
-            "codes_by_device": stats.get("codes_by_device", {}),
-        }
-        
-        # Adiciona últimos códigos adicionados
-        recent_codes = self.database.get_all_codes()
-        if recent_codes:
-            # Ordena por data de criação (mais recentes primeiro)
-            recent_codes.sort(key=lambda x: x.created_at, reverse=True)
-            attrs["recent_codes"] = [
-                {
-                    "id": code.id,
-                    "name": code.name,
-                    "device": code.device,
-                    "command": code.command,
-                    "created_at": code.created_at,
-                }
-                for code in recent_codes[:5]  # Últimos 5 códigos
-            ]
+        if not self.database.loaded:
+            return {}
         
-        return attrs
+        return self._statistics()[1]
+    
+    def _statistics(self) -> Tuple[int, dict]:
+        """Total e atributos, recalculados só quando a versão da base muda"""
+        version = self.database.version
+        if self._cached is None or self._cached[0] != version:
+            self._cached = (version, *self._build_statistics())
+        return self._cached[1], self._cached[2]
+    
+    def _build_statistics(self) -> Tuple[int, dict]:
+        """Monta total de códigos e atributos a partir da base"""
+        total, attrs = build_database_attributes(self.database.snapshot())
+        if self.compact:
+            return total, _without(attrs, DATABASE_DETAIL_ATTRIBUTES)
+        return total, attrs
     
     @property
     def available(self) -> bool:
@@ -198,3 +283,34 @@ class BroadlinkIRDatabaseSensor(CoordinatorEntity, SensorEntity):
         """Informações do dispositivo"""
         return self.coordinator.device_info
 
+
+class BroadlinkIRMetricsSensor(CoordinatorEntity, SensorEntity):
+    """Sensor de diagnóstico com as métricas de desempenho"""
+    
+    # Contadores mudam a cada leitura da base: ficam fora do recorder (o
+    # histórico completo está no endpoint /api/broadlink_ir_manager/metrics)
+    _unrecorded_attributes = frozenset(REGISTRY.names())
+    
+    def __init__(self, coordinator: BroadlinkIRCoordinator) -> None:
+        """Inicializa sensor de métricas"""
+        super().__init__(coordinator)
+        self._attr_name = "Broadlink IR Metrics"
+        self._attr_unique_id = f"{DOMAIN}_metrics"
+        self._attr_icon = "mdi:chart-timeline-variant"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_native_unit_of_measurement = "errors"
+    
+    @property
+    def native_value(self) -> int:
+        """Valor do sensor (total de erros do dispositivo)"""
+        return int(DEVICE_ERRORS.total())
+    
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Atributos extras do sensor (latências, contadores e gauges)"""
+        return REGISTRY.summary()
+    
+    @property
+    def device_info(self):
+        """Informações do dispositivo"""
+        return self.coordinator.device_info
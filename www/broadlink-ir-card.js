@@ -11,6 +11,11 @@ class BroadlinkIRCard extends HTMLElement {
     this._hass = {};
     this._learningTimeout = null;
     this._lastCode = null;
+    this._details = null;
+    this._detailsKey = null;
+    this._entityIds = [];
+    this._states = {};
+    this._frame = null;
   }
 
   setConfig(config) {
@@ -18,12 +23,60 @@ class BroadlinkIRCard extends HTMLElement {
       throw new Error('Você precisa definir uma entidade');
     }
     this._config = config;
+    this._entityIds = [
+      config.entity,
+      config.entity.replace('_status', '_last_code'),
+      config.entity.replace('_status', '_database'),
+    ];
+    this._states = {};
     this.render();
+    if (this._hass.states) this.hass = this._hass;
   }
 
+  // O HA chama este setter a cada alteração de qualquer entidade: o card só
+  // é redesenhado quando o objeto de estado de uma das suas entidades muda
   set hass(hass) {
     this._hass = hass;
-    this.updateContent();
+
+    let changed = false;
+    for (const entityId of this._entityIds) {
+      const state = hass.states[entityId];
+      if (state !== this._states[entityId]) {
+        this._states[entityId] = state;
+        changed = true;
+      }
+    }
+    if (changed) this.scheduleUpdate();
+  }
+
+  // Agrupa as escritas no DOM em um único frame
+  scheduleUpdate() {
+    if (this._frame !== null) return;
+    this._frame = requestAnimationFrame(() => {
+      this._frame = null;
+      this.updateContent();
+    });
+  }
+
+  disconnectedCallback() {
+    if (this._frame !== null) {
+      cancelAnimationFrame(this._frame);
+      this._frame = null;
+    }
+  }
+
+  connectedCallback() {
+    // Redesenha com o estado atual ao voltar para a tela
+    if (this._hass && this._hass.states) this.scheduleUpdate();
+  }
+
+  // Helpers que só tocam o DOM quando o valor muda
+  setText(element, text) {
+    if (element.textContent !== text) element.textContent = text;
+  }
+
+  setProperty(element, name, value) {
+    if (element[name] !== value) element[name] = value;
   }
 
   render() {
@@ -267,8 +320,18 @@ class BroadlinkIRCard extends HTMLElement {
           color: var(--secondary-text-color);
         }
         
+        .empty-list {
+          text-align: center;
+          color: var(--secondary-text-color);
+          padding: 20px;
+        }
+        
+        .disconnected {
+          color: var(--error-color);
+        }
+        
         .hidden {
-          display: none;
+          display: none !important;
         }
         
         .loading {
@@ -288,7 +351,7 @@ class BroadlinkIRCard extends HTMLElement {
             <div class="status-dot idle" id="statusDot"></div>
             <span id="statusText">Aguardando...</span>
           </div>
-          <div id="deviceInfo" class="device-info"></div>
+          <div id="deviceInfo" class="device-info"><small></small></div>
         </div>
         
         <div class="controls-section">
@@ -323,7 +386,7 @@ class BroadlinkIRCard extends HTMLElement {
           </div>
           <div class="code-display" id="prontoDisplay">Nenhum código convertido</div>
           
-          <div class="save-section" id="saveSection" style="display: none;">
+          <div class="save-section hidden" id="saveSection">
             <input type="text" class="input-field" id="codeName" placeholder="Nome do código">
             <input type="text" class="input-field" id="deviceName" placeholder="Dispositivo">
             <input type="text" class="input-field" id="commandName" placeholder="Comando">
@@ -344,7 +407,9 @@ class BroadlinkIRCard extends HTMLElement {
               <div class="stat-label">Dispositivos</div>
             </div>
           </div>
-          <div class="recent-codes" id="recentCodes"></div>
+          <div class="recent-codes" id="recentCodes">
+            <div class="empty-list hidden" id="recentEmpty">Nenhum código salvo</div>
+          </div>
         </div>
       </ha-card>
     `;
@@ -376,9 +441,38 @@ class BroadlinkIRCard extends HTMLElement {
     const entity = this._hass.states[this._config.entity];
     if (!entity) return;
 
+    const details = this.sensorDetails();
+
     this.updateStatus(entity);
-    this.updateCodeDisplay(entity);
-    this.updateDatabaseStats();
+    this.updateCodeDisplay(entity, details);
+    this.updateDatabaseStats(details);
+  }
+
+  // Modo compacto: os atributos volumosos ficam fora do estado e são
+  // buscados pelo websocket uma vez a cada alteração dos sensores
+  sensorDetails() {
+    const codeEntity = this._hass.states[this._config.entity.replace('_status', '_last_code')];
+    const dbEntity = this._hass.states[this._config.entity.replace('_status', '_database')];
+
+    const codeCompact = codeEntity && codeEntity.state === 'Code Available' &&
+      !codeEntity.attributes.base64_code;
+    const dbCompact = dbEntity && Number(dbEntity.state) > 0 &&
+      !dbEntity.attributes.codes_by_device;
+    if (!codeCompact && !dbCompact) return null;
+
+    const key = `${codeEntity && codeEntity.last_updated}|${dbEntity && dbEntity.last_updated}`;
+    if (this._detailsKey !== key) {
+      this._detailsKey = key;
+      this._details = null;
+      this._hass.callWS({ type: 'broadlink_ir_manager/sensor_details' })
+        .then(details => {
+          if (this._detailsKey !== key) return;
+          this._details = details;
+          this.scheduleUpdate();
+        })
+        .catch(error => console.error('Erro ao obter detalhes dos sensores:', error));
+    }
+    return this._details;
   }
 
   updateStatus(entity) {
@@ -392,41 +486,30 @@ class BroadlinkIRCard extends HTMLElement {
     const attrs = entity.attributes;
 
     // Atualiza indicador de status
-    statusDot.className = `status-dot ${state}`;
+    this.setProperty(statusDot, 'className', `status-dot ${state}`);
     
-    switch (state) {
-      case 'idle':
-        statusText.textContent = 'Pronto para capturar';
-        startBtn.disabled = false;
-        stopBtn.disabled = true;
-        break;
-      case 'learning':
-        statusText.textContent = 'Modo learning ativo - aponte o controle';
-        startBtn.disabled = true;
-        stopBtn.disabled = false;
-        break;
-      case 'code_received':
-        statusText.textContent = 'Código capturado com sucesso!';
-        startBtn.disabled = false;
-        stopBtn.disabled = true;
-        break;
-      default:
-        statusText.textContent = 'Status desconhecido';
-        startBtn.disabled = false;
-        stopBtn.disabled = true;
-    }
+    const learning = state === 'learning';
+    const texts = {
+      idle: 'Pronto para capturar',
+      learning: 'Modo learning ativo - aponte o controle',
+      code_received: 'Código capturado com sucesso!',
+    };
+    this.setText(statusText, texts[state] || 'Status desconhecido');
+    this.setProperty(startBtn, 'disabled', learning);
+    this.setProperty(stopBtn, 'disabled', !learning);
 
     // Atualiza informações do dispositivo
+    const info = deviceInfo.querySelector('small');
     if (attrs.device_connected) {
-      deviceInfo.innerHTML = `
-        <small>Conectado: ${attrs.host || 'Auto-descoberto'}</small>
-      `;
+      this.setText(info, `Conectado: ${attrs.host || 'Auto-descoberto'}`);
+      info.classList.remove('disconnected');
     } else {
-      deviceInfo.innerHTML = '<small style="color: var(--error-color);">Dispositivo desconectado</small>';
+      this.setText(info, 'Dispositivo desconectado');
+      info.classList.add('disconnected');
     }
   }
 
-  updateCodeDisplay(entity) {
+  updateCodeDisplay(entity, details) {
     const codeEntity = this._hass.states[this._config.entity.replace('_status', '_last_code')];
     if (!codeEntity) return;
 
@@ -434,26 +517,26 @@ class BroadlinkIRCard extends HTMLElement {
     const prontoDisplay = this.shadowRoot.getElementById('prontoDisplay');
     const saveSection = this.shadowRoot.getElementById('saveSection');
 
-    const attrs = codeEntity.attributes;
+    const attrs = { ...codeEntity.attributes, ...(details ? details.last_code : {}) };
 
     if (attrs.base64_code) {
-      base64Display.textContent = attrs.base64_code;
-      prontoDisplay.textContent = attrs.pronto_code || 'Erro na conversão';
-      saveSection.style.display = 'grid';
+      this.setText(base64Display, attrs.base64_code);
+      this.setText(prontoDisplay, attrs.pronto_code || 'Erro na conversão');
+      saveSection.classList.remove('hidden');
       this._lastCode = {
         base64: attrs.base64_code,
         pronto: attrs.pronto_code,
         frequency: attrs.frequency
       };
     } else {
-      base64Display.textContent = 'Nenhum código capturado';
-      prontoDisplay.textContent = 'Nenhum código convertido';
-      saveSection.style.display = 'none';
+      this.setText(base64Display, 'Nenhum código capturado');
+      this.setText(prontoDisplay, 'Nenhum código convertido');
+      saveSection.classList.add('hidden');
       this._lastCode = null;
     }
   }
 
-  updateDatabaseStats() {
+  updateDatabaseStats(details) {
     const dbEntity = this._hass.states[this._config.entity.replace('_status', '_database')];
     if (!dbEntity) return;
 
@@ -461,24 +544,44 @@ class BroadlinkIRCard extends HTMLElement {
     const totalDevices = this.shadowRoot.getElementById('totalDevices');
     const recentCodes = this.shadowRoot.getElementById('recentCodes');
 
-    const attrs = dbEntity.attributes;
+    const attrs = { ...dbEntity.attributes, ...(details ? details.database : {}) };
 
-    totalCodes.textContent = dbEntity.state || '0';
-    totalDevices.textContent = attrs.total_devices || '0';
+    this.setText(totalCodes, dbEntity.state || '0');
+    this.setText(totalDevices, String(attrs.total_devices || '0'));
 
-    // Atualiza códigos recentes
-    if (attrs.recent_codes && attrs.recent_codes.length > 0) {
-      recentCodes.innerHTML = attrs.recent_codes.map(code => `
-        <div class="code-item">
-          <div class="code-info">
-            <div class="code-name">${code.name}</div>
-            <div class="code-device">${code.device} - ${code.command}</div>
-          </div>
-        </div>
-      `).join('');
-    } else {
-      recentCodes.innerHTML = '<div style="text-align: center; color: var(--secondary-text-color); padding: 20px;">Nenhum código salvo</div>';
+    // Atualiza códigos recentes: reaproveita os itens existentes e só
+    // cria/remove os que sobram ou faltam
+    const codes = attrs.recent_codes || [];
+    const empty = this.shadowRoot.getElementById('recentEmpty');
+    empty.classList.toggle('hidden', codes.length > 0);
+
+    const items = recentCodes.getElementsByClassName('code-item');
+    while (items.length > codes.length) {
+      items[items.length - 1].remove();
     }
+    codes.forEach((code, index) => {
+      let item = items[index];
+      if (!item) {
+        item = this.createCodeItem();
+        recentCodes.appendChild(item);
+      }
+      this.setText(item.firstChild.firstChild, code.name);
+      this.setText(item.firstChild.lastChild, `${code.device} - ${code.command}`);
+    });
+  }
+
+  createCodeItem() {
+    const item = document.createElement('div');
+    item.className = 'code-item';
+    const info = document.createElement('div');
+    info.className = 'code-info';
+    const name = document.createElement('div');
+    name.className = 'code-name';
+    const device = document.createElement('div');
+    device.className = 'code-device';
+    info.append(name, device);
+    item.appendChild(info);
+    return item;
   }
 
   async startLearning() {